@@ -3,12 +3,10 @@ Dataset selection constraints
 """
 
 import sys
-import warnings
-from collections import defaultdict
 from collections.abc import Mapping
 from datetime import datetime
 from functools import total_ordering
-from typing import Literal, Protocol, runtime_checkable
+from typing import Any, Literal, Protocol, runtime_checkable
 
 if sys.version_info < (3, 11):
     from typing_extensions import Self
@@ -16,6 +14,7 @@ else:
     from typing import Self
 
 import numpy as np
+import numpy.typing as npt
 import pandas as pd
 from attrs import field, frozen
 from loguru import logger
@@ -109,6 +108,111 @@ def _to_tuple(value: None | str | tuple[str, ...]) -> tuple[str, ...]:
     return tuple(value)
 
 
+def _group_codes(group: pd.DataFrame, group_by: tuple[str, ...]) -> npt.NDArray[np.intp]:
+    """
+    Get the integer code of the subgroup that each row of a group belongs to
+
+    Rows with a missing value for any of the `group_by` facets are not part of a subgroup
+    and have a code of -1, matching the behaviour of `DataFrame.groupby`.
+    """
+    codes = group.groupby(list(group_by), sort=False, observed=True).ngroup()
+    return codes.fillna(-1).to_numpy(dtype=np.intp)
+
+
+def _to_datetime64(values: pd.Series) -> npt.NDArray[np.datetime64]:  # type: ignore[type-arg]
+    """
+    Convert a series of times to an array of `datetime64[us]`
+
+    The times may be stored as `datetime64` or as `datetime.datetime` objects
+    (for example, if some times are outside the range supported by `datetime64[ns]`).
+    Missing values are converted to `NaT`.
+    """
+    if pd.api.types.is_datetime64_dtype(values.dtype):
+        return values.to_numpy().astype("datetime64[us]")
+    return np.array(values.astype(object).where(values.notna(), None).tolist(), dtype="datetime64[us]")
+
+
+def _timerange_group_codes(
+    group: pd.DataFrame, group_by: tuple[str, ...]
+) -> tuple[npt.NDArray[np.intp], npt.NDArray[np.datetime64], npt.NDArray[np.datetime64]]:
+    """
+    Get the subgroup codes and the start and end times of a group
+
+    Rows without a start or end time are not part of a subgroup.
+    """
+    codes = _group_codes(group, group_by)
+    start = _to_datetime64(group["start_time"])
+    end = _to_datetime64(group["end_time"])
+    codes[np.isnat(start) | np.isnat(end)] = -1
+
+    # Renumber the subgroups so that every code has at least one row
+    in_group = codes >= 0
+    codes[in_group] = np.unique(codes[in_group], return_inverse=True)[1]
+    return codes, start, end
+
+
+def _find_contiguous_groups(  # noqa: PLR0913
+    constraint: "RequireContiguousTimerange",
+    group: pd.DataFrame,
+    codes: npt.NDArray[np.intp],
+    start: npt.NDArray[np.datetime64],
+    end: npt.NDArray[np.datetime64],
+    n_groups: int,
+    check: npt.NDArray[np.bool_],
+) -> npt.NDArray[np.bool_]:
+    """
+    Determine which subgroups have a contiguous timerange
+
+    Only the subgroups where `check` is True are logged.
+    """
+    contiguous = np.ones(n_groups, dtype=bool)
+    in_group = np.flatnonzero(codes >= 0)
+    if len(in_group) < 2:  # noqa: PLR2004
+        return contiguous
+
+    # Sort by subgroup and then start time, keeping the original order for equal start times
+    order = in_group[np.argsort(start[in_group], kind="stable")]
+    order = order[np.argsort(codes[order], kind="stable")]
+
+    sorted_codes = codes[order]
+    gaps = (sorted_codes[1:] == sorted_codes[:-1]) & (
+        (start[order][1:] - end[order][:-1]) > _MAX_TIMEDELTA.to_timedelta64()
+    )
+    for gap_idx in np.flatnonzero(gaps):
+        code = sorted_codes[gap_idx]
+        contiguous[code] = False
+        if check[code]:
+            logger.opt(lazy=True).debug(
+                "Constraint {} not satisfied because gap larger than {} found between {} and {}",
+                lambda: constraint,
+                lambda: _MAX_TIMEDELTA,
+                lambda gap_idx=gap_idx: group["path"].iloc[order[gap_idx]],
+                lambda gap_idx=gap_idx: group["path"].iloc[order[gap_idx + 1]],
+            )
+    return contiguous
+
+
+def _select(group: pd.DataFrame, select: npt.NDArray[np.bool_]) -> pd.DataFrame:
+    """
+    Select the rows of a group
+
+    A row is also deselected if another row with the same index label has been deselected,
+    which matches the behaviour of deselecting the rows of a subgroup using `.loc`.
+    """
+    if not select.all() and not group.index.is_unique:
+        select &= ~group.index.isin(group.index[~select])
+    return group[select]
+
+
+_MAX_TIMEDELTA = pd.Timedelta(
+    days=31,  # Maximum number of days in a month.
+    hours=1,  # Allow for potential rounding errors.
+)
+"""
+Maximum allowed time difference between the end of one file and the start of the next file.
+"""
+
+
 @frozen
 class RequireFacets:
     """
@@ -140,17 +244,31 @@ class RequireFacets:
         """
         Filter out groups of datasets that do not provide the required facets
         """
-        op = all if self.operator == "all" else any
-        select = pd.Series(True, index=group.index)
-        groups = [group] if not self.group_by else (g[1] for g in group.groupby(list(self.group_by)))
-        for subgroup in groups:
-            if not op(value in subgroup[self.dimension].values for value in self.required_facets):
-                logger.debug(
-                    f"Constraint {self} not satisfied because required facet values "
-                    f"not found for group {', '.join(subgroup['path'])}"
-                )
-                select.loc[subgroup.index] = False
-        return group[select]
+        if self.group_by:
+            codes = _group_codes(group, self.group_by)
+        else:
+            codes = np.zeros(len(group), dtype=np.intp)
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+        in_group = codes >= 0
+
+        # Which of the required values are present in each subgroup
+        present = np.zeros((n_groups, len(self.required_facets)), dtype=bool)
+        for i, value in enumerate(self.required_facets):
+            matches = (group[self.dimension] == value).to_numpy(dtype=bool) & in_group
+            present[codes[matches], i] = True
+        reduce = np.logical_and if self.operator == "all" else np.logical_or
+        satisfied = reduce.reduce(present, axis=1)
+
+        for code in np.flatnonzero(~satisfied):
+            logger.opt(lazy=True).debug(
+                "Constraint {} not satisfied because required facet values not found for group {}",
+                lambda: self,
+                lambda code=code: ", ".join(group["path"][codes == code]),
+            )
+
+        select = np.ones(len(group), dtype=bool)
+        select[in_group] = satisfied[codes[in_group]]
+        return _select(group, select)
 
 
 @frozen
@@ -178,47 +296,129 @@ class AddSupplementaryDataset:
         self,
         group: pd.DataFrame,
         data_catalog: pd.DataFrame,
+        candidates: pd.DataFrame | None = None,
     ) -> pd.DataFrame:
         """
         Add a supplementary dataset to the group.
-        """
-        supplementary_facets: defaultdict[str, tuple[str, ...]] = defaultdict(tuple)
-        for facet, values in self.supplementary_facets.items():
-            supplementary_facets[facet] = values if isinstance(values, tuple) else (values,)
 
+        Parameters
+        ----------
+        group
+            A group of datasets that is being validated.
+        data_catalog
+            The data catalog of datasets
+        candidates
+            The result of `select_candidates` for `data_catalog`.
+
+            This doesn't depend on the group,
+            so it can be calculated once and reused for each group of a data catalog.
+            If not provided, it is calculated from `data_catalog`.
+
+        Returns
+        -------
+        :
+            The group of datasets including the supplementary datasets
+        """
+        supplementary_group = self.select_candidates(data_catalog) if candidates is None else candidates
         for facet in self.matching_facets:
-            values = tuple(group[facet].unique())
-            supplementary_facets[facet] += values
+            values = self._supplementary_values(facet) + tuple(group[facet].unique())
+            supplementary_group = supplementary_group[supplementary_group[facet].isin(values)]
 
-        supplementary_group = data_catalog
-        for facet, values in supplementary_facets.items():
-            mask = supplementary_group[facet].isin(values)
-            supplementary_group = supplementary_group[mask]
         if not supplementary_group.empty:
-            matching_facets = list(self.matching_facets)
-            facets = matching_facets + list(self.optional_matching_facets)
-            datasets = group[facets].drop_duplicates()
-            indices = set()
-            for i in range(len(datasets)):
-                dataset = datasets.iloc[i]
-                # Restrict the supplementary datasets to those that match the main dataset.
-                supplementaries = supplementary_group[
-                    (supplementary_group[matching_facets] == dataset[matching_facets]).all(1)
-                ]
-                if not supplementaries.empty:
-                    # Select the best matching supplementary dataset based on the optional matching facets.
-                    scores = (supplementaries[facets] == dataset).sum(axis=1)
-                    matches = supplementaries[scores == scores.max()]
-                    if "version" in facets:
-                        # Select the latest version if there are multiple matches
-                        matches = matches[matches["version"] == matches["version"].max()]
-                    # Select one match per dataset
-                    indices.add(matches.index[0])
-
+            indices = set(self._find_best_matches(group, supplementary_group))
             supplementary_group = supplementary_group.loc[list(indices)].drop_duplicates()
 
         return pd.concat([group, supplementary_group])
 
+    def select_candidates(self, data_catalog: pd.DataFrame) -> pd.DataFrame:
+        """
+        Select the datasets in a data catalog that may be supplementary datasets for any group
+
+        Only the supplementary facets that are not part of the `matching_facets` are used,
+        as these don't depend on the group.
+
+        Parameters
+        ----------
+        data_catalog
+            The data catalog of datasets
+
+        Returns
+        -------
+        :
+            The candidate supplementary datasets
+        """
+        mask = np.ones(len(data_catalog), dtype=bool)
+        for facet, values in self.candidate_facets().items():
+            mask &= data_catalog[facet].isin(values).to_numpy()
+        return data_catalog[mask]
+
+    def candidate_facets(self) -> dict[str, tuple[str, ...]]:
+        """
+        Get the supplementary facets that don't depend on the group
+
+        Returns
+        -------
+        :
+            The values of the supplementary facets that are not part of the `matching_facets`
+        """
+        return {
+            facet: self._supplementary_values(facet)
+            for facet in self.supplementary_facets
+            if facet not in self.matching_facets
+        }
+
+    def _supplementary_values(self, facet: str) -> tuple[str, ...]:
+        values = self.supplementary_facets.get(facet, ())
+        return values if isinstance(values, tuple) else (values,)
+
+    def _find_best_matches(self, group: pd.DataFrame, supplementary_group: pd.DataFrame) -> list[Any]:
+        """
+        Find the best matching supplementary dataset for each of the datasets in a group
+
+        The supplementary datasets must match on all the `matching_facets`.
+        Of those, the datasets that match the most `optional_matching_facets` are selected,
+        followed by the latest version if `version` is one of the facets.
+        If there are still multiple candidates, the first in `supplementary_group` is used.
+
+        Returns
+        -------
+        :
+            Index labels of the best matching supplementary datasets
+            in the order of the datasets in the group
+        """
+        matching_facets = list(self.matching_facets)
+        optional_facets = [f for f in self.optional_matching_facets if f not in self.matching_facets]
+        facets = matching_facets + optional_facets
+
+        # Missing values never match
+        # The facets are compared as objects as categorical columns may have different categories
+        datasets = group[facets].drop_duplicates().astype(object).dropna(subset=matching_facets)
+        datasets = datasets.reset_index(drop=True).assign(_dataset=np.arange(len(datasets)))
+        candidates = (
+            supplementary_group[facets]
+            .astype(object)
+            .reset_index(drop=True)
+            .assign(_position=np.arange(len(supplementary_group)))
+            .dropna(subset=matching_facets)
+        )
+        merged = datasets.merge(candidates, on=matching_facets, suffixes=("", "_supplementary"))
+        if merged.empty:
+            return []
+
+        merged["_score"] = 0
+        for facet in optional_facets:
+            merged["_score"] += (merged[facet] == merged[f"{facet}_supplementary"]).to_numpy(dtype=int)
+        merged = merged[merged["_score"] == merged.groupby("_dataset")["_score"].transform("max")]
+
+        if "version" in facets:
+            # Select the latest version if there are multiple matches
+            version = "version" if "version" in self.matching_facets else "version_supplementary"
+            merged = merged[merged[version] == merged.groupby("_dataset")[version].transform("max")]
+
+        # Select one match per dataset
+        best = merged.loc[merged.groupby("_dataset")["_position"].idxmin()].sort_values("_dataset")
+        return supplementary_group.index[best["_position"].to_numpy()].to_list()
+
     @classmethod
     def from_defaults(
         cls,
@@ -355,31 +555,51 @@ class RequireTimerange:
         """
         Check that all subgroups of the group have a contiguous timerange.
         """
-        select = pd.Series(True, index=group.index)
-        for _, subgroup in group.dropna(subset=["start_time", "end_time"]).groupby(list(self.group_by)):
-            start = subgroup["start_time"].min()
-            end = subgroup["end_time"].max()
-            result = True
-            if self.start is not None and start > self.start:
-                logger.debug(
-                    f"Constraint {self} not satisfied because start time {start} "
-                    f"is after required start time for {', '.join(subgroup['path'])}"
+        codes, start, end = _timerange_group_codes(group, self.group_by)
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+        in_group = codes >= 0
+
+        # The earliest start and latest end time of each subgroup
+        group_start = np.full(n_groups, np.datetime64("NaT", "us"))
+        group_end = np.full(n_groups, np.datetime64("NaT", "us"))
+        if n_groups:
+            order = np.lexsort((start[in_group], codes[in_group]))
+            first = np.r_[0, np.flatnonzero(np.diff(codes[in_group][order])) + 1]
+            group_start[codes[in_group][order][first]] = start[in_group][order][first]
+
+            order = np.lexsort((end[in_group], codes[in_group]))
+            last = np.r_[np.flatnonzero(np.diff(codes[in_group][order])), len(order) - 1]
+            group_end[codes[in_group][order][last]] = end[in_group][order][last]
+
+        satisfied = np.ones(n_groups, dtype=bool)
+        # PartialDateTime can only be compared to datetime objects
+        for code, (start_time, end_time) in enumerate(
+            zip(group_start.astype(object), group_end.astype(object))
+        ):
+            if self.start is not None and start_time > self.start:
+                logger.opt(lazy=True).debug(
+                    "Constraint {} not satisfied because start time {} is after required start time for {}",
+                    lambda: self,
+                    lambda start_time=start_time: start_time,
+                    lambda code=code: ", ".join(group["path"][codes == code]),
                 )
-                result = False
-            if self.end is not None and end < self.end:
-                logger.debug(
-                    f"Constraint {self} not satisfied because end time {end} "
-                    f"is before required end time for {', '.join(subgroup['path'])}"
+                satisfied[code] = False
+            if self.end is not None and end_time < self.end:
+                logger.opt(lazy=True).debug(
+                    "Constraint {} not satisfied because end time {} is before required end time for {}",
+                    lambda: self,
+                    lambda end_time=end_time: end_time,
+                    lambda code=code: ", ".join(group["path"][codes == code]),
                 )
-                result = False
-            if result:
-                contiguous_subgroup = RequireContiguousTimerange(group_by=self.group_by).apply(
-                    subgroup, data_catalog
-                )
-                result = len(contiguous_subgroup) == len(subgroup)
-            if not result:
-                select.loc[subgroup.index] = False
-        return group[select]
+                satisfied[code] = False
+
+        satisfied &= _find_contiguous_groups(
+            RequireContiguousTimerange(group_by=self.group_by), group, codes, start, end, n_groups, satisfied
+        )
+
+        select = np.ones(len(group), dtype=bool)
+        select[in_group] = satisfied[codes[in_group]]
+        return _select(group, select)
 
 
 @frozen
@@ -398,50 +618,17 @@ class RequireContiguousTimerange:
         """
         Check that all subgroups of the group have a contiguous timerange.
         """
-        # Maximum allowed time difference between the end of one file and the
-        # start of the next file.
-        max_timedelta = pd.Timedelta(
-            days=31,  # Maximum number of days in a month.
-            hours=1,  # Allow for potential rounding errors.
+        codes, start, end = _timerange_group_codes(group, self.group_by)
+        n_groups = int(codes.max()) + 1 if len(codes) else 0
+        in_group = codes >= 0
+
+        satisfied = _find_contiguous_groups(
+            self, group, codes, start, end, n_groups, np.ones(n_groups, dtype=bool)
         )
 
-        select = pd.Series(True, index=group.index)
-
-        for _, subgroup in group.dropna(subset=["start_time", "end_time"]).groupby(list(self.group_by)):
-            if len(subgroup) < 2:  # noqa: PLR2004
-                continue
-            sorted_group = subgroup.sort_values("start_time", kind="stable")
-            start_series = sorted_group["start_time"]
-            end_series = sorted_group["end_time"]
-            # Sometimes the elements of start_series.values are of type datetime64[ns]
-            # and sometimes its elements are of type datetime.datetime.
-            # Convert both arrays to datetime.datetime objects to make sure they
-            # can be subtracted.
-            with warnings.catch_warnings():
-                # We have already mitigated the future change in behaviour of DatetimeProperties.to_pydatetime
-                warnings.simplefilter("ignore", FutureWarning)
-
-                if hasattr(start_series, "dt"):
-                    start_array = np.array(start_series.dt.to_pydatetime())
-                else:
-                    start_array = start_series.values  # type: ignore[assignment]
-                if hasattr(end_series, "dt"):
-                    end_array = np.array(end_series.dt.to_pydatetime())
-                else:
-                    end_array = end_series.values  # type: ignore[assignment]
-            diff = start_array[1:] - end_array[:-1]
-            gap_indices = diff > max_timedelta
-            if gap_indices.any():
-                paths = sorted_group["path"]
-                for gap_idx in np.flatnonzero(gap_indices):
-                    logger.debug(
-                        f"Constraint {self} not satisfied because gap larger "
-                        f"than {max_timedelta} found between "
-                        f"{paths.iloc[gap_idx]} and {paths.iloc[gap_idx + 1]}"
-                    )
-                select.loc[subgroup.index] = False
-
-        return group[select]
+        select = np.ones(len(group), dtype=bool)
+        select[in_group] = satisfied[codes[in_group]]
+        return _select(group, select)
 
 
 @frozen
@@ -464,8 +651,8 @@ class RequireOverlappingTimerange:
         if len(group_with_time) < 2:  # noqa: PLR2004
             return group
 
-        starts = group_with_time.groupby(list(self.group_by))["start_time"].min()
-        ends = group_with_time.groupby(list(self.group_by))["end_time"].max()
+        starts = group_with_time.groupby(list(self.group_by), observed=True)["start_time"].min()
+        ends = group_with_time.groupby(list(self.group_by), observed=True)["end_time"].max()
         result = starts.max() < ends.min()
         if not result:
             logger.debug(
@@ -8,8 +8,10 @@ import hashlib
 from collections.abc import Collection, Iterable, Iterator
 from typing import Any, Self
 
+import numpy as np
+import numpy.typing as npt
 import pandas as pd
-from attrs import field, frozen
+from attrs import define, field, frozen
 
 Selector = tuple[tuple[str, str], ...]
 """
@@ -78,6 +80,104 @@ class FacetFilter:
     """
 
 
+@define(eq=False)
+class FacetIndex:
+    """
+    An inverted index of the facet values in a data catalog
+
+    Maps each value of a facet to the sorted positions of the rows in the data catalog with that value.
+    The index for a facet is built the first time that it is used and then reused,
+    so the data catalog is only scanned once per facet rather than once per filter.
+
+    The data catalog must not be modified after the index has been created.
+    """
+
+    data_catalog: pd.DataFrame
+    _facets: dict[str, dict[Any, npt.NDArray[np.intp]]] = field(factory=dict, init=False, repr=False)
+
+    def _build(self, facet: str) -> dict[Any, npt.NDArray[np.intp]]:
+        column = self.data_catalog[facet]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            codes = column.cat.codes.to_numpy()
+            uniques = column.cat.categories
+        else:
+            codes, uniques = pd.factorize(column)
+
+        # A stable sort keeps the positions for each value in ascending order
+        order = np.argsort(codes, kind="stable")
+        bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+        return {value: order[bounds[i] : bounds[i + 1]] for i, value in enumerate(uniques)}
+
+    def positions(self, facet: str, values: Collection[Any]) -> npt.NDArray[np.intp]:
+        """
+        Get the positions of the rows where the facet has one of the given values
+
+        Parameters
+        ----------
+        facet
+            Facet to look up
+        values
+            Values of the facet to match
+
+        Raises
+        ------
+        KeyError
+            The facet is not a column in the data catalog
+
+        Returns
+        -------
+        :
+            Sorted positions of the matching rows
+        """
+        if facet not in self._facets:
+            if facet not in self.data_catalog.columns:
+                raise KeyError(
+                    f"Facet {facet!r} not in data catalog columns: {self.data_catalog.columns.to_list()}"
+                )
+            self._facets[facet] = self._build(facet)
+
+        index = self._facets[facet]
+        matches = [index[value] for value in values if value in index]
+        if not matches:
+            return np.empty(0, dtype=np.intp)
+        if len(matches) == 1:
+            return matches[0]
+        return np.sort(np.concatenate(matches))
+
+    def select(self, filters: Iterable[FacetFilter]) -> npt.NDArray[np.intp]:
+        """
+        Get the positions of the rows that match any of the filters
+
+        The facets within a filter are combined using an intersection
+        and the filters are combined using a union.
+
+        Parameters
+        ----------
+        filters
+            Filters to apply
+
+        Returns
+        -------
+        :
+            Sorted positions of the matching rows
+        """
+        selected: npt.NDArray[np.intp] = np.empty(0, dtype=np.intp)
+        for facet_filter in filters:
+            matched: npt.NDArray[np.intp] | None = None
+            for facet, values in facet_filter.facets.items():
+                facet_positions = self.positions(facet, values)
+                matched = (
+                    facet_positions
+                    if matched is None
+                    else np.intersect1d(matched, facet_positions, assume_unique=True)
+                )
+            if matched is None:
+                # A filter without any facets matches everything
+                matched = np.arange(len(self.data_catalog))
+            selected = np.union1d(selected, matched)
+        return selected
+
+
 def sort_selector(inp: Selector) -> Selector:
     """
     Sort the selector by key
@@ -95,19 +195,49 @@ def sort_selector(inp: Selector) -> Selector:
     return tuple(sorted(inp, key=lambda x: x[0]))
 
 
+def _without_categories(datasets: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert any categorical columns to object columns
+
+    Data catalogs store facets as categorical columns to reduce their size,
+    but the datasets passed to a diagnostic use plain columns.
+    Otherwise, grouping by a categorical column would also return groups for any unobserved categories.
+
+    Parameters
+    ----------
+    datasets
+        Datasets to convert
+
+    Returns
+    -------
+    :
+        Datasets without any categorical columns.
+
+        Missing values are represented as None.
+    """
+    categorical = [name for name, dtype in datasets.dtypes.items() if isinstance(dtype, pd.CategoricalDtype)]
+    if not categorical:
+        return datasets
+
+    return datasets.assign(
+        **{
+            str(name): datasets[name].astype(object).where(datasets[name].notna(), None)
+            for name in categorical
+        }
+    )
+
+
 @frozen
 class DatasetCollection:
     """
     Group of datasets required for a given diagnostic execution for a specific source dataset type.
     """
 
-    datasets: pd.DataFrame
+    _datasets: pd.DataFrame = field(alias="datasets")
     """
-    DataFrame containing the datasets that were selected for the execution.
+    Datasets as they were selected from the data catalog
 
-    The columns in this dataframe depend on the source dataset type, but always include:
-    * path
-    * [slug_column]
+    These may still contain categorical columns.
     """
     slug_column: str
     """
@@ -129,15 +259,38 @@ class DatasetCollection:
         """
         return {key: value for key, value in self.selector}
 
+    @functools.cached_property
+    def datasets(self) -> pd.DataFrame:
+        """
+        DataFrame containing the datasets that were selected for the execution.
+
+        The columns in this dataframe depend on the source dataset type, but always include:
+        * path
+        * [slug_column]
+
+        Any categorical columns are converted to object columns.
+        This conversion is only performed when the datasets are first accessed,
+        as the solver creates collections for many executions that are never run.
+
+        This dataframe should not be modified as it may be shared between executions.
+        """
+        return _without_categories(self._datasets)
+
     def __getattr__(self, item: str) -> Any:
         return getattr(self.datasets, item)
 
     def __getitem__(self, item: str | list[str]) -> Any:
         return self.datasets[item]
 
-    def __hash__(self) -> int:
+    @functools.cached_property
+    def _hash(self) -> int:
         # This hashes each item individually and sums them so order doesn't matter
-        return int(pd.util.hash_pandas_object(self.datasets[self.slug_column]).sum())
+        # Categorical columns hash to the same values, so the datasets don't need to be converted
+        return int(pd.util.hash_pandas_object(self._datasets[self.slug_column]).sum())
+
+    def __hash__(self) -> int:
+        # The hash is only calculated once as a collection may be shared by many executions
+        return self._hash
 
     def __eq__(self, other: object) -> bool:
         return self.__hash__() == other.__hash__()
@@ -190,7 +343,7 @@ class ExecutionDatasetCollection:
         """
         return self._collection.items()
 
-    @property
+    @functools.cached_property
     def hash(self) -> str:
         """
         Unique identifier for the collection
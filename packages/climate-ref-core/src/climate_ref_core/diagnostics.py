@@ -12,7 +12,7 @@ import pandas as pd
 from attrs import field, frozen
 
 from climate_ref_core.constraints import GroupConstraint
-from climate_ref_core.datasets import ExecutionDatasetCollection, FacetFilter, SourceDatasetType
+from climate_ref_core.datasets import ExecutionDatasetCollection, FacetFilter, FacetIndex, SourceDatasetType
 from climate_ref_core.metric_values import SeriesMetricValue
 from climate_ref_core.metric_values.typing import SeriesDefinition
 from climate_ref_core.pycmec.metric import CMECMetric
@@ -351,7 +351,9 @@ class DataRequirement:
     This is effectively an AND operation.
     """
 
-    def apply_filters(self, data_catalog: pd.DataFrame) -> pd.DataFrame:
+    def apply_filters(
+        self, data_catalog: pd.DataFrame, facet_index: FacetIndex | None = None
+    ) -> pd.DataFrame:
         """
         Apply filters to a DataFrame-based data catalog.
 
@@ -360,6 +362,11 @@ class DataRequirement:
         data_catalog
             DataFrame to filter.
             Each column contains a facet
+        facet_index
+            Index of the facet values in `data_catalog`.
+
+            If provided, the filters are resolved using the index rather than scanning the data catalog.
+            This is much faster when the same data catalog is filtered many times.
 
         Returns
         -------
@@ -369,6 +376,11 @@ class DataRequirement:
         if not self.filters or any(not f.facets for f in self.filters):
             return data_catalog
 
+        if facet_index is not None:
+            if facet_index.data_catalog is not data_catalog:
+                raise ValueError("The facet index was not created for this data catalog")
+            return data_catalog.iloc[facet_index.select(self.filters)]
+
         select = pd.Series(False, index=data_catalog.index)
         for facet_filter in self.filters:
             values = {}
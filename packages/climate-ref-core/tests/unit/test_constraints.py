@@ -1,7 +1,10 @@
 import operator
+import warnings
+from collections import defaultdict
 from collections.abc import Callable
 from datetime import datetime
 
+import numpy as np
 import pandas as pd
 import pytest
 from pandas.testing import assert_frame_equal
@@ -763,3 +766,247 @@ def test_apply_constraint_validate_invalid(data_catalog):
         )
         is None
     )
+
+
+def _legacy_require_facets(constraint: RequireFacets, group: pd.DataFrame) -> pd.DataFrame:
+    op = all if constraint.operator == "all" else any
+    select = pd.Series(True, index=group.index)
+    groups = [group] if not constraint.group_by else (g[1] for g in group.groupby(list(constraint.group_by)))
+    for subgroup in groups:
+        if not op(value in subgroup[constraint.dimension].values for value in constraint.required_facets):
+            select.loc[subgroup.index] = False
+    return group[select]
+
+
+def _legacy_require_contiguous_timerange(
+    constraint: RequireContiguousTimerange, group: pd.DataFrame
+) -> pd.DataFrame:
+    max_timedelta = pd.Timedelta(days=31, hours=1)
+    select = pd.Series(True, index=group.index)
+    for _, subgroup in group.dropna(subset=["start_time", "end_time"]).groupby(list(constraint.group_by)):
+        if len(subgroup) < 2:
+            continue
+        sorted_group = subgroup.sort_values("start_time", kind="stable")
+        start_series = sorted_group["start_time"]
+        end_series = sorted_group["end_time"]
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", FutureWarning)
+            if hasattr(start_series, "dt"):
+                start_array = np.array(start_series.dt.to_pydatetime())
+            else:
+                start_array = start_series.values
+            if hasattr(end_series, "dt"):
+                end_array = np.array(end_series.dt.to_pydatetime())
+            else:
+                end_array = end_series.values
+        diff = start_array[1:] - end_array[:-1]
+        if (diff > max_timedelta).any():
+            select.loc[subgroup.index] = False
+    return group[select]
+
+
+def _legacy_require_timerange(constraint: RequireTimerange, group: pd.DataFrame) -> pd.DataFrame:
+    select = pd.Series(True, index=group.index)
+    for _, subgroup in group.dropna(subset=["start_time", "end_time"]).groupby(list(constraint.group_by)):
+        start = subgroup["start_time"].min()
+        end = subgroup["end_time"].max()
+        result = True
+        if constraint.start is not None and start > constraint.start:
+            result = False
+        if constraint.end is not None and end < constraint.end:
+            result = False
+        if result:
+            contiguous_subgroup = _legacy_require_contiguous_timerange(
+                RequireContiguousTimerange(group_by=constraint.group_by), subgroup
+            )
+            result = len(contiguous_subgroup) == len(subgroup)
+        if not result:
+            select.loc[subgroup.index] = False
+    return group[select]
+
+
+def _random_catalog(seed: int, n_rows: int = 300, first_year: int = 2000) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    years = first_year + rng.integers(0, 6, n_rows)
+    start_time = [datetime(year, 1, 16, 12) for year in years]
+    end_time = [datetime(year, 12, 16, 12) for year in years]
+    for idx in rng.choice(n_rows, n_rows // 20, replace=False):
+        start_time[idx] = None
+        end_time[idx] = None
+    return pd.DataFrame(
+        {
+            "source_id": rng.choice(
+                ["ACCESS-ESM1-5", "CESM2", "MIROC6", None], n_rows, p=[0.4, 0.3, 0.2, 0.1]
+            ),
+            "member_id": rng.choice(["r1i1p1f1", "r2i1p1f1"], n_rows),
+            "variable_id": rng.choice(["tas", "pr", "rsut", "areacella"], n_rows),
+            "start_time": start_time,
+            "end_time": end_time,
+            "path": [f"{i}.nc" for i in range(n_rows)],
+        },
+        # Multiple files share the same dataset id
+        index=rng.integers(0, n_rows // 2, n_rows),
+    )
+
+
+@pytest.fixture(
+    params=[
+        pytest.param({"seed": 0}, id="datetime64"),
+        pytest.param({"seed": 1}, id="datetime64-seed1"),
+        pytest.param({"seed": 2, "first_year": 2295}, id="object-out-of-bounds"),
+        pytest.param({"seed": 3, "n_rows": 20}, id="small"),
+    ]
+)
+def random_catalog(request) -> pd.DataFrame:
+    return _random_catalog(**request.param)
+
+
+class TestVectorisedConstraints:
+    def test_catalog_time_dtypes(self):
+        assert _random_catalog(0)["start_time"].dtype.kind == "M"
+        assert _random_catalog(0, first_year=2295)["start_time"].dtype == object
+
+    @pytest.mark.parametrize("operator", ["all", "any"])
+    @pytest.mark.parametrize("group_by", [None, ("source_id",), ("source_id", "member_id")])
+    @pytest.mark.parametrize("required_facets", [("tas", "pr"), ("tas", "missing"), ("rsut",), ()])
+    def test_require_facets(self, random_catalog, operator, group_by, required_facets):
+        constraint = RequireFacets(
+            "variable_id", required_facets=required_facets, operator=operator, group_by=group_by
+        )
+
+        assert_frame_equal(
+            constraint.apply(random_catalog, random_catalog),
+            _legacy_require_facets(constraint, random_catalog),
+        )
+
+    @pytest.mark.parametrize("group_by", [("source_id",), ("source_id", "variable_id", "member_id")])
+    def test_require_contiguous_timerange(self, random_catalog, group_by):
+        constraint = RequireContiguousTimerange(group_by=group_by)
+
+        assert_frame_equal(
+            constraint.apply(random_catalog, random_catalog),
+            _legacy_require_contiguous_timerange(constraint, random_catalog),
+        )
+
+    @pytest.mark.parametrize("group_by", [("source_id",), ("source_id", "variable_id", "member_id")])
+    @pytest.mark.parametrize(
+        "start, end",
+        [
+            (None, None),
+            (PartialDateTime(year=2001, month=1), None),
+            (None, PartialDateTime(year=2003, month=12)),
+            (PartialDateTime(year=2000), PartialDateTime(year=2004)),
+            (PartialDateTime(year=2296), PartialDateTime(year=2299, month=12)),
+        ],
+    )
+    def test_require_timerange(self, random_catalog, group_by, start, end):
+        constraint = RequireTimerange(group_by=group_by, start=start, end=end)
+
+        assert_frame_equal(
+            constraint.apply(random_catalog, random_catalog),
+            _legacy_require_timerange(constraint, random_catalog),
+        )
+
+
+def _legacy_add_supplementary_dataset(
+    constraint: AddSupplementaryDataset, group: pd.DataFrame, data_catalog: pd.DataFrame
+) -> pd.DataFrame:
+    supplementary_facets: defaultdict[str, tuple[str, ...]] = defaultdict(tuple)
+    for facet, values in constraint.supplementary_facets.items():
+        supplementary_facets[facet] = values if isinstance(values, tuple) else (values,)
+
+    for facet in constraint.matching_facets:
+        values = tuple(group[facet].unique())
+        supplementary_facets[facet] += values
+
+    supplementary_group = data_catalog
+    for facet, values in supplementary_facets.items():
+        mask = supplementary_group[facet].isin(values)
+        supplementary_group = supplementary_group[mask]
+    if not supplementary_group.empty:
+        matching_facets = list(constraint.matching_facets)
+        facets = matching_facets + list(constraint.optional_matching_facets)
+        datasets = group[facets].drop_duplicates()
+        indices = set()
+        for i in range(len(datasets)):
+            dataset = datasets.iloc[i]
+            supplementaries = supplementary_group[
+                (supplementary_group[matching_facets] == dataset[matching_facets]).all(1)
+            ]
+            if not supplementaries.empty:
+                scores = (supplementaries[facets] == dataset).sum(axis=1)
+                matches = supplementaries[scores == scores.max()]
+                if "version" in facets:
+                    matches = matches[matches["version"] == matches["version"].max()]
+                indices.add(matches.index[0])
+
+        supplementary_group = supplementary_group.loc[list(indices)].drop_duplicates()
+
+    return pd.concat([group, supplementary_group])
+
+
+def _random_cmip6_catalog(seed: int, n_datasets: int = 200) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    variable_id = rng.choice(["tas", "pr", "areacella"], n_datasets, p=[0.4, 0.3, 0.3])
+    catalog = pd.DataFrame(
+        {
+            "variable_id": variable_id,
+            "source_id": rng.choice(["ACCESS-ESM1-5", "CESM2", "MIROC6", None], n_datasets),
+            "grid_label": rng.choice(["gn", "gr"], n_datasets, p=[0.8, 0.2]),
+            "table_id": np.where(variable_id == "areacella", "fx", "Amon"),
+            "experiment_id": rng.choice(["historical", "ssp126", "piControl"], n_datasets),
+            "member_id": rng.choice(["r1i1p1f1", "r2i1p1f1"], n_datasets),
+            "version": rng.choice(["v20190101", "v20200101", "v20210101"], n_datasets),
+        },
+        index=np.arange(n_datasets) + 1,
+    )
+    # Multiple files per dataset share the same index
+    return catalog.loc[np.repeat(catalog.index, rng.integers(1, 3, n_datasets))].assign(
+        path=lambda df: [f"{i}.nc" for i in range(len(df))]
+    )
+
+
+class TestAddSupplementaryDatasetEquivalence:
+    @pytest.mark.parametrize("seed", [0, 1, 2])
+    @pytest.mark.parametrize("categorical", [False, True])
+    @pytest.mark.parametrize("group_size", [1, 10, None])
+    def test_apply(self, seed, categorical, group_size):
+        constraint = AddSupplementaryDataset.from_defaults("areacella", SourceDatasetType.CMIP6)
+        data_catalog = _random_cmip6_catalog(seed)
+        if categorical:
+            data_catalog = data_catalog.astype({"source_id": "category", "grid_label": "category"})
+
+        group = data_catalog[data_catalog["variable_id"] == "tas"]
+        if group_size is not None:
+            group = group.iloc[:group_size]
+
+        result = constraint.apply(group, data_catalog)
+        assert_frame_equal(result, _legacy_add_supplementary_dataset(constraint, group, data_catalog))
+        assert (result["variable_id"] == "areacella").any()
+
+        # The cached supplementary datasets give the same result
+        assert_frame_equal(constraint.apply(group, data_catalog), result)
+
+    def test_apply_categorical_version(self):
+        # An unordered categorical version isn't supported by the previous implementation
+        constraint = AddSupplementaryDataset.from_defaults("areacella", SourceDatasetType.CMIP6)
+        data_catalog = _random_cmip6_catalog(0)
+        categorical_catalog = data_catalog.astype({"version": "category"})
+
+        result = constraint.apply(
+            categorical_catalog[categorical_catalog["variable_id"] == "tas"], categorical_catalog
+        )
+        expected = constraint.apply(data_catalog[data_catalog["variable_id"] == "tas"], data_catalog)
+        assert_frame_equal(result.astype({"version": object}), expected)
+
+    def test_select_candidates(self):
+        constraint = AddSupplementaryDataset.from_defaults("areacella", SourceDatasetType.CMIP6)
+        data_catalog = _random_cmip6_catalog(0)
+        group = data_catalog[data_catalog["variable_id"] == "tas"]
+
+        candidates = constraint.select_candidates(data_catalog)
+        assert (candidates["variable_id"] == "areacella").all()
+        assert_frame_equal(
+            constraint.apply(group, data_catalog, candidates=candidates),
+            constraint.apply(group, data_catalog),
+        )
@@ -1,7 +1,15 @@
+import numpy as np
 import pandas as pd
 import pytest
 
-from climate_ref_core.datasets import DatasetCollection, ExecutionDatasetCollection, SourceDatasetType
+import climate_ref_core.datasets
+from climate_ref_core.datasets import (
+    DatasetCollection,
+    ExecutionDatasetCollection,
+    FacetFilter,
+    FacetIndex,
+    SourceDatasetType,
+)
 
 
 @pytest.fixture
@@ -127,6 +135,37 @@ class TestDatasetCollection:
         # Specifically if more tas datasets are provided
         data_regression.check(dataset_hash, basename="dataset_collection_hash")
 
+    def test_categorical(self, cmip6_data_catalog):
+        columns = ["instance_id", "source_id", "variable_id"]
+        categorical_catalog = cmip6_data_catalog.astype({column: "category" for column in columns})
+
+        tas_datasets = cmip6_data_catalog[cmip6_data_catalog.variable_id == "tas"]
+        collection = DatasetCollection(
+            categorical_catalog[categorical_catalog.variable_id == "tas"], "instance_id"
+        )
+
+        # Diagnostics receive plain columns so grouping doesn't include unobserved categories
+        pd.testing.assert_frame_equal(collection.datasets, tas_datasets)
+        assert len(collection.datasets.groupby("instance_id")) == tas_datasets.instance_id.nunique()
+        assert hash(collection) == hash(DatasetCollection(tas_datasets, "instance_id"))
+
+    def test_categorical_missing(self):
+        datasets = pd.DataFrame({"instance_id": ["a", "b"], "parent": pd.Categorical(["c", None])})
+        collection = DatasetCollection(datasets, "instance_id")
+
+        assert collection.datasets["parent"].tolist() == ["c", None]
+
+    def test_categorical_lazy(self, mocker):
+        convert = mocker.spy(climate_ref_core.datasets, "_without_categories")
+        datasets = pd.DataFrame({"instance_id": pd.Categorical(["a", "b"]), "path": ["a.nc", "b.nc"]})
+        collection = DatasetCollection(datasets, "instance_id")
+
+        # The datasets are only converted when they are used
+        hash(collection)
+        assert convert.call_count == 0
+        assert collection.datasets is collection.datasets
+        assert convert.call_count == 1
+
 
 class TestDatasetCollectionObs4MIPs:
     def test_get_item(self, dataset_collection_obs4mips):
@@ -147,3 +186,48 @@ class TestDatasetCollectionObs4MIPs:
         # This hash will change if the data catalog changes
         # Specifically if more tas datasets are provided
         data_regression.check(dataset_hash, basename="dataset_collection_obs4mips_hash")
+
+
+class TestFacetIndex:
+    @pytest.fixture(params=["object", "category"])
+    def data_catalog(self, request):
+        return pd.DataFrame(
+            {
+                "variable_id": ["tas", "pr", "rsut", "tas", "tas", None],
+                "source_id": ["CESM2", "CESM2", "CESM2", "ACCESS", "CAS", "CAS"],
+            },
+            index=["a", "b", "c", "d", "e", "f"],
+        ).astype(request.param)
+
+    def test_positions(self, data_catalog):
+        index = FacetIndex(data_catalog)
+
+        np.testing.assert_array_equal(index.positions("variable_id", ["tas"]), [0, 3, 4])
+        np.testing.assert_array_equal(index.positions("variable_id", ("rsut", "tas")), [0, 2, 3, 4])
+        np.testing.assert_array_equal(index.positions("variable_id", ["missing"]), [])
+        np.testing.assert_array_equal(index.positions("source_id", ["CAS", "CESM2"]), [0, 1, 2, 4, 5])
+
+    def test_positions_missing_facet(self, data_catalog):
+        with pytest.raises(KeyError, match="Facet 'missing' not in data catalog columns"):
+            FacetIndex(data_catalog).positions("missing", ["tas"])
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            (FacetFilter({"variable_id": "tas"}),),
+            (FacetFilter({"variable_id": "tas", "source_id": ["CESM2", "CAS"]}),),
+            (FacetFilter({"variable_id": "pr"}), FacetFilter({"source_id": "ACCESS"})),
+            (FacetFilter({"variable_id": "tas"}), FacetFilter({"source_id": "CESM2"})),
+            (FacetFilter({"variable_id": "missing"}),),
+        ],
+    )
+    def test_select(self, data_catalog, filters):
+        expected = pd.Series(False, index=data_catalog.index)
+        for facet_filter in filters:
+            expected |= data_catalog[list(facet_filter.facets)].isin(facet_filter.facets).all(axis="columns")
+
+        index = FacetIndex(data_catalog)
+
+        np.testing.assert_array_equal(index.select(filters), np.flatnonzero(expected))
+        # The cached index gives the same result
+        np.testing.assert_array_equal(index.select(filters), np.flatnonzero(expected))
@@ -6,7 +6,7 @@ import pandas as pd
 import pytest
 from attr import evolve
 
-from climate_ref_core.datasets import FacetFilter, SourceDatasetType
+from climate_ref_core.datasets import FacetFilter, FacetIndex, SourceDatasetType
 from climate_ref_core.diagnostics import (
     CommandLineDiagnostic,
     DataRequirement,
@@ -307,14 +307,18 @@ def test_apply_no_filter(apply_data_catalog):
         ),
     ],
 )
-def test_apply_filters_single(apply_data_catalog, facet_filter, expected_data, expected_index):
+@pytest.mark.parametrize("use_facet_index", [False, True])
+def test_apply_filters_single(
+    apply_data_catalog, facet_filter, expected_data, expected_index, use_facet_index
+):
     requirement = DataRequirement(
         source_type=SourceDatasetType.CMIP6,
         filters=(FacetFilter(facet_filter),),
         group_by=None,
     )
+    facet_index = FacetIndex(apply_data_catalog) if use_facet_index else None
 
-    filtered = requirement.apply_filters(apply_data_catalog)
+    filtered = requirement.apply_filters(apply_data_catalog, facet_index=facet_index)
 
     pd.testing.assert_frame_equal(
         filtered,
@@ -325,7 +329,8 @@ def test_apply_filters_single(apply_data_catalog, facet_filter, expected_data, e
     )
 
 
-def test_apply_filters_multi(apply_data_catalog):
+@pytest.mark.parametrize("use_facet_index", [False, True])
+def test_apply_filters_multi(apply_data_catalog, use_facet_index):
     requirement = DataRequirement(
         source_type=SourceDatasetType.CMIP6,
         filters=(
@@ -334,8 +339,9 @@ def test_apply_filters_multi(apply_data_catalog):
         ),
         group_by=None,
     )
+    facet_index = FacetIndex(apply_data_catalog) if use_facet_index else None
 
-    filtered = requirement.apply_filters(apply_data_catalog)
+    filtered = requirement.apply_filters(apply_data_catalog, facet_index=facet_index)
 
     pd.testing.assert_frame_equal(
         filtered,
@@ -349,18 +355,31 @@ def test_apply_filters_multi(apply_data_catalog):
     )
 
 
-def test_apply_filters_missing(apply_data_catalog):
+@pytest.mark.parametrize("use_facet_index", [False, True])
+def test_apply_filters_missing(apply_data_catalog, use_facet_index):
     requirement = DataRequirement(
         source_type=SourceDatasetType.CMIP6,
         filters=(FacetFilter({"missing": "tas"}),),
         group_by=None,
     )
+    facet_index = FacetIndex(apply_data_catalog) if use_facet_index else None
 
     with pytest.raises(
         KeyError,
         match=re.escape("Facet 'missing' not in data catalog columns: ['variable', 'source_id']"),
     ):
-        requirement.apply_filters(apply_data_catalog)
+        requirement.apply_filters(apply_data_catalog, facet_index=facet_index)
+
+
+def test_apply_filters_facet_index_mismatch(apply_data_catalog):
+    requirement = DataRequirement(
+        source_type=SourceDatasetType.CMIP6,
+        filters=(FacetFilter({"variable": "tas"}),),
+        group_by=None,
+    )
+
+    with pytest.raises(ValueError, match="The facet index was not created for this data catalog"):
+        requirement.apply_filters(apply_data_catalog, facet_index=FacetIndex(apply_data_catalog.copy()))
 
 
 @pytest.mark.parametrize(
@@ -7,17 +7,21 @@ which executions are required for a given diagnostic without having to re-parse
 """
 
 import shutil
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 from typing import Annotated
 
+import pandas as pd
 import typer
+from attrs import define
 from loguru import logger
 
-from climate_ref.cli._utils import pretty_print_df
-from climate_ref.database import ModelState
+from climate_ref.cli._utils import parse_facet_filters, pretty_print_df
+from climate_ref.database import Database
 from climate_ref.datasets import get_dataset_adapter
-from climate_ref.models import Dataset
+from climate_ref.datasets.base import DatasetAdapter
+from climate_ref.datasets.ingest import parse_datasets, register_datasets
+from climate_ref.datasets.manifest import manifest_fingerprints, read_manifest
 from climate_ref.provider_registry import ProviderRegistry
 from climate_ref.solver import solve_required_executions
 from climate_ref.testing import fetch_sample_data
@@ -93,17 +97,59 @@ def list_columns(
         print(column)
 
 
+@define
+class _FileSelector:
+    """
+    Select the files to parse as they are found, counting the files
+    """
+
+    adapter: DatasetAdapter
+    db: Database
+    skip_unchanged: bool
+    fingerprints: dict[str, tuple[int, int]] | None = None
+    n_found: int = 0
+    n_selected: int = 0
+
+    def __call__(self, files: list[str]) -> list[str]:
+        self.n_found += len(files)
+        if self.skip_unchanged:
+            files = self.adapter.find_changed_files(self.db, files, fingerprints=self.fingerprints)
+        self.n_selected += len(files)
+        return files
+
+
 @app.command()
 def ingest(  # noqa
     ctx: typer.Context,
-    file_or_directory: list[Path],
     source_type: Annotated[SourceDatasetType, typer.Option(help="Type of source dataset")],
+    file_or_directory: Annotated[list[Path] | None, typer.Argument()] = None,
+    from_manifest: Annotated[
+        list[Path] | None,
+        typer.Option(
+            help="CSV or Parquet file listing the files to ingest, "
+            "which is used instead of crawling a directory"
+        ),
+    ] = None,
+    include: Annotated[
+        list[str] | None,
+        typer.Option(
+            help="Only scan the directories in the DRS that match facet=value[,value...], "
+            "e.g. table_id=Amon,fx. Multiple filters can be provided."
+        ),
+    ] = None,
     solve: Annotated[bool, typer.Option(help="Solve for new diagnostic executions after ingestion")] = False,
     dry_run: Annotated[bool, typer.Option(help="Do not ingest datasets into the database")] = False,
     n_jobs: Annotated[int | None, typer.Option(help="Number of jobs to run in parallel")] = None,
     skip_invalid: Annotated[
         bool, typer.Option(help="Ignore (but log) any datasets that don't pass validation")
     ] = True,
+    skip_unchanged: Annotated[
+        bool,
+        typer.Option(
+            help="Only parse files that are new or whose size or modification time "
+            "has changed since they were ingested"
+        ),
+    ] = True,
 ) -> None:
     """
     Ingest a directory of datasets into the database
@@ -111,12 +157,30 @@ def ingest(  # noqa
     Each dataset will be loaded and validated using the specified dataset adapter.
     This will extract metadata from the datasets and store it in the database.
 
-    A table of the datasets will be printed to the console at the end of the operation.
+    The directories are scanned using a pool of threads and the files are parsed as they are found.
+    Use `--include` to only scan the parts of a Data Reference Syntax (DRS) directory tree
+    that match a set of facets, e.g. `--include table_id=Amon,fx`.
+
+    Rather than crawling a directory, the files to ingest can be listed in a manifest using `--from-manifest`.
+    The manifest must contain a `path` column and may also contain the `size` and `mtime_ns`
+    (or `mtime` in seconds) of each file and any metadata about the files.
+    The files are only accessed if this information isn't in the manifest.
+
+    Files that have already been ingested are not parsed again unless their size or modification time
+    has changed. Use `--no-skip-unchanged` to parse all the files.
+
+    The files are parsed in batches of complete datasets, using `--n-jobs` processes,
+    while the batches that have already been parsed are registered in the database.
+    A table of the datasets in each batch will be printed to the console before they are registered.
     """
     config = ctx.obj.config
     db = ctx.obj.database
     console = ctx.obj.console
 
+    if not file_or_directory and not from_manifest:
+        logger.error("No files or directories to ingest, specify a directory or use --from-manifest")
+        raise typer.Exit(code=1)
+
     kwargs = {}
 
     if n_jobs is not None:
@@ -125,75 +189,86 @@ def ingest(  # noqa
     # Create a data catalog from the specified file or directory
     adapter = get_dataset_adapter(source_type.value, **kwargs)
 
-    for _dir in file_or_directory:
-        _dir = Path(_dir).expanduser()
-        logger.info(f"Ingesting {_dir}")
+    try:
+        include_facets = {key: value.split(",") for key, value in parse_facet_filters(include).items()}
+    except ValueError as e:
+        logger.error(str(e))
+        raise typer.Exit(code=1)
+    unknown_facets = set(include_facets) - set(adapter.directory_template)
+    if unknown_facets:
+        logger.error(
+            f"Unable to filter {source_type.value} directories by {sorted(unknown_facets)}. "
+            f"Available facets: {', '.join(adapter.directory_template)}"
+        )
+        raise typer.Exit(code=1)
 
-        if not _dir.exists():
-            logger.error(f"File or directory {_dir} does not exist")
-            continue
+    def _find_files() -> Iterator[tuple[Path, Iterable[str] | pd.DataFrame]]:
+        for _dir in file_or_directory or []:
+            _dir = Path(_dir).expanduser()
+            logger.info(f"Ingesting {_dir}")
 
-        # TODO: This assumes that all datasets are nc files.
-        # THis is true for CMIP6 and obs4MIPs but may not be true for other dataset types in the future.
-        if not _dir.rglob("*.nc"):
-            logger.error(f"No .nc files found in {_dir}")
-            continue
+            if not _dir.exists():
+                logger.error(f"File or directory {_dir} does not exist")
+                continue
+
+            # The files are parsed as the directory is scanned
+            yield _dir, adapter.iter_files(_dir, include=include_facets)
+
+        for manifest_file in from_manifest or []:
+            manifest_path = Path(manifest_file).expanduser()
+            logger.info(f"Ingesting the files listed in {manifest_path}")
+
+            if not manifest_path.exists():
+                logger.error(f"Manifest {manifest_path} does not exist")
+                continue
 
+            try:
+                manifest = read_manifest(manifest_path)
+            except ValueError as e:
+                logger.error(f"Unable to read manifest {manifest_path}: {e}")
+                continue
+
+            yield manifest_path, manifest
+
+    for source, files in _find_files():
+        file_selector = _FileSelector(
+            adapter,
+            db,
+            skip_unchanged=skip_unchanged,
+            fingerprints=manifest_fingerprints(files) if isinstance(files, pd.DataFrame) else None,
+        )
+
+        # The files are parsed in batches of complete datasets by a pool of processes
+        # while the datasets that have already been parsed are registered
         try:
-            data_catalog = adapter.find_local_datasets(_dir)
-            data_catalog = adapter.validate_data_catalog(data_catalog, skip_invalid=skip_invalid)
+            stats = register_datasets(
+                adapter,
+                config,
+                db,
+                parse_datasets(adapter, files, n_workers=n_jobs or 1, file_filter=file_selector),
+                skip_invalid=skip_invalid,
+                dry_run=dry_run,
+                on_validated=lambda data_catalog: pretty_print_df(
+                    adapter.pretty_subset(data_catalog), console=console
+                ),
+            )
         except Exception as e:
-            logger.error(f"Error ingesting datasets from {_dir}: {e}")
+            logger.error(f"Error ingesting datasets from {source}: {e}")
             continue
 
-        logger.info(
-            f"Found {len(data_catalog)} files for {len(data_catalog[adapter.slug_column].unique())} datasets"
-        )
-        pretty_print_df(adapter.pretty_subset(data_catalog), console=console)
-
-        # track stats for a given directory
-        num_created_datasets = 0
-        num_updated_datasets = 0
-        num_unchanged_datasets = 0
-        num_created_files = 0
-        num_updated_files = 0
-        num_removed_files = 0
-        num_unchanged_files = 0
-
-        for instance_id, data_catalog_dataset in data_catalog.groupby(adapter.slug_column):
-            logger.debug(f"Processing dataset {instance_id}")
-            with db.session.begin():
-                if dry_run:
-                    dataset = (
-                        db.session.query(Dataset)
-                        .filter_by(slug=instance_id, dataset_type=source_type)
-                        .first()
-                    )
-                    if not dataset:
-                        logger.info(f"Would save dataset {instance_id} to the database")
-                else:
-                    results = adapter.register_dataset(config, db, data_catalog_dataset)
-
-                    if results.dataset_state == ModelState.CREATED:
-                        num_created_datasets += 1
-                    elif results.dataset_state == ModelState.UPDATED:
-                        num_updated_datasets += 1
-                    else:
-                        num_unchanged_datasets += 1
-                    num_created_files += len(results.files_added)
-                    num_updated_files += len(results.files_updated)
-                    num_removed_files += len(results.files_removed)
-                    num_unchanged_files += len(results.files_unchanged)
+        if not file_selector.n_found:
+            logger.error(f"No files found in {source}")
+            continue
+        if skip_unchanged:
+            logger.info(
+                f"Parsed {file_selector.n_selected} of {file_selector.n_found} files found in {source}"
+            )
+            if not file_selector.n_selected:
+                logger.info(f"No new or modified files found in {source}")
+                continue
 
         if not dry_run:
-            ingestion_msg = (
-                f"Datasets: {num_created_datasets}/{num_updated_datasets}/{num_unchanged_datasets}"
-                " (created/updated/unchanged), "
-                f"Files: "
-                f"{num_created_files}/{num_updated_files}/{num_removed_files}/{num_unchanged_files}"
-                " (created/updated/removed/unchanged)"
-            )
-            logger.info(ingestion_msg)
+            logger.info(str(stats))
 
     if solve:
         solve_required_executions(
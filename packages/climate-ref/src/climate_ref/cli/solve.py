@@ -1,7 +1,12 @@
+import contextlib
+from pathlib import Path
 from typing import Annotated
 
 import typer
+from loguru import logger
 
+from climate_ref.cli._utils import pretty_print_df
+from climate_ref.solve_profile import ProfileFormat, SolveProfiler
 from climate_ref.solver import SolveFilterOptions, solve_required_executions
 
 app = typer.Typer()
@@ -43,6 +48,32 @@ def solve(  # noqa: PLR0913
             "Multiple values can be provided"
         ),
     ] = None,
+    incremental: Annotated[
+        bool,
+        typer.Option(
+            help="Only re-solve the diagnostics and groups that may be affected by datasets "
+            "that have been added or updated since the previous solve"
+        ),
+    ] = False,
+    solve_workers: Annotated[
+        int,
+        typer.Option(
+            min=1,
+            help="Number of processes used to solve the diagnostics in parallel",
+        ),
+    ] = 1,
+    profile: Annotated[
+        bool,
+        typer.Option(help="Record and print the time spent in each stage of the solve"),
+    ] = False,
+    profile_output: Annotated[
+        Path | None,
+        typer.Option(help="Write the solve profile to this file. Implies `--profile`"),
+    ] = None,
+    profile_format: Annotated[
+        ProfileFormat,
+        typer.Option(help="Format of the solve profile written to `--profile-output`"),
+    ] = ProfileFormat.JSON,
 ) -> None:
     """
     Solve for executions that require recalculation
@@ -53,6 +84,12 @@ def solve(  # noqa: PLR0913
 
     Filters can be applied to limit the diagnostics and providers that are considered, see the options
     `--diagnostic` and `--provider` for more information.
+
+    Use `--incremental` to skip re-evaluating diagnostics that are not affected by any newly ingested
+    datasets. Diagnostics that have never been solved are always solved in full.
+
+    Use `--profile` to print the wall time and number of rows processed by each stage of the solve.
+    The profile can also be written as JSON or in the Chrome trace event format using `--profile-output`.
     """
     config = ctx.obj.config
     db = ctx.obj.database
@@ -62,13 +99,25 @@ def solve(  # noqa: PLR0913
         provider=provider,
     )
 
-    solve_required_executions(
-        config=config,
-        db=db,
-        dry_run=dry_run,
-        execute=execute,
-        timeout=timeout,
-        one_per_provider=one_per_provider,
-        one_per_diagnostic=one_per_diagnostic,
-        filters=filters,
-    )
+    profiler = SolveProfiler() if profile or profile_output is not None else None
+
+    with profiler.activate() if profiler is not None else contextlib.nullcontext():
+        solve_required_executions(
+            config=config,
+            db=db,
+            dry_run=dry_run,
+            execute=execute,
+            timeout=timeout,
+            one_per_provider=one_per_provider,
+            one_per_diagnostic=one_per_diagnostic,
+            filters=filters,
+            incremental=incremental,
+            solve_workers=solve_workers,
+        )
+
+    if profiler is not None:
+        pretty_print_df(profiler.diagnostic_summary(), console=ctx.obj.console)
+        pretty_print_df(profiler.summary(), console=ctx.obj.console)
+        if profile_output is not None:
+            profiler.write(profile_output, profile_format)
+            logger.info(f"Solve profile written to {profile_output}")
@@ -120,6 +120,15 @@ class PathConfig:
     Path to store the executions
     """
 
+    cache: Path = env_field(name="CACHE_ROOT", converter=ensure_absolute_path)
+    """
+    Local cache for the REF.
+
+    This directory is used to store derived data that can be regenerated at any time,
+    such as snapshots of the data catalog.
+    It does not need to be shared between systems and can be safely deleted.
+    """
+
     dimensions_cv: Path = env_field(name="DIMENSIONS_CV_PATH", converter=Path)
     """
     Path to a file containing the controlled vocabulary for the dimensions in a CMEC diagnostics bundle
@@ -148,6 +157,10 @@ class PathConfig:
     def _results_factory(self) -> Path:
         return env.path("REF_CONFIGURATION").resolve() / "results"
 
+    @cache.default
+    def _cache_factory(self) -> Path:
+        return env.path("REF_CONFIGURATION").resolve() / "cache"
+
     @dimensions_cv.default
     def _dimensions_cv_factory(self) -> Path:
         filename = "cv_cmip7_aft.yaml"
@@ -0,0 +1,303 @@
+"""
+Statistics about the cost and selectivity of the group constraints
+
+The constraints of a data requirement are applied to each group in the order they are declared.
+A cheap constraint that rejects most groups is often declared after more expensive constraints,
+e.g. a `RequireFacets` after a `RequireTimerange`.
+
+The filtering constraints remove subgroups of datasets,
+so in general changing their order changes which datasets are selected.
+Instead, a constraint that rejects every subset of a group that it rejects
+(see `MONOTONE_CONSTRAINTS`) can be evaluated up front as a pre-check.
+If the pre-check rejects the group,
+the constraints would have rejected the group when applied in the declared order.
+Otherwise, the constraints are applied in the declared order as usual.
+
+The cost and pass rate of each constraint is recorded during a solve and persisted between solves,
+so that only the pre-checks that are expected to save time are used
+and the most selective pre-checks are evaluated first.
+A pre-check is evaluated on the whole group rather than the group remaining after the preceding constraints,
+so its evaluations are recorded separately from the evaluations in the declared order.
+"""
+
+import json
+import os
+from collections.abc import Sequence
+from pathlib import Path
+
+from attrs import define, field
+from loguru import logger
+
+from climate_ref_core.constraints import (
+    GroupConstraint,
+    RequireContiguousTimerange,
+    RequireFacets,
+    RequireOverlappingTimerange,
+    RequireTimerange,
+)
+
+CONSTRAINT_STATS_FORMAT_VERSION = 2
+"""
+Version of the constraint statistics format
+
+Increment this if the structure of the statistics changes to discard any existing statistics.
+"""
+
+FILTERING_CONSTRAINTS: tuple[type, ...] = (
+    RequireFacets,
+    RequireTimerange,
+    RequireContiguousTimerange,
+    RequireOverlappingTimerange,
+)
+"""
+Constraints that only ever remove datasets from a group
+"""
+
+MONOTONE_CONSTRAINTS: tuple[type, ...] = (RequireFacets,)
+"""
+Filtering constraints that reject any subset of a group that they reject
+"""
+
+MIN_CALLS = 20
+"""
+Number of evaluations of a constraint before its statistics are used
+"""
+
+
+@define
+class ConstraintStats:
+    """
+    Statistics for a single constraint
+    """
+
+    calls: int = 0
+    rejections: int = 0
+    """
+    Number of evaluations where the constraint rejected the group
+    """
+    total_time: float = 0.0
+    """
+    Total wall time in seconds
+    """
+
+    @property
+    def cost(self) -> float:
+        """
+        Mean wall time of an evaluation in seconds
+        """
+        return self.total_time / self.calls if self.calls else 0.0
+
+    @property
+    def rejection_rate(self) -> float:
+        """
+        Fraction of the evaluations that rejected the group
+        """
+        return self.rejections / self.calls if self.calls else 0.0
+
+
+@define
+class ConstraintStatistics:
+    """
+    Cost and pass rate statistics for the constraints evaluated during solves
+
+    The constraints are identified by their `repr`,
+    which includes the values of the parameters of the constraint.
+    The evaluations of a constraint as a pre-check are stored with a `precheck:` prefix.
+    """
+
+    stats: dict[str, ConstraintStats] = field(factory=dict)
+
+    @staticmethod
+    def _key(constraint: GroupConstraint, precheck: bool) -> str:
+        return f"precheck:{constraint!r}" if precheck else repr(constraint)
+
+    def record(
+        self, constraint: GroupConstraint, duration: float, rejected: bool, precheck: bool = False
+    ) -> None:
+        """
+        Record an evaluation of a constraint
+
+        Parameters
+        ----------
+        constraint
+            Constraint that was evaluated
+        duration
+            Wall time of the evaluation in seconds
+        rejected
+            Whether the constraint rejected the group
+        precheck
+            Whether the constraint was evaluated as a pre-check
+        """
+        key = self._key(constraint, precheck)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = ConstraintStats()
+        stats.calls += 1
+        stats.rejections += rejected
+        stats.total_time += duration
+
+    def merge(self, other: "ConstraintStatistics") -> None:
+        """
+        Add the evaluations recorded in another set of statistics
+
+        This is used to combine the statistics recorded by the processes of a parallel solve.
+
+        Parameters
+        ----------
+        other
+            Statistics to add to these statistics
+        """
+        for key, other_stats in other.stats.items():
+            stats = self.stats.get(key)
+            if stats is None:
+                stats = self.stats[key] = ConstraintStats()
+            stats.calls += other_stats.calls
+            stats.rejections += other_stats.rejections
+            stats.total_time += other_stats.total_time
+
+    def difference(self, previous: "ConstraintStatistics") -> "ConstraintStatistics":
+        """
+        Get the evaluations that have been recorded since an earlier copy of these statistics
+
+        Parameters
+        ----------
+        previous
+            An earlier copy of these statistics
+
+        Returns
+        -------
+        :
+            The statistics of the evaluations that are not included in `previous`
+        """
+        difference = {}
+        for key, stats in self.stats.items():
+            previous_stats = previous.stats.get(key, ConstraintStats())
+            if stats.calls > previous_stats.calls:
+                difference[key] = ConstraintStats(
+                    calls=stats.calls - previous_stats.calls,
+                    rejections=stats.rejections - previous_stats.rejections,
+                    total_time=stats.total_time - previous_stats.total_time,
+                )
+        return ConstraintStatistics(stats=difference)
+
+    def get(self, constraint: GroupConstraint, precheck: bool = False) -> ConstraintStats | None:
+        """
+        Get the statistics for a constraint
+
+        Parameters
+        ----------
+        constraint
+            Constraint of interest
+        precheck
+            Get the statistics of the evaluations of the constraint as a pre-check
+
+        Returns
+        -------
+        :
+            The statistics or None if the constraint hasn't been evaluated enough times
+        """
+        stats = self.stats.get(self._key(constraint, precheck))
+        if stats is None or stats.calls < MIN_CALLS:
+            return None
+        return stats
+
+    def prechecks(self, constraints: Sequence[GroupConstraint]) -> list[GroupConstraint]:
+        """
+        Select the constraints that should be evaluated before the declared constraints
+
+        Only monotone constraints that are preceded exclusively by filtering constraints are candidates.
+        A candidate is used if the time it is expected to save by rejecting groups early
+        exceeds the cost of evaluating it,
+        or if there are not yet enough statistics for the candidate.
+        The statistics of the previous evaluations of a candidate as a pre-check are used if available,
+        otherwise the statistics of its evaluations in the declared order are used.
+
+        Parameters
+        ----------
+        constraints
+            Constraints of a data requirement in the declared order
+
+        Returns
+        -------
+        :
+            The pre-checks in the order that they should be evaluated,
+            with the cheapest and most selective first
+        """
+        candidates: list[tuple[float, int, GroupConstraint]] = []
+        preceding_cost = 0.0
+        for index, constraint in enumerate(constraints):
+            if not isinstance(constraint, FILTERING_CONSTRAINTS):
+                break
+
+            stats = self.get(constraint)
+            if index and isinstance(constraint, MONOTONE_CONSTRAINTS):
+                precheck_stats = self.get(constraint, precheck=True) or stats
+                if precheck_stats is None:
+                    # Unknown constraints are evaluated after the constraints with known statistics
+                    candidates.append((float("inf"), index, constraint))
+                elif precheck_stats.rejection_rate * preceding_cost > precheck_stats.cost:
+                    candidates.append(
+                        (precheck_stats.cost / precheck_stats.rejection_rate, index, constraint)
+                    )
+            preceding_cost += stats.cost if stats is not None else 0.0
+
+        return [constraint for _, _, constraint in sorted(candidates, key=lambda item: item[:2])]
+
+    @staticmethod
+    def load(path: Path) -> "ConstraintStatistics":
+        """
+        Load the statistics from a previous solve
+
+        Parameters
+        ----------
+        path
+            Path to the statistics file
+
+        Returns
+        -------
+        :
+            The stored statistics or empty statistics if none could be loaded
+        """
+        if not path.exists():
+            return ConstraintStatistics()
+
+        try:
+            content = json.loads(path.read_text())
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Unable to read constraint statistics {path}: {exc}")
+            return ConstraintStatistics()
+
+        if content.get("format") != CONSTRAINT_STATS_FORMAT_VERSION:
+            logger.debug(f"Discarding constraint statistics {path} with an outdated format")
+            return ConstraintStatistics()
+
+        return ConstraintStatistics(
+            stats={
+                key: ConstraintStats(calls=calls, rejections=rejections, total_time=total_time)
+                for key, (calls, rejections, total_time) in content["constraints"].items()
+            }
+        )
+
+    def save(self, path: Path) -> None:
+        """
+        Store the statistics for subsequent solves
+
+        Parameters
+        ----------
+        path
+            Path to the statistics file
+        """
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        content = {
+            "format": CONSTRAINT_STATS_FORMAT_VERSION,
+            "constraints": {
+                key: [stats.calls, stats.rejections, stats.total_time] for key, stats in self.stats.items()
+            },
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(content))
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning(f"Unable to write constraint statistics {path}: {exc}")
+            tmp_path.unlink(missing_ok=True)
@@ -1,17 +1,41 @@
+from __future__ import annotations
+
+from collections.abc import Collection, Iterator, Mapping, Sequence
 from pathlib import Path
 from typing import Any, Protocol, cast
 
 import pandas as pd
 from attrs import define
 from loguru import logger
-from sqlalchemy.orm import joinedload
+from sqlalchemy import and_, func, insert, or_, select, update
 
 from climate_ref.config import Config
 from climate_ref.database import Database, ModelState
-from climate_ref.datasets.utils import validate_path
+from climate_ref.datasets.manifest import known_fingerprints
+from climate_ref.datasets.scanner import scan_files
+from climate_ref.datasets.snapshot import (
+    catalog_fingerprint,
+    read_snapshot,
+    snapshots_enabled,
+    write_snapshot,
+)
+from climate_ref.datasets.utils import FileFilter, file_fingerprint, validate_path
 from climate_ref.models.dataset import Dataset, DatasetFile
+from climate_ref_core.datasets import FacetFilter
 from climate_ref_core.exceptions import RefException
 
+CATALOG_BATCH_SIZE = 10_000
+"""
+Number of rows fetched from the database at a time when loading a data catalog
+"""
+
+FILE_LOOKUP_BATCH_SIZE = 900
+"""
+Number of paths looked up in the database at a time when finding changed files
+
+This is below the default limit on the number of parameters in a SQLite query.
+"""
+
 
 @define
 class DatasetRegistrationResult:
@@ -56,6 +80,137 @@ def _log_duplicate_metadata(
         )
 
 
+def _as_datetime64(values: pd.Series[Any]) -> pd.Series[Any]:
+    """
+    Convert a column of times to `datetime64[us]`
+
+    The column is returned unchanged if any of the times can't be converted,
+    for example `cftime` dates in a 360-day or no-leap calendar.
+    """
+    try:
+        converted = values.astype("datetime64[us]")
+    except (TypeError, ValueError, OverflowError):
+        converted = None
+
+    if converted is None or converted.isna().sum() != values.isna().sum():
+        logger.debug(f"Keeping {values.name} as {values.dtype} as it can't be converted to datetime64")
+        return values
+    return converted
+
+
+def _equal(left: pd.Series[Any], right: pd.Series[Any]) -> pd.Series[bool]:
+    left, right = left.astype(object), right.astype(object)
+    return (left == right) | (left.isna() & right.isna())
+
+
+def _fingerprint_values(rows: pd.DataFrame) -> tuple[list[int | None], list[int | None]]:
+    sizes, mtimes = [], []
+    for fingerprint in rows["fingerprint"]:
+        size, mtime_ns = fingerprint or (None, None)
+        sizes.append(size)
+        mtimes.append(mtime_ns)
+    return sizes, mtimes
+
+
+def _to_records(rows: pd.DataFrame) -> list[dict[str, Any]]:
+    return cast(
+        list[dict[str, Any]],
+        rows.astype(object).where(rows.notna(), None).to_dict(orient="records"),
+    )
+
+
+def _paths_by_slug(files: pd.DataFrame, mask: pd.Series[bool]) -> dict[str, list[str]]:
+    selected = files.loc[mask]
+    return {slug: paths.tolist() for slug, paths in selected["path"].groupby(selected["slug"])}
+
+
+def _write_file_changes(db: Database, files: pd.DataFrame) -> dict[str, dict[str, list[str]]]:
+    """
+    Write the changes to the files of the datasets being registered
+
+    Parameters
+    ----------
+    db
+        Database instance
+    files
+        The registered and parsed files (see `DatasetAdapter._match_files`)
+
+    Raises
+    ------
+    NotImplementedError
+        If any registered files have been removed or modified without being parsed again
+
+    Returns
+    -------
+    :
+        The paths of the files that were added, updated or unchanged for each dataset
+    """
+    stored_fingerprints = [
+        (size, mtime_ns) if registered and pd.notna(size) else None
+        for registered, size, mtime_ns in zip(
+            files["_merge"] != "right_only", files["size"], files["mtime_ns"]
+        )
+    ]
+    fingerprint_current = pd.Series(
+        [current == stored for current, stored in zip(files["fingerprint"], stored_fingerprints)],
+        index=files.index,
+        dtype=bool,
+    )
+    fingerprint_matches = fingerprint_current & files["fingerprint"].notna()
+
+    parsed = files["_merge"] != "left_only"
+    registered = files["_merge"] != "right_only"
+    added = files["_merge"] == "right_only"
+    # Files that weren't parsed because they are unchanged since they were registered
+    # (see `find_changed_files`) are still part of the dataset
+    not_parsed_unchanged = ~parsed & fingerprint_matches
+    removed = ~parsed & ~fingerprint_matches
+
+    times_changed = (
+        parsed
+        & registered
+        & ~(
+            _equal(files["start_time"], files["new_start_time"])
+            & _equal(files["end_time"], files["new_end_time"])
+        )
+    )
+    parsed_unchanged = parsed & registered & ~times_changed
+
+    # TODO: support removing files that are no longer present
+    # We want to keep a record of the dataset if it was used by a diagnostic in the past
+    if removed.any():
+        files_removed = files.loc[removed, "path"].tolist()
+        logger.warning(f"Files to remove: {files_removed}")
+        raise NotImplementedError("Removing files is not yet supported")
+
+    # Add the new files
+    new_rows = files.loc[added, ["dataset_id", "path", "new_start_time", "new_end_time"]].rename(
+        columns={"new_start_time": "start_time", "new_end_time": "end_time"}
+    )
+    new_rows["size"], new_rows["mtime_ns"] = _fingerprint_values(files.loc[added])
+    new_rows["dataset_id"] = new_rows["dataset_id"].astype("int64")
+    if not new_rows.empty:
+        db.session.execute(insert(DatasetFile), _to_records(new_rows))
+
+    # Update the time bounds of the modified files and any outdated fingerprints
+    to_update = times_changed | (parsed & registered & ~fingerprint_current)
+    update_rows = files.loc[to_update, ["id", "new_start_time", "new_end_time"]].rename(
+        columns={"new_start_time": "start_time", "new_end_time": "end_time"}
+    )
+    update_rows["size"], update_rows["mtime_ns"] = _fingerprint_values(files.loc[to_update])
+    update_rows["id"] = update_rows["id"].astype("int64")
+    if not update_rows.empty:
+        for path in files.loc[times_changed, "path"]:
+            logger.warning(f"Updating file times for {path}")
+        db.session.execute(update(DatasetFile), _to_records(update_rows))
+
+    return {
+        "added": _paths_by_slug(files, added),
+        "updated": _paths_by_slug(files, times_changed),
+        "unchanged": _paths_by_slug(files, not_parsed_unchanged | parsed_unchanged),
+    }
+
+
 class DatasetParsingFunction(Protocol):
     """
     Protocol for a function that parses metadata from a file or directory
@@ -111,6 +266,17 @@ class DatasetAdapter(Protocol):
     This is generally the columns that describe the `slug` of a dataset,
     excluding the version information.
     """
+    drs_root: str | None = None
+    """
+    Name of the directory at the root of the Data Reference Syntax (DRS) of the datasets, if any
+    """
+    directory_template: tuple[str, ...] = ()
+    """
+    The facet that each level of directories in the DRS corresponds to,
+    starting with the directory at the root of the DRS.
+
+    This is used to skip directories when scanning for files (see `iter_files`).
+    """
 
     def pretty_subset(self, data_catalog: pd.DataFrame) -> pd.DataFrame:
         """
@@ -134,14 +300,205 @@ class DatasetAdapter(Protocol):
             ]
         ]
 
-    def find_local_datasets(self, file_or_directory: Path) -> pd.DataFrame:
+    def iter_files(
+        self, file_or_directory: Path, include: Mapping[str, Collection[str]] | None = None
+    ) -> Iterator[str]:
+        """
+        Find the candidate files in the specified file or directory as they are discovered
+
+        By default, the directory is scanned for netCDF files using a pool of threads
+        (see [scan_files][climate_ref.datasets.scanner.scan_files]).
+        The files of each directory are yielded together.
+
+        Parameters
+        ----------
+        file_or_directory
+            File or directory containing the datasets
+        include
+            Values of the facets in `directory_template` to include, e.g. `{"table_id": ["Amon", "fx"]}`.
+
+            Any directories in the DRS that don't match are skipped without being scanned.
+
+        Raises
+        ------
+        ValueError
+            If `include` contains facets that aren't in `directory_template`
+
+        Returns
+        -------
+        :
+            Paths of the candidate files
+        """
+        return scan_files(
+            file_or_directory,
+            drs_root=self.drs_root,
+            directory_template=self.directory_template,
+            include=include,
+        )
+
+    def find_files(
+        self, file_or_directory: Path, include: Mapping[str, Collection[str]] | None = None
+    ) -> list[str]:
+        """
+        Find the candidate files in the specified file or directory
+
+        See [iter_files][climate_ref.datasets.base.DatasetAdapter.iter_files].
+
+        Returns
+        -------
+        :
+            Sorted paths of the candidate files
+        """
+        return sorted(self.iter_files(file_or_directory, include))
+
+    def parse_files(self, files: Sequence[str]) -> pd.DataFrame:
+        """
+        Generate a data catalog from a set of files
+
+        Each row of the data catalog contains the metadata for a single file.
+        The files of a dataset must all be parsed together,
+        as the metadata of a dataset may be derived from all of its files.
+
+        Parameters
+        ----------
+        files
+            Files to parse
+
+        Returns
+        -------
+        :
+            Data catalog containing the metadata for the files
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support parsing files")
+
+    def parse_manifest(self, manifest: pd.DataFrame) -> pd.DataFrame:
+        """
+        Generate a data catalog from the rows of a file manifest
+
+        Adapters may use the metadata in the manifest rather than opening the files.
+        By default, only the paths are used and the files are parsed
+        using [parse_files][climate_ref.datasets.base.DatasetAdapter.parse_files].
+
+        Parameters
+        ----------
+        manifest
+            Rows of a manifest (see [read_manifest][climate_ref.datasets.manifest.read_manifest])
+            for a set of complete datasets
+
+        Returns
+        -------
+        :
+            Data catalog containing the metadata for the files
+        """
+        return self.parse_files(manifest["path"].tolist())
+
+    def find_local_datasets(
+        self, file_or_directory: Path, file_filter: FileFilter | None = None
+    ) -> pd.DataFrame:
         """
         Generate a data catalog from the specified file or directory
 
         This data catalog should contain all the metadata needed by the database.
         The index of the data catalog should be the dataset slug.
+
+        If `file_filter` is provided, it is called with the candidate files before they are parsed
+        and only the files that it returns are included in the data catalog.
         """
-        ...
+        files = self.find_files(file_or_directory)
+        if file_filter is not None and files:
+            n_candidates = len(files)
+            files = file_filter(files)
+            logger.info(f"Parsing {len(files)} of {n_candidates} files found in {file_or_directory}")
+            if not files:
+                return pd.DataFrame(columns=[*self.dataset_specific_metadata, *self.file_specific_metadata])
+
+        return self.parse_files(files)
+
+    def finalises_datasets(self) -> bool:
+        """
+        Whether parsing a file extracts the complete set of metadata for a dataset
+
+        If True, files belonging to datasets that haven't been finalised are parsed again
+        by [find_changed_files][climate_ref.datasets.base.DatasetAdapter.find_changed_files].
+        """
+        return False
+
+    def find_changed_files(
+        self, db: Database, files: Sequence[str], fingerprints: Mapping[str, tuple[int, int]] | None = None
+    ) -> list[str]:
+        """
+        Select the files that have been added or modified since they were registered
+
+        A file is unchanged if its size and modification time match the values that were stored
+        when the file was registered. This doesn't require opening the file,
+        so it can be used to skip parsing the files that are already in the database.
+
+        Files are also considered changed if they belong to a dataset that hasn't been finalised
+        and the adapter would finalise the dataset
+        (see [finalises_datasets][climate_ref.datasets.base.DatasetAdapter.finalises_datasets]).
+
+        The metadata of a dataset may be derived from all of its files,
+        so if any file of a dataset has changed, all the candidate files of that dataset are selected.
+        The files of a dataset are those registered with the same dataset
+        and, for files that haven't been registered, those in the same directory.
+
+        Parameters
+        ----------
+        db
+            Database instance
+        files
+            Candidate files
+        fingerprints
+            The size and modification time of the candidate files if they are already known
+            (e.g. from a manifest).
+            Any other files are accessed to determine their size and modification time.
+
+        Returns
+        -------
+        :
+            The candidate files that need to be parsed
+        """
+        dataset_type = self.dataset_cls.__mapper_args__["polymorphic_identity"]
+        finalises_datasets = self.finalises_datasets()
+
+        paths = [str(Path(file)) for file in files]
+        unchanged: set[str] = set()
+        registered_datasets: dict[str, int] = {}
+        with db.session.begin():
+            for start in range(0, len(paths), FILE_LOOKUP_BATCH_SIZE):
+                batch = paths[start : start + FILE_LOOKUP_BATCH_SIZE]
+                stmt = (
+                    select(
+                        DatasetFile.path,
+                        DatasetFile.dataset_id,
+                        DatasetFile.size,
+                        DatasetFile.mtime_ns,
+                        Dataset.finalised,
+                    )
+                    .join(Dataset, DatasetFile.dataset_id == Dataset.id)
+                    .where(Dataset.dataset_type == dataset_type, DatasetFile.path.in_(batch))
+                )
+                for path, dataset_id, size, mtime_ns, finalised in db.session.execute(stmt):
+                    registered_datasets[path] = dataset_id
+                    if size is None or (finalises_datasets and not finalised):
+                        continue
+                    fingerprint = fingerprints.get(path) if fingerprints else None
+                    if (fingerprint or file_fingerprint(path)) == (size, mtime_ns):
+                        unchanged.add(path)
+
+        # Select the other files of the datasets with changes
+        changed = [path for path in paths if path not in unchanged]
+        changed_datasets = {registered_datasets[path] for path in changed if path in registered_datasets}
+        changed_directories = {Path(path).parent for path in changed if path not in registered_datasets}
+        unchanged = {
+            path
+            for path in unchanged
+            if registered_datasets[path] not in changed_datasets
+            and Path(path).parent not in changed_directories
+        }
+
+        logger.debug(f"{len(unchanged)} of {len(paths)} files are unchanged since they were registered")
+        return [file for file, path in zip(files, paths) if path not in unchanged]
 
     def validate_data_catalog(self, data_catalog: pd.DataFrame, skip_invalid: bool = False) -> pd.DataFrame:
         """
@@ -190,7 +547,7 @@ class DatasetAdapter(Protocol):
 
         return data_catalog
 
-    def register_dataset(  # noqa: PLR0915
+    def register_dataset(
         self, config: Config, db: Database, data_catalog_dataset: pd.DataFrame
     ) -> DatasetRegistrationResult:
         """
@@ -210,153 +567,374 @@ class DatasetAdapter(Protocol):
         :
             Registration result with dataset and file change information
         """
-        DatasetModel = self.dataset_cls
-
-        self.validate_data_catalog(data_catalog_dataset)
         unique_slugs = data_catalog_dataset[self.slug_column].unique()
         if len(unique_slugs) != 1:
             raise RefException(f"Found multiple datasets in the same directory: {unique_slugs}")
-        slug = unique_slugs[0]
 
-        # Upsert the dataset (create a new dataset or update the metadata)
-        dataset_metadata = data_catalog_dataset[list(self.dataset_specific_metadata)].iloc[0].to_dict()
-        dataset, dataset_state = db.update_or_create(DatasetModel, defaults=dataset_metadata, slug=slug)
-        if dataset_state == ModelState.CREATED:
+        return self.register_data_catalog(config, db, data_catalog_dataset)[0]
+
+    def _load_existing_datasets(self, db: Database, slugs: Sequence[str]) -> dict[str, Dataset]:
+        existing: dict[str, Dataset] = {}
+        for start in range(0, len(slugs), FILE_LOOKUP_BATCH_SIZE):
+            batch = slugs[start : start + FILE_LOOKUP_BATCH_SIZE]
+            stmt = select(self.dataset_cls).where(self.dataset_cls.slug.in_(batch))
+            for dataset in db.session.scalars(stmt):
+                existing[dataset.slug] = dataset
+        return existing
+
+    def _load_existing_files(self, db: Database, dataset_ids: Sequence[int]) -> pd.DataFrame:
+        columns = ["id", "dataset_id", "path", "start_time", "end_time", "size", "mtime_ns"]
+        rows = []
+        for start in range(0, len(dataset_ids), FILE_LOOKUP_BATCH_SIZE):
+            batch = dataset_ids[start : start + FILE_LOOKUP_BATCH_SIZE]
+            rows.extend(
+                db.session.execute(
+                    select(*(getattr(DatasetFile, column) for column in columns)).where(
+                        DatasetFile.dataset_id.in_(batch)
+                    )
+                ).all()
+            )
+        # Keep the time bounds as objects as they may be outside the range of `datetime64[ns]`
+        files = pd.DataFrame(rows, columns=columns, dtype=object)
+        return files.astype({"id": "int64", "dataset_id": "int64"})
+
+    def register_data_catalog(
+        self, config: Config, db: Database, data_catalog: pd.DataFrame
+    ) -> list[DatasetRegistrationResult]:
+        """
+        Register all the datasets in a data catalog
+
+        The existing datasets and files are loaded with a query per batch of datasets
+        and compared to the data catalog as a whole.
+        The new and modified files are then written using bulk inserts and updates,
+        rather than querying and writing each dataset separately.
+
+        Files that are registered but not in the data catalog are unchanged
+        if they haven't been modified since they were registered (see `find_changed_files`).
+        The size and modification time of the files are taken from the data catalog
+        if they were provided by a manifest (see `climate_ref.datasets.manifest`),
+        otherwise the files are accessed.
+
+        Parameters
+        ----------
+        config
+            Configuration object
+        db
+            Database instance
+        data_catalog
+            Data catalog containing the metadata for one or more complete datasets
+
+        Raises
+        ------
+        NotImplementedError
+            If any registered files have been removed or modified without being parsed again
+
+        Returns
+        -------
+        :
+            Registration result for each dataset, in the order of the slugs
+        """
+        data_catalog = self.validate_data_catalog(data_catalog)
+        if data_catalog.empty:
+            return []
+
+        # Dataset metadata is the same for all files in a dataset
+        metadata = data_catalog.drop_duplicates(self.slug_column).set_index(self.slug_column, drop=False)[
+            list(self.dataset_specific_metadata)
+        ]
+        slugs = metadata.index.tolist()
+        existing = self._load_existing_datasets(db, slugs)
+        existing_slugs = [slug for slug in slugs if slug in existing]
+
+        datasets: dict[str, Dataset] = {slug: existing[slug] for slug in existing_slugs}
+        dataset_states: dict[str, ModelState | None] = {}
+        if existing_slugs:
+            dataset_states.update(self._update_existing_datasets(existing, metadata.loc[existing_slugs]))
+        new_datasets = [
+            self.dataset_cls(slug=slug, **metadata.loc[slug].to_dict())
+            for slug in slugs
+            if slug not in existing
+        ]
+        for dataset in new_datasets:
+            datasets[dataset.slug] = dataset
+            dataset_states[dataset.slug] = ModelState.CREATED
             logger.info(f"Created new dataset: {dataset}")
-        elif dataset_state == ModelState.UPDATED:
-            logger.info(f"Updating existing dataset: {dataset}")
+        db.session.add_all(new_datasets)
         db.session.flush()
 
-        # Initialize result tracking
-        files_added = []
-        files_updated = []
-        files_removed = []
-        files_unchanged = []
-
-        # Get current files for this dataset
-        current_files = db.session.query(DatasetFile).filter_by(dataset_id=dataset.id).all()
-        current_file_paths = {f.path: f for f in current_files}
-
-        # Get new file data from data catalog
-        new_file_data = data_catalog_dataset.to_dict(orient="records")
-        new_file_lookup = {}
-        for dataset_file in new_file_data:
-            file_path = str(validate_path(dataset_file["path"]))
-            new_file_lookup[file_path] = {
-                "start_time": dataset_file["start_time"],
-                "end_time": dataset_file["end_time"],
-            }
+        files = self._match_files(db, data_catalog, datasets, existing_slugs)
+        changes = _write_file_changes(db, files)
+
+        results = []
+        touched_ids = []
+        for slug in slugs:
+            result = DatasetRegistrationResult(
+                dataset=datasets[slug],
+                dataset_state=dataset_states[slug],
+                files_added=changes["added"].get(slug, []),
+                files_updated=changes["updated"].get(slug, []),
+                files_removed=[],
+                files_unchanged=changes["unchanged"].get(slug, []),
+            )
+            # Determine final dataset state
+            # If dataset metadata changed, use that state
+            # If no metadata changed but files changed, consider it updated
+            # If nothing changed, keep the original state (None for existing, CREATED for new)
+            if result.dataset_state is None and result.total_changes:
+                result.dataset_state = ModelState.UPDATED
+            if result.dataset_state == ModelState.UPDATED:
+                touched_ids.append(result.dataset.id)
+            results.append(result)
+
+            change_message = f": ({result.dataset_state.name})" if result.dataset_state else ""
+            logger.debug(
+                f"Dataset registration complete for {slug}{change_message} "
+                f"{len(result.files_added)} files added, "
+                f"{len(result.files_updated)} files updated, "
+                f"{len(result.files_removed)} files removed, "
+                f"{len(result.files_unchanged)} files unchanged"
+            )
 
-        new_file_paths = set(new_file_lookup.keys())
-        existing_file_paths = set(current_file_paths.keys())
-
-        # TODO: support removing files that are no longer present
-        # We want to keep a record of the dataset if it was used by a diagnostic in the past
-        files_to_remove = existing_file_paths - new_file_paths
-        if files_to_remove:
-            files_removed = list(files_to_remove)
-            logger.warning(f"Files to remove: {files_removed}")
-            raise NotImplementedError("Removing files is not yet supported")
-
-        # Update existing files if start/end times have changed
-        for file_path, existing_file in current_file_paths.items():
-            if file_path in new_file_lookup:
-                new_times = new_file_lookup[file_path]
-                if (
-                    existing_file.start_time != new_times["start_time"]
-                    or existing_file.end_time != new_times["end_time"]
-                ):
-                    logger.warning(f"Updating file times for {file_path}")
-                    existing_file.start_time = new_times["start_time"]
-                    existing_file.end_time = new_times["end_time"]
-                    files_updated.append(file_path)
-                else:
-                    files_unchanged.append(file_path)
-
-        # Add new files (batch operation)
-        files_to_add = new_file_paths - existing_file_paths
-        if files_to_add:
-            files_added = list(files_to_add)
-            new_dataset_files = []
-            for file_path in files_to_add:
-                file_times = new_file_lookup[file_path]
-                new_dataset_files.append(
-                    DatasetFile(
-                        path=file_path,
-                        dataset_id=dataset.id,
-                        start_time=file_times["start_time"],
-                        end_time=file_times["end_time"],
-                    )
-                )
-            db.session.add_all(new_dataset_files)
-
-        # Determine final dataset state
-        # If dataset metadata changed, use that state
-        # If no metadata changed but files changed, consider it updated
-        # If nothing changed, keep the original state (None for existing, CREATED for new)
-        final_dataset_state = dataset_state
-        if dataset_state is None and (files_added or files_updated or files_removed):
-            final_dataset_state = ModelState.UPDATED
-
-        result = DatasetRegistrationResult(
-            dataset=dataset,
-            dataset_state=final_dataset_state,
-            files_added=files_added,
-            files_updated=files_updated,
-            files_removed=files_removed,
-            files_unchanged=files_unchanged,
+        # The timestamp must be bumped explicitly for the changes to be picked up by incremental solves,
+        # as the dataset row itself may be unchanged
+        for start in range(0, len(touched_ids), FILE_LOOKUP_BATCH_SIZE):
+            db.session.execute(
+                update(Dataset)
+                .where(Dataset.id.in_(touched_ids[start : start + FILE_LOOKUP_BATCH_SIZE]))
+                .values(updated_at=func.now())
+                .execution_options(synchronize_session="fetch")
+            )
+
+        return results
+
+    def _update_existing_datasets(
+        self, existing: Mapping[str, Dataset], metadata: pd.DataFrame
+    ) -> dict[str, ModelState | None]:
+        """
+        Update the metadata of the existing datasets in bulk
+
+        Returns the state of each of the existing datasets
+        """
+        new_metadata = metadata.astype(object)
+        current_metadata = pd.DataFrame(
+            [[getattr(existing[slug], column) for column in new_metadata.columns] for slug in metadata.index],
+            index=new_metadata.index,
+            columns=new_metadata.columns,
+            dtype=object,
         )
-        change_message = f": ({final_dataset_state.name})" if final_dataset_state else ""
-        logger.debug(
-            f"Dataset registration complete for {dataset.slug}{change_message} "
-            f"{len(files_added)} files added, "
-            f"{len(files_updated)} files updated, "
-            f"{len(files_removed)} files removed, "
-            f"{len(files_unchanged)} files unchanged"
+        changed = ~((current_metadata == new_metadata) | (current_metadata.isna() & new_metadata.isna()))
+
+        dataset_states: dict[str, ModelState | None] = {}
+        for slug in metadata.index:
+            dataset = existing[slug]
+            changed_columns = changed.columns[changed.loc[slug].to_numpy()]
+            for column in changed_columns:
+                value = new_metadata.at[slug, column]
+                logger.debug(f"Updating {self.dataset_cls.__name__} {column} to {value}")
+                setattr(dataset, column, value)
+            dataset_states[slug] = ModelState.UPDATED if len(changed_columns) else None
+            if len(changed_columns):
+                logger.info(f"Updating existing dataset: {dataset}")
+        return dataset_states
+
+    def _match_files(
+        self,
+        db: Database,
+        data_catalog: pd.DataFrame,
+        datasets: Mapping[str, Dataset],
+        existing_slugs: Sequence[str],
+    ) -> pd.DataFrame:
+        """
+        Match the files in the data catalog with the registered files
+
+        Returns a row per file with the registered and parsed time bounds and the fingerprint of the file.
+        The `_merge` column indicates whether the file is registered, parsed or both.
+        """
+        dataset_ids = pd.Series({slug: dataset.id for slug, dataset in datasets.items()}, dtype="int64")
+
+        # Files with a fingerprint from a manifest aren't accessed again
+        known = known_fingerprints(data_catalog)
+        new_files = pd.DataFrame(
+            {
+                "slug": data_catalog[self.slug_column].to_numpy(),
+                "path": [
+                    str(Path(path)) if fingerprint is not None else str(validate_path(path))
+                    for path, fingerprint in zip(data_catalog["path"], known)
+                ],
+                "new_start_time": data_catalog["start_time"].to_numpy(),
+                "new_end_time": data_catalog["end_time"].to_numpy(),
+                "known_fingerprint": pd.Series(known, dtype=object).to_numpy(),
+            }
         )
+        new_files["dataset_id"] = new_files["slug"].map(dataset_ids)
+        current_files = self._load_existing_files(db, [datasets[slug].id for slug in existing_slugs])
+        current_files["slug"] = current_files["dataset_id"].map(
+            pd.Series(dataset_ids.index, index=dataset_ids.to_numpy())
+        )
+        files = current_files.merge(new_files, on=["slug", "dataset_id", "path"], how="outer", indicator=True)
+        files["fingerprint"] = [
+            fingerprint if isinstance(fingerprint, tuple) else file_fingerprint(path)
+            for path, fingerprint in zip(files["path"], files["known_fingerprint"])
+        ]
+        return files
+
+    def _get_dataset_files(
+        self, db: Database, limit: int | None = None, filters: Collection[FacetFilter] = ()
+    ) -> pd.DataFrame:
+        columns: dict[str, Any] = {k: getattr(DatasetFile, k) for k in self.file_specific_metadata}
+        columns.update({k: getattr(self.dataset_cls, k) for k in self.dataset_specific_metadata})
+        columns.setdefault("finalised", self.dataset_cls.finalised)
 
-        return result
+        return self._select_latest_versions(db, columns, include_files=True, limit=limit, filters=filters)
 
-    def _get_dataset_files(self, db: Database, limit: int | None = None) -> pd.DataFrame:
-        dataset_type = self.dataset_cls.__mapper_args__["polymorphic_identity"]
+    def _get_datasets(
+        self, db: Database, limit: int | None = None, filters: Collection[FacetFilter] = ()
+    ) -> pd.DataFrame:
+        columns: dict[str, Any] = {k: getattr(self.dataset_cls, k) for k in self.dataset_specific_metadata}
+
+        return self._select_latest_versions(db, columns, include_files=False, limit=limit, filters=filters)
+
+    def _select_latest_versions(
+        self,
+        db: Database,
+        columns: dict[str, Any],
+        include_files: bool,
+        limit: int | None,
+        filters: Collection[FacetFilter] = (),
+    ) -> pd.DataFrame:
+        """
+        Select the latest version of each dataset
+
+        Only the requested columns are selected
+        and the latest version of each dataset is resolved using a window function
+        rather than hydrating ORM objects and filtering in pandas.
+
+        Datasets are ordered by the time that the most recently modified version was updated.
+        The limit is applied after the latest versions have been resolved.
 
-        result = (
-            db.session.query(DatasetFile)
-            # The join is necessary to be able to order by the dataset columns
-            .join(DatasetFile.dataset)
-            .where(Dataset.dataset_type == dataset_type)
-            # The joinedload is necessary to avoid N+1 queries (one for each dataset)
-            # https://docs.sqlalchemy.org/en/14/orm/loading_relationships.html#the-zen-of-joined-eager-loading
-            .options(joinedload(DatasetFile.dataset.of_type(self.dataset_cls)))
-            .order_by(Dataset.updated_at.desc())
+        The filters are applied after the latest versions have been resolved,
+        with the same semantics as `DataRequirement.apply_filters`.
+        """
+        dataset_type = self.dataset_cls.__mapper_args__["polymorphic_identity"]
+        dataset_id_columns = [getattr(self.dataset_cls, k) for k in self.dataset_id_metadata]
+        version_column = getattr(self.dataset_cls, self.version_metadata)
+
+        if any(not facet_filter.facets for facet_filter in filters):
+            # An empty filter matches every dataset
+            filters = ()
+        for facet_filter in filters:
+            for facet in facet_filter.facets:
+                if facet not in columns:
+                    raise KeyError(f"Facet {facet!r} not in data catalog columns: {list(columns)}")
+
+        latest = select(
+            self.dataset_cls.id.label("_dataset_id"),
+            *(column.label(name) for name, column in columns.items()),
+            version_column.label("_version"),
+            func.max(version_column).over(partition_by=dataset_id_columns).label("_latest_version"),
+            func.max(self.dataset_cls.updated_at)
+            .over(partition_by=dataset_id_columns)
+            .label("_latest_update"),
+            self.dataset_cls.updated_at.label("_updated_at"),
+            *(column.label(f"_key_{i}") for i, column in enumerate(dataset_id_columns)),
+            *([DatasetFile.id.label("_file_id")] if include_files else []),
+        ).where(
+            self.dataset_cls.dataset_type == dataset_type,
+            # Consistent with pandas, datasets with missing identifiers are excluded
+            *(column.is_not(None) for column in dataset_id_columns),
+        )
+        if include_files:
+            latest = latest.join(DatasetFile, DatasetFile.dataset_id == self.dataset_cls.id)
+        if filters and all(
+            facet_filter.facets.keys() & set(self.dataset_id_metadata) for facet_filter in filters
+        ):
+            # Filtering on the dataset identifiers selects every version of a dataset,
+            # so these facets can also be used to reduce the rows before resolving the latest versions
+            latest = latest.where(
+                or_(
+                    *(
+                        and_(
+                            *(
+                                getattr(self.dataset_cls, facet).in_(values)
+                                for facet, values in facet_filter.facets.items()
+                                if facet in self.dataset_id_metadata
+                            )
+                        )
+                        for facet_filter in filters
+                    )
+                )
+            )
+        subquery = latest.subquery()
+
+        stmt = (
+            select(subquery.c["_dataset_id"], *(subquery.c[name] for name in columns))
+            .where(subquery.c["_version"] == subquery.c["_latest_version"])
+            .order_by(
+                subquery.c["_latest_update"].desc(),
+                *(subquery.c[f"_key_{i}"] for i in range(len(dataset_id_columns))),
+                subquery.c["_updated_at"].desc(),
+                subquery.c["_dataset_id"],
+                *([subquery.c["_file_id"]] if include_files else []),
+            )
             .limit(limit)
-            .all()
         )
+        if filters:
+            stmt = stmt.where(
+                or_(
+                    *(
+                        and_(
+                            *(subquery.c[facet].in_(values) for facet, values in facet_filter.facets.items())
+                        )
+                        for facet_filter in filters
+                    )
+                )
+            )
 
-        return pd.DataFrame(
-            [
-                {
-                    **{k: getattr(file, k) for k in self.file_specific_metadata},
-                    **{k: getattr(file.dataset, k) for k in self.dataset_specific_metadata},
-                    "finalised": file.dataset.finalised,
-                }
-                for file in result
-            ],
-            index=[file.dataset.id for file in result],
-        )
+        # Stream the results in batches into a list per column
+        index: list[int] = []
+        values: dict[str, list[Any]] = {name: [] for name in columns}
+        result = db.session.execute(stmt.execution_options(yield_per=CATALOG_BATCH_SIZE))
+        for partition in result.partitions():
+            batch = list(zip(*partition))
+            index.extend(batch[0])
+            for name, column_values in zip(columns, batch[1:]):
+                values[name].extend(column_values)
 
-    def _get_datasets(self, db: Database, limit: int | None = None) -> pd.DataFrame:
-        result_datasets = (
-            db.session.query(self.dataset_cls).order_by(Dataset.updated_at.desc()).limit(limit).all()
-        )
+        return pd.DataFrame(values, index=index)
 
-        return pd.DataFrame(
-            [{k: getattr(dataset, k) for k in self.dataset_specific_metadata} for dataset in result_datasets],
-            index=[file.id for file in result_datasets],
-        )
+    def _compact_catalog(self, catalog: pd.DataFrame) -> pd.DataFrame:
+        """
+        Convert a data catalog to a compact representation
+
+        Each facet is repeated for every file in a dataset
+        so the dataset metadata is stored as categorical columns.
+        This reduces the memory used by the catalog
+        and speeds up any filtering or grouping of the catalog.
+        The version isn't converted as it is compared lexicographically.
+
+        The time bounds of each file are stored as `datetime64[us]`
+        which covers the range of dates used by CMIP6 experiments.
+        Time bounds that can't be represented as `datetime64[us]`,
+        such as dates in a non-standard calendar, are left unchanged.
+        """
+        columns: dict[str, pd.Series[Any]] = {
+            name: catalog[name].astype("category")
+            for name in self.dataset_specific_metadata
+            if name != self.version_metadata and catalog[name].dtype == object
+        }
+        for name in ("start_time", "end_time"):
+            if name in catalog:
+                columns[name] = _as_datetime64(catalog[name])
+
+        return catalog.assign(**columns)
 
     def load_catalog(
-        self, db: Database, include_files: bool = True, limit: int | None = None
+        self,
+        db: Database,
+        include_files: bool = True,
+        limit: int | None = None,
+        snapshot_dir: Path | None = None,
+        filters: Collection[FacetFilter] | None = None,
     ) -> pd.DataFrame:
         """
         Load the data catalog containing the currently tracked datasets/files from the database
@@ -369,35 +947,64 @@ class DatasetAdapter(Protocol):
         The index of the data catalog is the primary key of the dataset.
         This should be maintained during any processing.
 
+        The dataset metadata columns are categorical
+        and the file time bounds are stored as `datetime64[us]`.
+
+        Parameters
+        ----------
+        db
+            Database instance
+        include_files
+            If True, the catalog contains a row for each file rather than each dataset
+        limit
+            Maximum number of rows to return
+        snapshot_dir
+            Directory containing snapshots of previously loaded catalogs.
+
+            If provided, the catalog is read from a snapshot if the database has not changed since
+            the snapshot was written. Otherwise, the catalog is loaded from the database
+            and a new snapshot is written.
+            Snapshots are only used when loading the complete catalog of files.
+        filters
+            Only load the datasets that match any of these filters.
+
+            The filters are evaluated by the database
+            so only the matching rows are loaded.
+
         Returns
         -------
         :
             Data catalog containing the metadata for the currently ingested datasets
         """
+        use_snapshot = (
+            snapshot_dir is not None
+            and include_files
+            and limit is None
+            and not filters
+            and snapshots_enabled()
+        )
+
         with db.session.begin():
-            # TODO: Paginate this query to avoid loading all the data at once
+            if use_snapshot:
+                fingerprint, settled = catalog_fingerprint(self, db)
+                snapshot_path = cast(Path, snapshot_dir) / f"{self.dataset_cls.__name__}.arrow"
+                snapshot = read_snapshot(snapshot_path, fingerprint)
+                if snapshot is not None:
+                    logger.debug(f"Loaded data catalog from snapshot {snapshot_path}")
+                    return snapshot
+
             if include_files:
-                catalog = self._get_dataset_files(db, limit)
+                catalog = self._get_dataset_files(db, limit, filters or ())
             else:
-                catalog = self._get_datasets(db, limit)
-
-        def _get_latest_version(dataset_catalog: pd.DataFrame) -> pd.DataFrame:
-            """
-            Get the latest version of each dataset based on the version metadata.
-
-            This assumes that the version can be sorted lexicographically.
-            """
-            latest_version = dataset_catalog[self.version_metadata].max()
-
-            return cast(
-                pd.DataFrame, dataset_catalog[dataset_catalog[self.version_metadata] == latest_version]
-            )
+                catalog = self._get_datasets(db, limit, filters or ())
 
         # If there are no datasets, return an empty DataFrame
         if catalog.empty:
             return pd.DataFrame(columns=self.dataset_specific_metadata + self.file_specific_metadata)
 
-        # Group by the dataset ID and get the latest version for each dataset
-        return catalog.groupby(
-            list(self.dataset_id_metadata), group_keys=False, as_index=False, sort=False
-        ).apply(_get_latest_version)
+        catalog = self._compact_catalog(catalog)
+
+        if use_snapshot and settled:
+            write_snapshot(snapshot_path, catalog, fingerprint)
+
+        return catalog
@@ -1,60 +1,143 @@
 from __future__ import annotations
 
 import warnings
+from collections.abc import Sequence
 from datetime import datetime
-from pathlib import Path
 from typing import Any
 
+import numpy as np
 import pandas as pd
 from ecgtools import Builder
 from loguru import logger
 
 from climate_ref.config import Config
 from climate_ref.datasets.base import DatasetAdapter, DatasetParsingFunction
-from climate_ref.datasets.cmip6_parsers import parse_cmip6_complete, parse_cmip6_drs
+from climate_ref.datasets.cmip6_parsers import (
+    HEADER_KEYS,
+    parse_cmip6_complete,
+    parse_cmip6_drs,
+    parse_cmip6_metadata,
+)
+from climate_ref.datasets.parse_cache import ParseCache, parser_key
 from climate_ref.models.dataset import CMIP6Dataset
 
+DATETIME_PATTERN = r"\d{4}-\d{2}-\d{2}(?: \d{2}:\d{2}:\d{2}(?:\.\d{1,6})?)?"
+"""
+Formats of the dates that are parsed in bulk
+
+These are the "%Y-%m-%d", "%Y-%m-%d %H:%M:%S" and "%Y-%m-%d %H:%M:%S.%f" formats
+written by the parsers.
+"""
+
+
+def _parse_datetime_string(date_string: str | None) -> datetime | None:
+    if not date_string or pd.isnull(date_string):
+        return None
+
+    # Try to parse the date string with and without milliseconds
+    for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
+        try:
+            return datetime.strptime(date_string, fmt)
+        except ValueError:
+            continue
+
+    # If all parsing attempts fail, log an error and return None
+    logger.error(f"Failed to parse date string: {date_string}")
+    return None
+
 
 def _parse_datetime(dt_str: pd.Series[str]) -> pd.Series[datetime | Any]:
     """
     Pandas tries to coerce everything to their own datetime format, which is not what we want here.
+
+    The values are returned as `datetime` objects rather than `datetime64[ns]`
+    which can't represent dates outside of 1677-2262.
+    Strings in the expected formats are parsed in bulk as `datetime64[us]`.
+    Any other strings, or dates that don't exist in the standard calendar (e.g. 30th February),
+    are parsed individually.
     """
+    result = pd.Series(None, index=dt_str.index, dtype="object")
+    try:
+        matches = dt_str.str.fullmatch(DATETIME_PATTERN).to_numpy(dtype=bool, na_value=False)
+    except AttributeError:
+        # Not a column of strings
+        matches = np.zeros(len(dt_str), dtype=bool)
+
+    if matches.any():
+        values = dt_str[matches].to_numpy(dtype=str)
+        try:
+            parsed = values.astype("datetime64[us]")
+        except ValueError:
+            # At least one of the dates is invalid so fall back to parsing each value
+            matches[:] = False
+        else:
+            result[matches] = parsed.astype(object)
 
-    def _inner(date_string: str | None) -> datetime | None:
-        if not date_string or pd.isnull(date_string):
-            return None
+    remaining = ~matches
+    if remaining.any():
+        result[remaining] = [_parse_datetime_string(value) for value in dt_str[remaining]]
 
-        # Try to parse the date string with and without milliseconds
-        for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
-            try:
-                return datetime.strptime(date_string, fmt)
-            except ValueError:
-                continue
+    return result
 
-        # If all parsing attempts fail, log an error and return None
-        logger.error(f"Failed to parse date string: {date_string}")
-        return None
 
-    return pd.Series(
-        [_inner(dt) for dt in dt_str],
-        index=dt_str.index,
-        dtype="object",
-    )
+def _parse_files(
+    files: Sequence[str],
+    parsing_function: DatasetParsingFunction,
+    n_jobs: int,
+    parse_cache: ParseCache | None = None,
+) -> pd.DataFrame:
+    """
+    Parse the metadata of each file
+
+    Parameters
+    ----------
+    files
+        Files to parse
+    parsing_function
+        Function used to parse the metadata of a file
+    n_jobs
+        Number of files to parse in parallel
+    parse_cache
+        If provided, the metadata of any unchanged files are read from the cache
+        rather than being parsed again
+
+    Returns
+    -------
+    :
+        The metadata for each file that could be parsed
+    """
+    builder = Builder(paths=[], joblib_parallel_kwargs={"n_jobs": n_jobs})
+    builder.assets = list(files)
+
+    if parse_cache is None or not builder.assets:
+        builder.parse(parsing_func=parsing_function).clean_dataframe()
+        return builder.df
+
+    parser = parser_key(parsing_function)
+    assets = builder.assets
+    entries = parse_cache.get(assets, parser)
+    builder.assets = [asset for asset in assets if asset not in entries]
+    if builder.assets:
+        builder.parse(parsing_func=parsing_function)
+        parsed = list(zip(builder.assets, builder.entries))
+        parse_cache.put(parsed, parser)
+        entries.update(parsed)
+
+    # Keep the same order as if all the files had been parsed
+    builder.assets = assets
+    builder.df = pd.DataFrame([entries[asset] for asset in assets])
+    builder.clean_dataframe()
+    return builder.df
 
 
 def _apply_fixes(data_catalog: pd.DataFrame) -> pd.DataFrame:
-    def _fix_parent_variant_label(group: pd.DataFrame) -> pd.DataFrame:
-        if group["parent_variant_label"].nunique() == 1:
-            return group
-        group["parent_variant_label"] = group["parent_variant_label"].iloc[0]
-
-        return group
-
     if "parent_variant_label" in data_catalog:
-        data_catalog = (
-            data_catalog.groupby("instance_id")
-            .apply(_fix_parent_variant_label, include_groups=False)
-            .reset_index(level="instance_id")
+        # Use the parent_variant_label of the first file if the files of a dataset disagree
+        parent_variant_label = data_catalog["parent_variant_label"]
+        first = data_catalog.drop_duplicates("instance_id").set_index("instance_id")["parent_variant_label"]
+        consistent = data_catalog.groupby("instance_id")["parent_variant_label"].transform("nunique") == 1
+        data_catalog["parent_variant_label"] = parent_variant_label.where(
+            consistent, data_catalog["instance_id"].map(first)
         )
 
     if "branch_time_in_child" in data_catalog:
@@ -131,6 +214,8 @@ class CMIP6DatasetAdapter(DatasetAdapter):
         "variable_id",
         "grid_label",
     )
+    drs_root = "CMIP6"
+    directory_template = ("mip_era", *dataset_id_metadata, version_metadata)
 
     def __init__(self, n_jobs: int = 1, config: Config | None = None):
         self.n_jobs = n_jobs
@@ -157,17 +242,26 @@ class CMIP6DatasetAdapter(DatasetAdapter):
             logger.info(f"Using DRS CMIP6 parser (config value: {parser_type})")
             return parse_cmip6_drs
 
-    def find_local_datasets(self, file_or_directory: Path) -> pd.DataFrame:
+    def finalises_datasets(self) -> bool:
+        """
+        Whether the configured parser extracts the complete set of metadata
+
+        The DRS parser only extracts the metadata from the path of each file,
+        so the datasets are finalised once the complete parser is used.
+        """
+        return self.config.cmip6_parser == "complete"
+
+    def parse_files(self, files: Sequence[str]) -> pd.DataFrame:
         """
-        Generate a data catalog from the specified file or directory
+        Generate a data catalog from a set of files
 
         Each dataset may contain multiple files, which are represented as rows in the data catalog.
         Each dataset has a unique identifier, which is in `slug_column`.
 
         Parameters
         ----------
-        file_or_directory
-            File or directory containing the datasets
+        files
+            Files to parse
 
         Returns
         -------
@@ -180,14 +274,56 @@ class CMIP6DatasetAdapter(DatasetAdapter):
             # Ignore the DeprecationWarning from xarray
             warnings.simplefilter("ignore", DeprecationWarning)
 
-            builder = Builder(
-                paths=[str(file_or_directory)],
-                depth=10,
-                include_patterns=["*.nc"],
-                joblib_parallel_kwargs={"n_jobs": self.n_jobs},
-            ).build(parsing_func=parsing_function)
+            catalog = _parse_files(
+                files,
+                parsing_function,
+                self.n_jobs,
+                # The DRS parser doesn't open the files so there is no benefit in caching the results
+                parse_cache=ParseCache(self.config.paths.cache / "parse_cache.sqlite")
+                if parsing_function is parse_cmip6_complete
+                else None,
+            )
+
+        return self._postprocess(catalog)
+
+    def parse_manifest(self, manifest: pd.DataFrame) -> pd.DataFrame:
+        """
+        Generate a data catalog from the rows of a file manifest
+
+        If the complete parser is configured and the manifest contains all the metadata
+        that the complete parser reads from each file (see `HEADER_KEYS`),
+        the metadata is taken from the manifest and the files aren't opened.
+        Otherwise, the files are parsed as usual.
+        The DRS parser only uses the path of each file.
+
+        Parameters
+        ----------
+        manifest
+            Rows of a manifest for a set of complete datasets
+
+        Returns
+        -------
+        :
+            Data catalog containing the metadata for the dataset
+        """
+        paths = manifest["path"].tolist()
+        if not self.finalises_datasets():
+            return self.parse_files(paths)
+
+        missing_columns = set(HEADER_KEYS) - set(manifest.columns)
+        if missing_columns:
+            logger.debug(f"Parsing the files as the manifest is missing {sorted(missing_columns)}")
+            return self.parse_files(paths)
+
+        metadata = manifest[list(HEADER_KEYS)].astype(object)
+        metadata = metadata.where(metadata.notna(), None)
+        catalog = pd.DataFrame(
+            [parse_cmip6_metadata(path, row) for path, row in zip(paths, metadata.to_dict(orient="records"))]
+        )
+        return self._postprocess(catalog)
 
-        datasets: pd.DataFrame = builder.df.drop(["init_year"], axis=1)
+    def _postprocess(self, catalog: pd.DataFrame) -> pd.DataFrame:
+        datasets: pd.DataFrame = catalog.drop(["init_year"], axis=1)
 
         # Convert the start_time and end_time columns to datetime objects
         # We don't know the calendar used in the dataset (TODO: Check what ecgtools does)
@@ -198,8 +334,8 @@ class CMIP6DatasetAdapter(DatasetAdapter):
             *self.dataset_id_metadata,
             self.version_metadata,
         ]
-        datasets["instance_id"] = datasets.apply(
-            lambda row: "CMIP6." + ".".join([row[item] for item in drs_items]), axis=1
+        datasets["instance_id"] = "CMIP6." + datasets[drs_items[0]].str.cat(
+            [datasets[item] for item in drs_items[1:]], sep="."
         )
 
         # Add in any missing metadata columns
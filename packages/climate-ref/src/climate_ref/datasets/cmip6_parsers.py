@@ -7,6 +7,9 @@ Additional non-official DRS's may be added in the future.
 import traceback
 from typing import Any
 
+import cftime  # type: ignore
+import netCDF4
+import numpy as np
 import xarray as xr
 from ecgtools.parsers.cmip import parse_cmip6_using_directories  # type: ignore
 from ecgtools.parsers.utilities import extract_attr_with_regex  # type: ignore
@@ -45,11 +48,253 @@ def _parse_daterange(date_range: str) -> tuple[str | None, str | None]:
         return None, None
 
 
+COMPLETE_KEYS = sorted(
+    {
+        "activity_id",
+        "branch_method",
+        "branch_time_in_child",
+        "branch_time_in_parent",
+        "experiment",
+        "experiment_id",
+        "frequency",
+        "grid",
+        "grid_label",
+        "institution_id",
+        "nominal_resolution",
+        "parent_activity_id",
+        "parent_experiment_id",
+        "parent_source_id",
+        "parent_time_units",
+        "parent_variant_label",
+        "realm",
+        "product",
+        "source_id",
+        "source_type",
+        "sub_experiment",
+        "sub_experiment_id",
+        "table_id",
+        "variable_id",
+        "variant_label",
+    }
+)
+"""
+Global attributes extracted by the complete parser
+"""
+
+HEADER_KEYS = (
+    *COMPLETE_KEYS,
+    "member_id",
+    "standard_name",
+    "long_name",
+    "units",
+    "vertical_levels",
+    "start_time",
+    "end_time",
+)
+"""
+Metadata read from each file by the complete parser
+
+The files don't need to be opened if these are already known (see `parse_cmip6_metadata`).
+"""
+
+VERTICAL_CRITERIA: dict[str, tuple[str, ...]] = {
+    "standard_name": (
+        "air_pressure",
+        "height",
+        "depth",
+        "geopotential_height",
+        "altitude",
+        "height_above_geopotential_datum",
+        "height_above_reference_ellipsoid",
+        "height_above_mean_sea_level",
+    ),
+    "positive": ("up", "down"),
+}
+"""
+Attributes that identify a vertical coordinate
+
+These match the criteria used by `cf_xarray` for the "vertical" key.
+"""
+
+TIME_CRITERIA: dict[str, tuple[str, ...]] = {
+    "standard_name": ("time",),
+    "_CoordinateAxisType": ("Time",),
+    "axis": ("T",),
+    "cartesian_axis": ("T",),
+    "grads_dim": ("t",),
+}
+"""
+Attributes that identify a time coordinate
+
+These match the criteria used by `cf_xarray` for the "T" key.
+"""
+
+TIMEDELTA_UNITS = ("days", "hours", "minutes", "seconds", "milliseconds", "microseconds", "nanoseconds")
+"""
+Units that xarray decodes as a time delta
+"""
+
+
+class _UnsupportedHeaderError(ValueError):
+    """
+    The file can't be described from its header alone
+    """
+
+
+def _is_datetime_like(variable: netCDF4.Variable) -> bool:
+    units = getattr(variable, "units", None)
+    return isinstance(units, str) and " since " in units
+
+
+def _find_coordinate(
+    dataset: netCDF4.Dataset,
+    coordinates: list[str],
+    criteria: dict[str, tuple[str, ...]],
+    datetime_like: bool = False,
+) -> netCDF4.Variable | None:
+    matches = []
+    for name in coordinates:
+        variable = dataset.variables[name]
+        if any(getattr(variable, key, None) in values for key, values in criteria.items()) or (
+            datetime_like and _is_datetime_like(variable)
+        ):
+            matches.append(variable)
+    # Ambiguous coordinates are ignored, the same as when a single coordinate is requested from cf_xarray
+    return matches[0] if len(matches) == 1 else None
+
+
+def _coordinate_names(dataset: netCDF4.Dataset) -> list[str]:
+    """
+    Get the names of the variables that xarray treats as coordinates
+
+    These are the dimension coordinates and any variables referenced in a `coordinates` attribute.
+    """
+    names = {name for name, variable in dataset.variables.items() if variable.dimensions == (name,)}
+    for owner in [dataset, *dataset.variables.values()]:
+        referenced = getattr(owner, "coordinates", None)
+        if isinstance(referenced, str):
+            names.update(name for name in referenced.split() if name in dataset.variables)
+    return sorted(names)
+
+
+def _read_header(file: str) -> dict[str, Any]:
+    """
+    Read the metadata of a CMIP6 file without loading any data variables
+
+    Only the attributes, the dimension sizes and the first and last values of the time coordinate are read.
+
+    Raises
+    ------
+    _UnsupportedHeaderError
+        The file uses a structure that isn't handled by this reader
+    """
+    with netCDF4.Dataset(file, mode="r") as dataset:
+        info: dict[str, Any] = {key: dataset.__dict__.get(key) for key in COMPLETE_KEYS}
+        info["member_id"] = info["variant_label"]
+
+        variable_id = info["variable_id"]
+        if variable_id:  # pragma: no branch
+            attrs = dataset.variables[variable_id].__dict__
+            units = attrs.get("units")
+            if isinstance(units, str) and (" since " in units or units in TIMEDELTA_UNITS):
+                # xarray decodes these variables and moves the units out of the attributes
+                raise _UnsupportedHeaderError(f"Variable {variable_id} has time units")
+            for attr in ["standard_name", "long_name", "units"]:
+                info[attr] = attrs.get(attr)
+
+        coordinates = _coordinate_names(dataset)
+
+        vertical = _find_coordinate(dataset, coordinates, VERTICAL_CRITERIA)
+        info["vertical_levels"] = int(vertical.size) if vertical is not None else 1
+
+        start_time, end_time = None, None
+        time = _find_coordinate(dataset, coordinates, TIME_CRITERIA, datetime_like=True)
+        if time is not None and _is_datetime_like(time):
+            if time.ndim != 1 or time.size == 0:
+                raise _UnsupportedHeaderError(f"Unexpected shape {time.shape} for the time coordinate")
+            values = np.ma.stack([time[0], time[-1]])
+            if np.ma.is_masked(values):
+                raise _UnsupportedHeaderError("Missing time values")
+            start, end = cftime.num2date(
+                values.data,
+                time.units,
+                getattr(time, "calendar", "standard"),
+                only_use_cftime_datetimes=True,
+            )
+            start_time, end_time = str(start), str(end)
+        elif time is not None:
+            raise _UnsupportedHeaderError(f"Time coordinate {time.name} can't be decoded")
+
+    info["start_time"] = start_time
+    info["end_time"] = end_time
+    return info
+
+
+def _read_dataset(file: str) -> dict[str, Any]:
+    """
+    Read the metadata of a CMIP6 file by opening it with xarray
+
+    This is slower than `_read_header`, but handles any file that xarray can decode.
+    """
+    with xr.open_dataset(file, chunks={}, use_cftime=True) as ds:
+        info = {key: ds.attrs.get(key) for key in COMPLETE_KEYS}
+        info["member_id"] = info["variant_label"]
+
+        variable_id = info["variable_id"]
+        if variable_id:  # pragma: no branch
+            attrs = ds[variable_id].attrs
+            for attr in ["standard_name", "long_name", "units"]:
+                info[attr] = attrs.get(attr)
+
+        # Set the default of # of vertical levels to 1
+        vertical_levels = 1
+        start_time, end_time = None, None
+        try:
+            vertical_levels = ds[ds.cf["vertical"].name].size
+        except (KeyError, AttributeError, ValueError):
+            ...
+
+        try:
+            start_time, end_time = str(ds.cf["T"][0].data), str(ds.cf["T"][-1].data)
+        except (KeyError, AttributeError, ValueError):
+            ...
+        info["vertical_levels"] = vertical_levels
+        info["start_time"] = start_time
+        info["end_time"] = end_time
+    return info
+
+
+def _finalise_complete_info(file: str, info: dict[str, Any]) -> dict[str, Any]:
+    init_year = None
+    if info.get("sub_experiment_id"):  # pragma: no branch
+        init_year = extract_attr_with_regex(info["sub_experiment_id"], r"\d{4}")
+        if init_year:  # pragma: no cover
+            init_year = int(init_year)
+    start_time, end_time = info.pop("start_time"), info.pop("end_time")
+    info["init_year"] = init_year
+    info["start_time"] = start_time
+    info["end_time"] = end_time
+    if not (start_time and end_time):
+        info["time_range"] = None
+    else:
+        info["time_range"] = f"{start_time}-{end_time}"
+    info["path"] = str(file)
+    info["version"] = extract_attr_with_regex(str(file), regex=r"v\d{4}\d{2}\d{2}|v\d{1}") or "v0"
+
+    # Mark the dataset as finalised
+    # This is used to indicate that the dataset has been fully parsed and is ready for use
+    info["finalised"] = True
+
+    return info
+
+
 def parse_cmip6_complete(file: str, **kwargs: Any) -> dict[str, Any]:
     """
     Complete parser for CMIP6 files
 
-    This parser loads each file and extracts all available metadata.
+    This parser reads the header of each file and extracts all available metadata.
+    Only the attributes, dimension sizes and the first and last time values are read from the file.
+    Files that can't be described from the header alone are opened with xarray instead.
 
     For some filesystems this may be slow, as it involves a lot of I/O operations.
 
@@ -65,86 +310,50 @@ def parse_cmip6_complete(file: str, **kwargs: Any) -> dict[str, Any]:
     :
         Dictionary with extracted metadata
     """
-    keys = sorted(
-        {
-            "activity_id",
-            "branch_method",
-            "branch_time_in_child",
-            "branch_time_in_parent",
-            "experiment",
-            "experiment_id",
-            "frequency",
-            "grid",
-            "grid_label",
-            "institution_id",
-            "nominal_resolution",
-            "parent_activity_id",
-            "parent_experiment_id",
-            "parent_source_id",
-            "parent_time_units",
-            "parent_variant_label",
-            "realm",
-            "product",
-            "source_id",
-            "source_type",
-            "sub_experiment",
-            "sub_experiment_id",
-            "table_id",
-            "variable_id",
-            "variant_label",
-        }
-    )
-
     try:
-        with xr.open_dataset(file, chunks={}, use_cftime=True) as ds:
-            info = {key: ds.attrs.get(key) for key in keys}
-            info["member_id"] = info["variant_label"]
-
-            variable_id = info["variable_id"]
-            if variable_id:  # pragma: no branch
-                attrs = ds[variable_id].attrs
-                for attr in ["standard_name", "long_name", "units"]:
-                    info[attr] = attrs.get(attr)
-
-            # Set the default of # of vertical levels to 1
-            vertical_levels = 1
-            start_time, end_time = None, None
-            init_year = None
-            try:
-                vertical_levels = ds[ds.cf["vertical"].name].size
-            except (KeyError, AttributeError, ValueError):
-                ...
-
-            try:
-                start_time, end_time = str(ds.cf["T"][0].data), str(ds.cf["T"][-1].data)
-            except (KeyError, AttributeError, ValueError):
-                ...
-            if info.get("sub_experiment_id"):  # pragma: no branch
-                init_year = extract_attr_with_regex(info["sub_experiment_id"], r"\d{4}")
-                if init_year:  # pragma: no cover
-                    init_year = int(init_year)
-            info["vertical_levels"] = vertical_levels
-            info["init_year"] = init_year
-            info["start_time"] = start_time
-            info["end_time"] = end_time
-            if not (start_time and end_time):
-                info["time_range"] = None
-            else:
-                info["time_range"] = f"{start_time}-{end_time}"
-        info["path"] = str(file)
-        info["version"] = extract_attr_with_regex(str(file), regex=r"v\d{4}\d{2}\d{2}|v\d{1}") or "v0"
-
-        # Mark the dataset as finalised
-        # This is used to indicate that the dataset has been fully parsed and is ready for use
-        info["finalised"] = True
+        try:
+            info = _read_header(file)
+        except Exception as exc:
+            logger.debug(f"Unable to read the header of {file}, falling back to xarray: {exc}")
+            info = _read_dataset(file)
 
-        return info
+        return _finalise_complete_info(file, info)
 
     except Exception:
         logger.exception(f"Failed to parse {file}")
         return {"INVALID_ASSET": file, "TRACEBACK": traceback.format_exc()}
 
 
+def parse_cmip6_metadata(file: str, metadata: dict[str, Any]) -> dict[str, Any]:
+    """
+    Complete parser for CMIP6 files using metadata that has already been read
+
+    This produces the same output as
+    [parse_cmip6_complete][climate_ref.datasets.cmip6_parsers.parse_cmip6_complete]
+    without opening the file, e.g. when the metadata is provided by a manifest.
+
+    Parameters
+    ----------
+    file
+        File that the metadata describes
+    metadata
+        The values of `HEADER_KEYS` for the file, with None for missing values
+
+    Returns
+    -------
+    :
+        Dictionary with extracted metadata
+    """
+    info = {key: metadata[key] for key in HEADER_KEYS}
+    info["vertical_levels"] = int(info["vertical_levels"]) if info["vertical_levels"] is not None else 1
+    # The time bounds are stored as strings, the same as when they are read from the file
+    for key in ["start_time", "end_time"]:
+        if info[key] is not None:
+            info[key] = str(info[key])
+
+    return _finalise_complete_info(file, info)
+
+
 def parse_cmip6_drs(file: str, **kwargs: Any) -> dict[str, Any]:
     """
     DRS parser for CMIP6 files
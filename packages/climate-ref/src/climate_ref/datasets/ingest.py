@@ -0,0 +1,359 @@
+"""
+Pipelined ingestion of datasets
+
+Ingesting a large collection of files is split into stages that run concurrently:
+
+* the candidate files are found by scanning directories (or read from a manifest)
+  and grouped into batches of complete datasets as they are found,
+* the batches are parsed by a pool of processes as they are submitted and
+* each parsed batch is validated and registered by a single writer in the main process.
+
+Only a bounded number of batches are in flight at any time,
+so the memory used doesn't grow with the number of files being ingested
+and the database writes overlap with the parsing of the remaining files.
+"""
+
+import concurrent.futures
+import multiprocessing
+from collections.abc import Callable, Collection, Iterable, Iterator
+from itertools import groupby
+from pathlib import Path
+
+import pandas as pd
+from attrs import define
+from loguru import logger
+
+from climate_ref.config import Config
+from climate_ref.database import Database, ModelState
+from climate_ref.datasets.base import DatasetAdapter, DatasetRegistrationResult
+from climate_ref.datasets.manifest import add_fingerprints
+from climate_ref.datasets.utils import FileFilter
+from climate_ref_core.logging import initialise_logging
+
+INGEST_BATCH_SIZE = 1_000
+"""
+Target number of files parsed in a single task
+
+Batches only contain complete datasets, so a batch may contain more files than this.
+"""
+
+_worker_adapter: DatasetAdapter | None = None
+
+
+@define
+class IngestStats:
+    """
+    Counts of the changes made while ingesting datasets
+    """
+
+    created_datasets: int = 0
+    updated_datasets: int = 0
+    unchanged_datasets: int = 0
+    created_files: int = 0
+    updated_files: int = 0
+    removed_files: int = 0
+    unchanged_files: int = 0
+
+    def record(self, result: DatasetRegistrationResult) -> None:
+        """
+        Record the result of registering a dataset
+        """
+        if result.dataset_state == ModelState.CREATED:
+            self.created_datasets += 1
+        elif result.dataset_state == ModelState.UPDATED:
+            self.updated_datasets += 1
+        else:
+            self.unchanged_datasets += 1
+        self.created_files += len(result.files_added)
+        self.updated_files += len(result.files_updated)
+        self.removed_files += len(result.files_removed)
+        self.unchanged_files += len(result.files_unchanged)
+
+    def __str__(self) -> str:
+        return (
+            f"Datasets: {self.created_datasets}/{self.updated_datasets}/{self.unchanged_datasets}"
+            " (created/updated/unchanged), "
+            f"Files: "
+            f"{self.created_files}/{self.updated_files}/{self.removed_files}/{self.unchanged_files}"
+            " (created/updated/removed/unchanged)"
+        )
+
+
+def batch_files(files: Iterable[str], batch_size: int = INGEST_BATCH_SIZE) -> Iterator[list[str]]:
+    """
+    Split files into batches that each contain complete datasets
+
+    The files of a dataset are stored in the same directory,
+    so the files in a directory are never split across batches.
+
+    Parameters
+    ----------
+    files
+        Files to split
+
+        A collection of files (e.g. a list) is sorted first.
+        Other iterables, such as the output of
+        [iter_files][climate_ref.datasets.base.DatasetAdapter.iter_files],
+        are batched as the files are produced,
+        so the files of each directory must be contiguous.
+    batch_size
+        Target number of files in a batch
+
+    Yields
+    ------
+    :
+        Batches of files
+    """
+    if isinstance(files, Collection):
+        files = sorted(files)
+
+    batch: list[str] = []
+    for _, directory_files in groupby(files, key=lambda file: Path(file).parent):
+        batch.extend(directory_files)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def batch_manifest(manifest: pd.DataFrame, batch_size: int = INGEST_BATCH_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Split the rows of a manifest into batches that each contain complete datasets
+
+    See [batch_files][climate_ref.datasets.ingest.batch_files].
+
+    Parameters
+    ----------
+    manifest
+        Manifest to split (see [read_manifest][climate_ref.datasets.manifest.read_manifest])
+    batch_size
+        Target number of files in a batch
+
+    Yields
+    ------
+    :
+        Batches of rows from the manifest
+    """
+    rows = manifest.set_index("path", drop=False)
+    for files in batch_files(rows.index, batch_size):
+        yield rows.loc[files].reset_index(drop=True)
+
+
+def _filter_batches(
+    batches: Iterable[list[str] | pd.DataFrame], file_filter: FileFilter
+) -> Iterator[list[str] | pd.DataFrame]:
+    for batch in batches:
+        selected: list[str] | pd.DataFrame
+        if isinstance(batch, pd.DataFrame):
+            selected = batch[batch["path"].isin(file_filter(batch["path"].tolist()))]
+        else:
+            selected = file_filter(batch)
+        if len(selected):
+            yield selected
+
+
+def _parse(adapter: DatasetAdapter, batch: list[str] | pd.DataFrame) -> pd.DataFrame:
+    if isinstance(batch, pd.DataFrame):
+        return add_fingerprints(adapter.parse_manifest(batch), batch)
+    return adapter.parse_files(batch)
+
+
+def _describe(batch: list[str] | pd.DataFrame) -> str:
+    files = batch["path"].tolist() if isinstance(batch, pd.DataFrame) else batch
+    return f"{len(files)} files in {Path(files[0]).parent}"
+
+
+def _init_ingest_worker(adapter: DatasetAdapter) -> None:  # pragma: no cover
+    """
+    Initialise a process used for parsing files
+
+    The adapter is only transferred once per process rather than for each batch.
+    """
+    global _worker_adapter  # noqa: PLW0603
+    _worker_adapter = adapter
+    if hasattr(_worker_adapter, "n_jobs"):
+        # The files are already being parsed in parallel by the pool
+        _worker_adapter.n_jobs = 1
+
+    try:
+        logger.remove()
+        config = Config.default()
+        initialise_logging(
+            level=config.log_level,
+            format=config.log_format,
+            log_directory=config.paths.log,
+        )
+    except Exception as e:
+        # Don't raise an exception here as that would kill the process pool
+        logger.error(f"Failed to add log handler: {e}")
+
+
+def _parse_in_worker(batch: list[str] | pd.DataFrame) -> pd.DataFrame:  # pragma: no cover
+    if _worker_adapter is None:
+        raise RuntimeError("Ingest worker has not been initialised")
+    return _parse(_worker_adapter, batch)
+
+
+def _parse_batch(adapter: DatasetAdapter, batch: list[str] | pd.DataFrame) -> pd.DataFrame | None:
+    try:
+        return _parse(adapter, batch)
+    except Exception as e:
+        logger.error(f"Error parsing {_describe(batch)}: {e}")
+        return None
+
+
+def parse_datasets(
+    adapter: DatasetAdapter,
+    files: Iterable[str] | pd.DataFrame,
+    n_workers: int = 1,
+    batch_size: int = INGEST_BATCH_SIZE,
+    file_filter: FileFilter | None = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Parse files into data catalogs of complete datasets
+
+    Batches that can't be parsed are logged and skipped.
+
+    Parameters
+    ----------
+    adapter
+        Adapter used to parse the files
+    files
+        Files to parse, or a manifest of the files
+        (see [read_manifest][climate_ref.datasets.manifest.read_manifest]).
+
+        The rows of a manifest are parsed using
+        [parse_manifest][climate_ref.datasets.base.DatasetAdapter.parse_manifest]
+        and the size and modification time of the files are taken from the manifest if available.
+    n_workers
+        Number of processes used to parse the batches in parallel.
+
+        The catalogs are yielded in the order that the batches complete.
+    batch_size
+        Target number of files in each batch
+    file_filter
+        If provided, called with the files in each batch
+        and only the files that it returns are parsed (see `DatasetAdapter.find_changed_files`).
+
+        This is applied as the files are batched,
+        so the files can be discovered, filtered and parsed concurrently.
+
+    Yields
+    ------
+    :
+        Data catalog for each batch of files
+    """
+    batches: Iterable[list[str] | pd.DataFrame]
+    if isinstance(files, pd.DataFrame):
+        batches = batch_manifest(files, batch_size)
+    else:
+        batches = batch_files(files, batch_size)
+    if file_filter is not None:
+        batches = _filter_batches(batches, file_filter)
+
+    if n_workers <= 1:
+        for batch in batches:
+            catalog = _parse_batch(adapter, batch)
+            if catalog is not None:
+                yield catalog
+        return
+
+    pool = concurrent.futures.ProcessPoolExecutor(
+        max_workers=n_workers,
+        initializer=_init_ingest_worker,
+        initargs=(adapter,),
+        # Explicitly set the context to "spawn" to avoid issues with hanging on MacOS
+        mp_context=multiprocessing.get_context("spawn"),
+    )
+    pending: dict[concurrent.futures.Future[pd.DataFrame], list[str] | pd.DataFrame] = {}
+
+    def _completed(
+        futures: Iterable[concurrent.futures.Future[pd.DataFrame]],
+    ) -> Iterator[pd.DataFrame]:
+        for future in futures:
+            batch = pending.pop(future)
+            try:
+                yield future.result()
+            except Exception as e:
+                logger.error(f"Error parsing {_describe(batch)}: {e}")
+
+    try:
+        for batch in batches:
+            pending[pool.submit(_parse_in_worker, batch)] = batch
+            # Limit the number of parsed catalogs that are held in memory
+            if len(pending) >= 2 * n_workers:
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                yield from _completed(done)
+        yield from _completed(concurrent.futures.as_completed(list(pending)))
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
+
+
+def register_datasets(  # noqa: PLR0913
+    adapter: DatasetAdapter,
+    config: Config,
+    db: Database,
+    data_catalogs: Iterable[pd.DataFrame],
+    skip_invalid: bool = True,
+    dry_run: bool = False,
+    on_validated: Callable[[pd.DataFrame], None] | None = None,
+) -> IngestStats:
+    """
+    Validate and register data catalogs as they become available
+
+    This is the single writer of the ingest pipeline.
+    The datasets in each catalog are registered together in a single transaction
+    (see [register_data_catalog][climate_ref.datasets.base.DatasetAdapter.register_data_catalog]).
+
+    Parameters
+    ----------
+    adapter
+        Adapter for the type of the datasets
+    config
+        Configuration object
+    db
+        Database instance
+    data_catalogs
+        Data catalogs containing complete datasets
+    skip_invalid
+        If True, ignore (but log) any datasets that don't pass validation
+    dry_run
+        If True, only log the datasets that would be created
+    on_validated
+        If provided, called with each validated data catalog before it is registered
+
+    Returns
+    -------
+    :
+        Counts of the changes made to the database
+    """
+    stats = IngestStats()
+    dataset_type = adapter.dataset_cls.__mapper_args__["polymorphic_identity"]
+
+    for parsed_catalog in data_catalogs:
+        data_catalog = adapter.validate_data_catalog(parsed_catalog, skip_invalid=skip_invalid)
+        if data_catalog.empty:
+            continue
+
+        logger.info(
+            f"Found {len(data_catalog)} files for {len(data_catalog[adapter.slug_column].unique())} datasets"
+        )
+        if on_validated is not None:
+            on_validated(data_catalog)
+
+        with db.session.begin():
+            if dry_run:
+                for instance_id in data_catalog[adapter.slug_column].unique():
+                    dataset = (
+                        db.session.query(adapter.dataset_cls)
+                        .filter_by(slug=instance_id, dataset_type=dataset_type)
+                        .first()
+                    )
+                    if not dataset:
+                        logger.info(f"Would save dataset {instance_id} to the database")
+            else:
+                for result in adapter.register_data_catalog(config, db, data_catalog):
+                    stats.record(result)
+
+    return stats
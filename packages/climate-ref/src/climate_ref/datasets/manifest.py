@@ -0,0 +1,134 @@
+"""
+Manifests of the files to ingest
+
+Crawling a large archive to find the files to ingest can take hours on a parallel file system,
+and data centres often already maintain lists of the files that they hold
+(e.g. the output of `lfs find`, replication logs or intake-esm catalogs).
+A manifest is a CSV or Parquet file with a row per file which is used in place of crawling a directory.
+
+The manifest must contain a `path` column.
+Relative paths are resolved against the directory containing the manifest.
+The following columns are optional:
+
+* `size`: the size of the file in bytes
+* `mtime_ns` (or `mtime` in seconds since the epoch): the modification time of the file
+
+If both the size and modification time of a file are provided,
+they are used to determine if a file has changed since it was ingested
+without accessing the file.
+Any other columns are treated as metadata about the file,
+which an adapter may use rather than opening the file
+(see [parse_manifest][climate_ref.datasets.base.DatasetAdapter.parse_manifest]).
+
+Reading Parquet manifests requires [pyarrow](https://arrow.apache.org/docs/python/).
+"""
+
+from pathlib import Path
+
+import pandas as pd
+
+from climate_ref.datasets.snapshot import HAS_PYARROW
+
+FINGERPRINT_COLUMNS = ("size", "mtime_ns")
+"""
+Columns containing the size and modification time of each file
+"""
+
+PARQUET_SUFFIXES = (".parquet", ".pq")
+
+
+def read_manifest(path: Path) -> pd.DataFrame:
+    """
+    Read a manifest of the files to ingest
+
+    Parameters
+    ----------
+    path
+        Path to a CSV or Parquet file
+
+    Raises
+    ------
+    ValueError
+        If the manifest can't be read or doesn't contain a `path` column
+
+    Returns
+    -------
+    :
+        A row per unique file with absolute paths
+        and the fingerprint columns (if available) as nullable integers
+    """
+    if path.suffix in PARQUET_SUFFIXES:
+        if not HAS_PYARROW:
+            raise ValueError(f"Reading the Parquet manifest {path} requires pyarrow")
+        manifest = pd.read_parquet(path)
+    else:
+        manifest = pd.read_csv(path)
+
+    if "path" not in manifest.columns:
+        raise ValueError(f"Manifest {path} does not contain a 'path' column")
+
+    directory = path.absolute().parent
+    manifest = manifest[manifest["path"].notna()].copy()
+    manifest["path"] = [str(directory / file) for file in manifest["path"].astype(str)]
+
+    if "mtime_ns" not in manifest.columns and "mtime" in manifest.columns:
+        manifest["mtime_ns"] = (pd.to_numeric(manifest.pop("mtime")) * 1e9).round()
+    for column in FINGERPRINT_COLUMNS:
+        if column in manifest.columns:
+            manifest[column] = pd.to_numeric(manifest[column]).astype("Int64")
+
+    return manifest.drop_duplicates("path").reset_index(drop=True)
+
+
+def manifest_fingerprints(manifest: pd.DataFrame) -> dict[str, tuple[int, int]]:
+    """
+    Get the size and modification time of the files in a manifest
+
+    Returns
+    -------
+    :
+        The size and modification time of each file where both are known
+    """
+    if not set(FINGERPRINT_COLUMNS).issubset(manifest.columns):
+        return {}
+
+    known = manifest[manifest["size"].notna() & manifest["mtime_ns"].notna()]
+    return {
+        path: (int(size), int(mtime_ns))
+        for path, size, mtime_ns in zip(known["path"], known["size"], known["mtime_ns"])
+    }
+
+
+def add_fingerprints(data_catalog: pd.DataFrame, manifest: pd.DataFrame) -> pd.DataFrame:
+    """
+    Add the size and modification time of each file in a manifest to a data catalog
+
+    These are used when registering the files rather than accessing the files again
+    (see [known_fingerprints][climate_ref.datasets.manifest.known_fingerprints]).
+    """
+    if not set(FINGERPRINT_COLUMNS).issubset(manifest.columns) or data_catalog.empty:
+        return data_catalog
+
+    fingerprints = manifest.set_index("path")
+    data_catalog = data_catalog.copy()
+    for column in FINGERPRINT_COLUMNS:
+        data_catalog[column] = data_catalog["path"].astype(str).map(fingerprints[column]).astype("Int64")
+    return data_catalog
+
+
+def known_fingerprints(data_catalog: pd.DataFrame) -> list[tuple[int, int] | None]:
+    """
+    Get the fingerprints that were added to a data catalog from a manifest
+
+    Returns
+    -------
+    :
+        The size and modification time of each file or None if it isn't known
+    """
+    if not set(FINGERPRINT_COLUMNS).issubset(data_catalog.columns):
+        return [None] * len(data_catalog)
+
+    return [
+        (int(size), int(mtime_ns)) if pd.notna(size) and pd.notna(mtime_ns) else None
+        for size, mtime_ns in zip(data_catalog["size"], data_catalog["mtime_ns"])
+    ]
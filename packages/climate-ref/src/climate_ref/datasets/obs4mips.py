@@ -1,16 +1,18 @@
 from __future__ import annotations
 
 import traceback
+from collections.abc import Sequence
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 import xarray as xr
-from ecgtools import Builder
 from loguru import logger
 
+from climate_ref.config import Config
 from climate_ref.datasets.base import DatasetAdapter
-from climate_ref.datasets.cmip6 import _parse_datetime
+from climate_ref.datasets.cmip6 import _parse_datetime, _parse_files
+from climate_ref.datasets.parse_cache import ParseCache
 from climate_ref.models.dataset import Dataset, Obs4MIPsDataset
 
 
@@ -147,35 +149,37 @@ class Obs4MIPsDatasetAdapter(DatasetAdapter):
         "nominal_resolution",
         "grid_label",
     )
+    drs_root = "obs4MIPs"
+    directory_template = (*dataset_id_metadata, version_metadata)
 
-    def __init__(self, n_jobs: int = 1):
+    def __init__(self, n_jobs: int = 1, config: Config | None = None):
         self.n_jobs = n_jobs
+        self.config = config or Config.default()
 
-    def find_local_datasets(self, file_or_directory: Path) -> pd.DataFrame:
+    def parse_files(self, files: Sequence[str]) -> pd.DataFrame:
         """
-        Generate a data catalog from the specified file or directory
+        Generate a data catalog from a set of files
 
         Each dataset may contain multiple files, which are represented as rows in the data catalog.
         Each dataset has a unique identifier, which is in `slug_column`.
 
         Parameters
         ----------
-        file_or_directory
-            File or directory containing the datasets
+        files
+            Files to parse
 
         Returns
         -------
         :
             Data catalog containing the metadata for the dataset
         """
-        builder = Builder(
-            paths=[str(file_or_directory)],
-            depth=10,
-            include_patterns=["*.nc"],
-            joblib_parallel_kwargs={"n_jobs": self.n_jobs},
-        ).build(parsing_func=parse_obs4mips)
-
-        datasets = builder.df
+        datasets = _parse_files(
+            files,
+            parse_obs4mips,
+            self.n_jobs,
+            parse_cache=ParseCache(self.config.paths.cache / "parse_cache.sqlite"),
+        )
+
         if datasets.empty:
             logger.error("No datasets found")
             raise ValueError("No obs4MIPs-compliant datasets found")
@@ -189,15 +193,10 @@ class Obs4MIPsDatasetAdapter(DatasetAdapter):
             *self.dataset_id_metadata,
             self.version_metadata,
         ]
-        datasets["instance_id"] = datasets.apply(
-            lambda row: "obs4MIPs."
-            + ".".join(
-                [
-                    row[item].replace(" ", "") if item == "nominal_resolution" else row[item]
-                    for item in drs_items
-                ]
-            ),
-            axis=1,
-        )
+        facets = [
+            datasets[item].str.replace(" ", "") if item == "nominal_resolution" else datasets[item]
+            for item in drs_items
+        ]
+        datasets["instance_id"] = "obs4MIPs." + facets[0].str.cat(facets[1:], sep=".")
         datasets["finalised"] = True
         return datasets
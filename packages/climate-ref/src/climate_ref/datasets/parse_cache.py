@@ -0,0 +1,159 @@
+"""
+Persistent cache of the metadata parsed from dataset files
+
+Parsing the metadata of a file can require opening the file and reading its header,
+which is slow for large collections of files, particularly on parallel file systems.
+The parsed metadata is stored in a SQLite database alongside the size and modification time of the file
+and the parser that was used.
+Subsequent ingests (including dry runs and ingests into a different database)
+reuse the stored metadata for any files that haven't changed.
+"""
+
+import json
+import sqlite3
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from climate_ref import __version__
+from climate_ref.datasets.base import DatasetParsingFunction
+from climate_ref.datasets.utils import file_fingerprint
+
+PARSER_SCHEMA_VERSION = 1
+"""
+Version of the metadata produced by the parsing functions
+
+This must be incremented whenever the output of any of the parsing functions changes,
+so that metadata parsed by a previous implementation is not reused.
+"""
+
+
+def parser_key(parsing_function: DatasetParsingFunction) -> str:
+    """
+    Get the key that identifies the output of a parsing function
+
+    The version of the package and
+    [PARSER_SCHEMA_VERSION][climate_ref.datasets.parse_cache.PARSER_SCHEMA_VERSION] are included
+    so that the cache is invalidated if the parsing functions change.
+    """
+    name = getattr(parsing_function, "__qualname__", type(parsing_function).__qualname__)
+    return f"{parsing_function.__module__}.{name}:{__version__}:{PARSER_SCHEMA_VERSION}"
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class ParseCache:
+    """
+    Cache of the metadata parsed from dataset files
+
+    The entries are keyed by the path of the file and the parser.
+    An entry is only used if the size and modification time of the file match the stored values.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        connection = sqlite3.connect(self.path, timeout=60)
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS parse_cache ("
+            "path TEXT NOT NULL, parser TEXT NOT NULL, size INTEGER NOT NULL, mtime_ns INTEGER NOT NULL, "
+            "metadata TEXT NOT NULL, PRIMARY KEY (path, parser))"
+        )
+        return connection
+
+    def get(self, files: Sequence[str], parser: str) -> dict[str, dict[str, Any]]:
+        """
+        Get the cached metadata for a set of files
+
+        Parameters
+        ----------
+        files
+            Files to look up
+        parser
+            Key of the parser (see [parser_key][climate_ref.datasets.parse_cache.parser_key])
+
+        Returns
+        -------
+        :
+            The metadata for each of the files that are in the cache and haven't changed
+        """
+        results: dict[str, dict[str, Any]] = {}
+        try:
+            connection = self._connect()
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning(f"Unable to open the parse cache {self.path}: {exc}")
+            return results
+
+        try:
+            # The paths are looked up via a temporary table
+            # to avoid the limit on the number of parameters in a query
+            connection.execute("CREATE TEMP TABLE lookup (path TEXT PRIMARY KEY)")
+            connection.executemany("INSERT OR IGNORE INTO lookup VALUES (?)", ((file,) for file in files))
+            rows = connection.execute(
+                "SELECT path, size, mtime_ns, metadata FROM parse_cache JOIN lookup USING (path) "
+                "WHERE parser = ?",
+                (parser,),
+            )
+            for path, size, mtime_ns, metadata in rows:
+                if file_fingerprint(path) == (size, mtime_ns):
+                    results[path] = json.loads(metadata)
+        except sqlite3.Error as exc:
+            logger.warning(f"Unable to read the parse cache {self.path}: {exc}")
+        finally:
+            connection.close()
+
+        logger.debug(f"Found the metadata for {len(results)} of {len(files)} files in the parse cache")
+        return results
+
+    def put(self, entries: Iterable[tuple[str, dict[str, Any]]], parser: str) -> None:
+        """
+        Store the metadata parsed from a set of files
+
+        Entries for files that couldn't be parsed are not stored.
+
+        Parameters
+        ----------
+        entries
+            The path and the parsed metadata of each file
+        parser
+            Key of the parser (see [parser_key][climate_ref.datasets.parse_cache.parser_key])
+        """
+        rows = []
+        for path, metadata in entries:
+            fingerprint = file_fingerprint(path)
+            if fingerprint is None or "INVALID_ASSET" in metadata:
+                continue
+            try:
+                serialised = json.dumps(metadata, default=_to_json)
+            except (TypeError, ValueError) as exc:
+                logger.debug(f"Not caching the metadata for {path}: {exc}")
+                continue
+            rows.append((path, parser, *fingerprint, serialised))
+
+        if not rows:
+            return
+
+        try:
+            connection = self._connect()
+        except (sqlite3.Error, OSError) as exc:
+            logger.warning(f"Unable to open the parse cache {self.path}: {exc}")
+            return
+
+        try:
+            with connection:
+                connection.executemany("INSERT OR REPLACE INTO parse_cache VALUES (?, ?, ?, ?, ?)", rows)
+        except sqlite3.Error as exc:
+            logger.warning(f"Unable to write to the parse cache {self.path}: {exc}")
+        finally:
+            connection.close()
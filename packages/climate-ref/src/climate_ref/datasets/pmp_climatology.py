@@ -13,3 +13,6 @@ class PMPClimatologyDatasetAdapter(Obs4MIPsDatasetAdapter):
     """
 
     dataset_cls = PMPClimatologyDataset
+    # The directories of the climatologies may not follow the obs4MIPs DRS
+    drs_root = None
+    directory_template = ()
@@ -0,0 +1,192 @@
+"""
+Parallel scanning of directories for dataset files
+
+Listing the contents of a directory on a parallel file system (e.g. Lustre or GPFS)
+requires a round trip to a metadata server, so walking a large archive one directory at a time
+is dominated by latency rather than throughput.
+The directories are instead listed using `os.scandir` by a bounded pool of threads,
+and the files are yielded as each directory is listed
+so that they can be parsed while the rest of the archive is scanned.
+
+Archives that follow a Data Reference Syntax (DRS) store the files of each dataset
+in a directory hierarchy with a level per facet, e.g. `CMIP6/CMIP/<institution_id>/.../<table_id>/...`.
+If include filters are given,
+any directories at a level of the DRS whose names don't match the filter for that facet
+are skipped without being listed.
+"""
+
+import concurrent.futures
+import fnmatch
+import os
+from collections import deque
+from collections.abc import Collection, Iterator, Mapping
+from pathlib import Path
+
+from loguru import logger
+
+SCAN_THREADS = 16
+"""
+Number of directories that are listed concurrently
+"""
+
+SCAN_DEPTH = 10
+"""
+Maximum depth of the directories below the root directory that are scanned
+"""
+
+
+def _drs_level(path: Path, drs_root: str | None) -> int | None:
+    """
+    Get the level of a directory in the DRS
+
+    The directory at the root of the DRS is level 0.
+
+    Returns
+    -------
+    :
+        The level of the directory or None if it isn't inside a directory named `drs_root`
+    """
+    if drs_root is None or drs_root not in path.parts:
+        return None
+    parts = path.parts
+    return len(parts) - 1 - max(index for index, part in enumerate(parts) if part == drs_root)
+
+
+def _is_excluded(
+    name: str,
+    level: int | None,
+    directory_template: tuple[str, ...],
+    include: Mapping[str, Collection[str]],
+) -> bool:
+    if level is None or level >= len(directory_template):
+        return False
+    values = include.get(directory_template[level])
+    return values is not None and name not in values
+
+
+def _child_level(name: str, level: int | None, drs_root: str | None) -> int | None:
+    """
+    Get the level in the DRS of a subdirectory named `name` of a directory at `level`
+    """
+    if level is not None:
+        return level + 1
+    if name == drs_root:
+        return 0
+    return None
+
+
+def _scan_directory(path: str, pattern: str) -> tuple[list[str], list[str]]:
+    """
+    List the subdirectories and the matching files in a directory
+
+    Returns
+    -------
+    :
+        The sorted paths of the subdirectories and of the files
+    """
+    directories: list[str] = []
+    files: list[str] = []
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                try:
+                    if entry.is_dir():
+                        directories.append(entry.path)
+                    elif fnmatch.fnmatch(entry.name, pattern) and entry.is_file():
+                        files.append(entry.path)
+                except OSError:
+                    # The entry may have been removed or be a broken symlink
+                    continue
+    except OSError as exc:
+        logger.warning(f"Unable to scan {path}: {exc}")
+    return sorted(directories), sorted(files)
+
+
+def scan_files(  # noqa: PLR0913
+    file_or_directory: Path,
+    pattern: str = "*.nc",
+    drs_root: str | None = None,
+    directory_template: tuple[str, ...] = (),
+    include: Mapping[str, Collection[str]] | None = None,
+    max_depth: int = SCAN_DEPTH,
+    n_threads: int = SCAN_THREADS,
+) -> Iterator[str]:
+    """
+    Find the files in a directory
+
+    The files in each directory are yielded together as soon as the directory has been listed,
+    so the files of a directory are contiguous and sorted,
+    but the directories are not in a particular order.
+
+    Parameters
+    ----------
+    file_or_directory
+        Directory to scan.
+
+        If this is a file, it is yielded if it matches `pattern`.
+    pattern
+        Glob pattern that the names of the files must match
+    drs_root
+        Name of the directory at the root of the DRS (e.g. `CMIP6`).
+
+        The level of the DRS is unknown for directories that are not inside a directory with this name,
+        so these directories are never skipped.
+    directory_template
+        The facet of each level of the DRS, starting with the directory at the root of the DRS
+        (e.g. `("mip_era", "activity_id", ...)`)
+    include
+        Values of the facets in `directory_template` to include, e.g. `{"table_id": ["Amon", "fx"]}`.
+
+        Directories at the level of the DRS for a facet that don't match any of the values are skipped.
+    max_depth
+        Maximum depth of the directories below `file_or_directory` to scan
+    n_threads
+        Number of directories to list concurrently
+
+    Yields
+    ------
+    :
+        Paths of the files
+    """
+    file_or_directory = Path(file_or_directory)
+    if not file_or_directory.is_dir():
+        if file_or_directory.is_file() and fnmatch.fnmatch(file_or_directory.name, pattern):
+            yield str(file_or_directory)
+        return
+
+    include = include or {}
+    unknown_facets = set(include) - set(directory_template)
+    if unknown_facets:
+        raise ValueError(f"Unable to filter directories by {sorted(unknown_facets)}")
+    root_level = _drs_level(file_or_directory, drs_root)
+    if _is_excluded(file_or_directory.name, root_level, directory_template, include):
+        return
+
+    found_drs = root_level is not None
+    queue: deque[tuple[str, int, int | None]] = deque([(str(file_or_directory), 0, root_level)])
+    running: dict[concurrent.futures.Future[tuple[list[str], list[str]]], tuple[int, int | None]] = {}
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_threads) as pool:
+        while queue or running:
+            # Directories wait in the queue rather than all being submitted to the pool up front
+            while queue and len(running) < 2 * n_threads:
+                path, depth, level = queue.popleft()
+                running[pool.submit(_scan_directory, path, pattern)] = (depth, level)
+
+            done, _ = concurrent.futures.wait(running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                depth, level = running.pop(future)
+                directories, files = future.result()
+                yield from files
+
+                if depth >= max_depth:
+                    continue
+                for directory in directories:
+                    name = os.path.basename(directory)
+                    child_level = _child_level(name, level, drs_root)
+                    found_drs = found_drs or child_level == 0
+                    if not _is_excluded(name, child_level, directory_template, include):
+                        queue.append((directory, depth + 1, child_level))
+
+    if include and not found_drs:
+        logger.warning(f"No {drs_root} directory found in {file_or_directory}, the filters weren't applied")
@@ -0,0 +1,226 @@
+"""
+Persistent snapshots of the data catalog
+
+Building the data catalog from the database requires hydrating an ORM object for every file
+that has been ingested, which dominates the start-up time of `ref solve` for large archives.
+The resulting catalog only changes when datasets are ingested,
+so it is cached on disk as an Arrow IPC file which can be memory-mapped on subsequent loads.
+
+Each snapshot is tagged with a fingerprint of the database state that was used to build it.
+The fingerprint is recalculated using a handful of aggregate queries on every load,
+and a stale snapshot is rebuilt from the database.
+
+Writing snapshots requires [pyarrow](https://arrow.apache.org/docs/python/).
+If it is not available, the catalog is always loaded from the database.
+"""
+
+import datetime
+import functools
+import hashlib
+import importlib.util
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, cast
+
+import pandas as pd
+from loguru import logger
+from sqlalchemy import func, select
+
+from climate_ref.database import Database, _get_database_revision
+from climate_ref.models.dataset import Dataset, DatasetFile
+
+if TYPE_CHECKING:
+    from climate_ref.datasets.base import DatasetAdapter
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+SNAPSHOT_FORMAT_VERSION = 2
+"""
+Version of the snapshot format
+
+Increment this if the structure of the snapshot changes to invalidate any existing snapshots.
+"""
+
+SNAPSHOT_SETTLE_TIME = datetime.timedelta(seconds=2)
+"""
+Minimum age of the most recent dataset modification before a snapshot is written
+
+Some databases (e.g. SQLite) only store timestamps with a resolution of a second.
+A dataset modified in the same second as a snapshot is created would not change the fingerprint,
+so snapshots are not written until the database has been quiet for a short period.
+"""
+
+_FINGERPRINT_METADATA_KEY = b"climate_ref.fingerprint"
+
+
+@functools.cache
+def _log_missing_pyarrow() -> None:
+    logger.info("Catalog snapshots are disabled because pyarrow is not installed")
+
+
+def snapshots_enabled() -> bool:
+    """
+    Check if catalog snapshots can be used
+
+    A message is logged the first time this is checked if pyarrow isn't installed.
+
+    Returns
+    -------
+    :
+        True if pyarrow is installed
+    """
+    if not HAS_PYARROW:
+        _log_missing_pyarrow()
+    return HAS_PYARROW
+
+
+def _as_naive(value: Any) -> datetime.datetime | None:
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if value.tzinfo is not None:
+        value = value.replace(tzinfo=None)
+    return value  # type: ignore[no-any-return]
+
+
+def catalog_fingerprint(adapter: "DatasetAdapter", db: Database) -> tuple[str, bool]:
+    """
+    Calculate a fingerprint of the state of the database for a given dataset type
+
+    Any ingestion that adds, removes or modifies a dataset or one of its files will change the fingerprint.
+
+    This should be called within the same transaction that is used to load the catalog.
+
+    Parameters
+    ----------
+    adapter
+        Dataset adapter for the type of datasets in the catalog
+    db
+        Database instance
+
+    Returns
+    -------
+    :
+        The fingerprint and whether the database state has settled,
+        i.e. the most recent modification is older than [SNAPSHOT_SETTLE_TIME][].
+    """
+    dataset_type = adapter.dataset_cls.__mapper_args__["polymorphic_identity"]
+
+    n_datasets, max_dataset_id, latest_update = db.session.execute(
+        select(func.count(Dataset.id), func.max(Dataset.id), func.max(Dataset.updated_at)).where(
+            Dataset.dataset_type == dataset_type
+        )
+    ).one()
+    n_latest = db.session.execute(
+        select(func.count(Dataset.id)).where(
+            Dataset.dataset_type == dataset_type, Dataset.updated_at == latest_update
+        )
+    ).scalar_one()
+    n_files, max_file_id = db.session.execute(
+        select(func.count(DatasetFile.id), func.max(DatasetFile.id))
+        .join(DatasetFile.dataset)
+        .where(Dataset.dataset_type == dataset_type)
+    ).one()
+    now = _as_naive(db.session.execute(select(func.now())).scalar_one())
+
+    latest_update = _as_naive(latest_update)
+    settled = latest_update is None or now is None or latest_update <= now - SNAPSHOT_SETTLE_TIME
+
+    state = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "database": db.url,
+        "revision": _get_database_revision(db.session.connection()),
+        "dataset_type": str(dataset_type.value),
+        "columns": [*adapter.dataset_specific_metadata, *adapter.file_specific_metadata],
+        "n_datasets": n_datasets,
+        "max_dataset_id": max_dataset_id,
+        "latest_update": latest_update.isoformat() if latest_update else None,
+        "n_latest": n_latest,
+        "n_files": n_files,
+        "max_file_id": max_file_id,
+    }
+    fingerprint = hashlib.sha1(json.dumps(state, sort_keys=True).encode(), usedforsecurity=False).hexdigest()
+
+    return fingerprint, settled
+
+
+def read_snapshot(path: Path, fingerprint: str) -> pd.DataFrame | None:
+    """
+    Read a catalog snapshot if it matches the expected fingerprint
+
+    The snapshot is memory-mapped so only the metadata is read if the snapshot is stale.
+
+    Parameters
+    ----------
+    path
+        Path to the snapshot
+    fingerprint
+        Fingerprint of the current state of the database
+
+    Returns
+    -------
+    :
+        The data catalog or None if the snapshot is missing, stale or unreadable
+    """
+    if not HAS_PYARROW or not path.exists():
+        return None
+
+    import pyarrow as pa  # type: ignore # noqa: PLC0415
+    import pyarrow.ipc  # type: ignore # noqa: PLC0415
+
+    try:
+        with pa.memory_map(str(path), "r") as source:
+            reader = pa.ipc.open_file(source)
+            metadata = reader.schema.metadata or {}
+            if metadata.get(_FINGERPRINT_METADATA_KEY) != fingerprint.encode():
+                logger.debug(f"Catalog snapshot {path} is stale")
+                return None
+            table = reader.read_all()
+    except (OSError, pa.ArrowException) as exc:
+        logger.warning(f"Unable to read catalog snapshot {path}: {exc}")
+        return None
+
+    return cast(pd.DataFrame, table.to_pandas())
+
+
+def write_snapshot(path: Path, catalog: pd.DataFrame, fingerprint: str) -> None:
+    """
+    Write a catalog snapshot
+
+    The snapshot is written to a temporary file and then moved into place,
+    so concurrent readers never see a partially written snapshot.
+    Any failures are logged and otherwise ignored as the snapshot is only a cache.
+
+    Parameters
+    ----------
+    path
+        Path to write the snapshot to
+    catalog
+        Data catalog
+    fingerprint
+        Fingerprint of the state of the database used to build the catalog
+    """
+    if not HAS_PYARROW:
+        return
+
+    import pyarrow as pa  # noqa: PLC0415
+    import pyarrow.ipc  # noqa: PLC0415
+
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        table = pa.Table.from_pandas(catalog, preserve_index=True)
+        table = table.replace_schema_metadata(
+            {**(table.schema.metadata or {}), _FINGERPRINT_METADATA_KEY: fingerprint.encode()}
+        )
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with pa.OSFile(str(tmp_path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp_path, path)
+    except (OSError, pa.ArrowException) as exc:
+        logger.warning(f"Unable to write catalog snapshot {path}: {exc}")
+        tmp_path.unlink(missing_ok=True)
+    else:
+        logger.debug(f"Wrote catalog snapshot to {path}")
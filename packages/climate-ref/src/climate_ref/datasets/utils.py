@@ -1,5 +1,12 @@
+import os
+from collections.abc import Callable
 from pathlib import Path
 
+FileFilter = Callable[[list[str]], list[str]]
+"""
+Function that selects which of the candidate files found when crawling a directory should be parsed
+"""
+
 
 def validate_path(raw_path: str) -> Path:
     """
@@ -14,3 +21,23 @@ def validate_path(raw_path: str) -> Path:
         raise ValueError(f"Path {prefix} must be absolute")
 
     return prefix
+
+
+def file_fingerprint(path: str | Path) -> tuple[int, int] | None:
+    """
+    Get the size and modification time of a file
+
+    This is used to determine if a file has changed since it was registered
+    without opening the file.
+
+    Returns
+    -------
+    :
+        The size in bytes and the modification time in nanoseconds,
+        or None if the file can't be accessed
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
@@ -1,7 +1,9 @@
 import concurrent.futures
 import multiprocessing
+import queue
 import time
-from concurrent.futures import Future, ProcessPoolExecutor
+from collections.abc import Sequence
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
 from typing import Any
 
 from attrs import define
@@ -15,8 +17,36 @@ from climate_ref_core.diagnostics import ExecutionDefinition, ExecutionResult
 from climate_ref_core.exceptions import ExecutionError
 from climate_ref_core.executor import execute_locally
 from climate_ref_core.logging import initialise_logging
+from climate_ref_core.pycmec.controlled_vocabulary import CV
+
+from .result_handling import (
+    PreparedExecutionResult,
+    apply_execution_result,
+    handle_execution_result,
+    prepare_execution_result,
+)
+
+RESULT_THREADS = 4
+"""
+Default number of threads used to publish the outputs of completed executions
+"""
+
+RESULT_BATCH_SIZE = 50
+"""
+Default maximum number of completed executions that are written to the database in a single transaction
+"""
+
+
+def _log_failure(result: ExecutionResult, execution: Execution | None) -> None:
+    if execution is not None:  # pragma: no branch
+        info_msg = (
+            f"\nAdditional information about this execution can be viewed using: "
+            f"ref executions inspect {execution.execution_group_id}"
+        )
+    else:
+        info_msg = ""
 
-from .result_handling import handle_execution_result
+    logger.exception(f"Error running {result.definition.execution_slug()}. {info_msg}")
 
 
 def process_result(
@@ -39,15 +69,7 @@ def process_result(
         A database model representing the execution of the diagnostic.
     """
     if not result.successful:
-        if execution is not None:  # pragma: no branch
-            info_msg = (
-                f"\nAdditional information about this execution can be viewed using: "
-                f"ref executions inspect {execution.execution_group_id}"
-            )
-        else:
-            info_msg = ""
-
-        logger.exception(f"Error running {result.definition.execution_slug()}. {info_msg}")
+        _log_failure(result, execution)
 
     if execution:
         handle_execution_result(config, database, execution, result)
@@ -62,6 +84,16 @@ class ExecutionFuture:
     future: Future[ExecutionResult]
     definition: ExecutionDefinition
     execution_id: int | None = None
+    processed: bool = False
+
+    @property
+    def failed(self) -> bool:
+        """
+        Whether the execution failed to run
+
+        This must only be checked once the future is done.
+        """
+        return self.future.cancelled() or self.future.exception() is not None
 
 
 def _process_initialiser() -> None:  # pragma: no cover
@@ -98,18 +130,27 @@ class LocalExecutor:
     This performs the diagnostic executions in parallel using different processes.
     The maximum number of processes is determined by the `n` parameter and default to the number of CPUs.
 
+    The results of the executions are processed in the main process as they complete.
+    Any results that have completed are processed each time a new execution is submitted,
+    so that the outputs are published while the remaining executions are still being solved,
+    and the rest are processed by [join][climate_ref.executor.local.LocalExecutor.join].
+    The outputs of the completed executions are published by a pool of `n_result_threads` threads
+    and then written to the database in batches of up to `result_batch_size` executions per transaction.
+
     This executor is the default executor and is used when no other executor is specified.
     """
 
     name = "local"
 
-    def __init__(
+    def __init__(  # noqa: PLR0913
         self,
         *,
         database: Database | None = None,
         config: Config | None = None,
         n: int | None = None,
         pool: concurrent.futures.Executor | None = None,
+        n_result_threads: int = RESULT_THREADS,
+        result_batch_size: int = RESULT_BATCH_SIZE,
         **kwargs: Any,
     ) -> None:
         if config is None:
@@ -130,7 +171,15 @@ class LocalExecutor:
                 # Explicitly set the context to "spawn" to avoid issues with hanging on MacOS
                 mp_context=multiprocessing.get_context("spawn"),
             )
+        self.n_result_threads = n_result_threads
+        self.result_batch_size = result_batch_size
+        # Created when the first results are processed and shut down by join
+        self._result_pool: ThreadPoolExecutor | None = None
+        self._cv: CV | None = None
+
         self._results: list[ExecutionFuture] = []
+        # Filled by the callbacks of the futures as they complete
+        self._completed: queue.SimpleQueue[ExecutionFuture] = queue.SimpleQueue()
 
     def run(
         self,
@@ -147,6 +196,9 @@ class LocalExecutor:
         execution
             A database model representing the execution of the diagnostic.
             If provided, the result will be updated in the database when completed.
+
+            The results of any executions that have already completed are written
+            in their own transactions, so the database session must not be in a transaction.
         """
         # Submit the execution to the process pool
         # and track the future so we can wait for it to complete
@@ -155,19 +207,147 @@ class LocalExecutor:
             definition=definition,
             log_level=self.config.log_level,
         )
-        self._results.append(
-            ExecutionFuture(
-                future=future,
-                definition=definition,
-                execution_id=execution.id if execution else None,
-            )
+        result = ExecutionFuture(
+            future=future,
+            definition=definition,
+            execution_id=execution.id if execution else None,
         )
+        self._results.append(result)
+        future.add_done_callback(lambda _: self._completed.put(result))
+
+        self._process_completed()
+
+    def _process_completed(self) -> None:
+        """
+        Process the results of any executions that have completed without waiting
+
+        Executions that failed to run, or whose results couldn't be processed,
+        are left for `join` to raise.
+        Results that have already been processed by `join` are skipped.
+        """
+        completed = []
+        while True:
+            try:
+                result = self._completed.get_nowait()
+            except queue.Empty:
+                break
+            if not (result.processed or result.failed):
+                completed.append(result)
+
+        for start in range(0, len(completed), self.result_batch_size):
+            self._process_batch(completed[start : start + self.result_batch_size])
+        for result in completed:
+            if result.processed:
+                self._results.remove(result)
+
+    def _load_cv(self) -> CV:
+        # The controlled vocabulary is shared by the results rather than loaded for each execution
+        if self._cv is None:
+            self._cv = CV.load_from_file(self.config.paths.dimensions_cv)
+        return self._cv
+
+    def _process(self, results: Sequence[ExecutionFuture]) -> None:
+        """
+        Process the results of completed executions in the main process
+
+        The outputs of the executions are published concurrently
+        and the results are written to the database in batches.
+
+        Raises
+        ------
+        ExecutionError
+            If any of the executions failed to run.
+
+            The results of the other executions are processed first.
+        """
+        failed = [result for result in results if result.failed]
+        completed = [result for result in results if not result.failed]
+
+        errors = [
+            self._process_batch(completed[start : start + self.result_batch_size])
+            for start in range(0, len(completed), self.result_batch_size)
+        ]
+
+        if failed:
+            # Something went wrong when attempting to run the execution
+            # This is likely a failure in the execution itself not the diagnostic
+            result = failed[0]
+            exc = result.future.exception() if not result.future.cancelled() else None
+            raise ExecutionError(f"Failed to execute {result.definition.execution_slug()!r}") from exc
+        for error in errors:
+            if error is not None:
+                raise error
+
+    def _process_batch(self, results: Sequence[ExecutionFuture]) -> Exception | None:
+        """
+        Write the results of a batch of executions that ran to the database
+
+        Returns
+        -------
+        :
+            The first error raised when publishing the outputs of an execution, if any.
+
+            The results of the other executions in the batch are still written
+            and the executions with errors are left unprocessed.
+        """
+        if self._result_pool is None:
+            self._result_pool = ThreadPoolExecutor(
+                max_workers=self.n_result_threads, thread_name_prefix="ref-result"
+            )
+
+        # Each batch of results is committed in its own transaction
+        session = self.database.session
+        with session.begin():
+            executions = [
+                session.get(Execution, result.execution_id) if result.execution_id else None
+                for result in results
+            ]
+
+            # Publish the outputs in the thread pool while the database is only accessed by this thread
+            prepared: list[Future[PreparedExecutionResult] | None] = []
+            for result, execution in zip(results, executions):
+                execution_result = result.future.result(timeout=0)
+                assert isinstance(execution_result, ExecutionResult), (
+                    "Execution result should be of type ExecutionResult"
+                )
+                if not execution_result.successful:
+                    _log_failure(execution_result, execution)
+
+                prepared.append(
+                    self._result_pool.submit(
+                        prepare_execution_result,
+                        self.config,
+                        execution.output_fragment,
+                        execution_result,
+                        self._load_cv() if execution_result.successful else None,
+                    )
+                    if execution is not None
+                    else None
+                )
+
+            error = None
+            written: list[ExecutionFuture] = []
+            for result, execution, preparing in zip(results, executions, prepared):
+                if execution is not None and preparing is not None:
+                    try:
+                        prepared_result = preparing.result()
+                    except Exception as exc:
+                        error = error or exc
+                        continue
+                    apply_execution_result(self.database, execution, prepared_result)
+                written.append(result)
+
+        for result in written:
+            result.processed = True
+            logger.debug(f"Execution completed: {result}")
+        return error
 
     def join(self, timeout: float) -> None:
         """
         Wait for all diagnostics to finish
 
         This will block until all diagnostics have completed or the timeout is reached.
+        The results are processed as the executions complete.
         If the timeout is reached, the method will return and raise an exception.
 
         Parameters
@@ -180,62 +360,36 @@ class LocalExecutor:
         TimeoutError
             If the timeout is reached
         """
-        start_time = time.time()
-        refresh_time = 0.5  # Time to wait between checking for completed tasks in seconds
-
-        results = self._results
-        t = tqdm(total=len(results), desc="Waiting for executions to complete", unit="execution")
+        deadline = time.monotonic() + timeout
+        pending = {result.future: result for result in self._results if not result.processed}
+        t = tqdm(total=len(pending), desc="Waiting for executions to complete", unit="execution")
 
         try:
-            while results:
-                # Iterate over a copy of the list and remove finished tasks
-                for result in results[:]:
-                    if result.future.done():
-                        try:
-                            execution_result = result.future.result(timeout=0)
-                        except Exception as e:
-                            # Something went wrong when attempting to run the execution
-                            # This is likely a failure in the execution itself not the diagnostic
-                            raise ExecutionError(
-                                f"Failed to execute {result.definition.execution_slug()!r}"
-                            ) from e
-
-                        assert execution_result is not None, "Execution result should not be None"
-                        assert isinstance(execution_result, ExecutionResult), (
-                            "Execution result should be of type ExecutionResult"
-                        )
-
-                        # Process the result in the main process
-                        # The results should be committed after each execution
-                        with self.database.session.begin():
-                            execution = (
-                                self.database.session.get(Execution, result.execution_id)
-                                if result.execution_id
-                                else None
-                            )
-                            process_result(self.config, self.database, result.future.result(), execution)
-                        logger.debug(f"Execution completed: {result}")
-                        t.update(n=1)
-                        results.remove(result)
-
-                # Break early to avoid waiting for one more sleep cycle
-                if len(results) == 0:
-                    break
-
-                elapsed_time = time.time() - start_time
-
-                if elapsed_time > timeout:
-                    for result in results:
+            while pending:
+                done, _ = concurrent.futures.wait(
+                    pending,
+                    timeout=max(deadline - time.monotonic(), 0),
+                    return_when=concurrent.futures.FIRST_COMPLETED,
+                )
+                if not done:
+                    for result in pending.values():
                         logger.warning(
                             f"Execution {result.definition.execution_slug()} "
-                            f"did not complete within the timeout"
+                            "did not complete within the timeout"
                         )
                     self.pool.shutdown(wait=False, cancel_futures=True)
                     raise TimeoutError("Not all tasks completed within the specified timeout")
 
-                # Wait for a short time before checking for completed executions
-                time.sleep(refresh_time)
+                # Any executions that complete while this batch is processed are processed together
+                self._process([pending[future] for future in done])
+                for future in done:
+                    del pending[future]
+                t.update(n=len(done))
         finally:
+            self._results = [result for result in pending.values() if not result.processed]
             t.close()
+            if self._result_pool is not None:
+                self._result_pool.shutdown(wait=True)
+                self._result_pool = None
 
         logger.info("All executions completed successfully")
@@ -11,8 +11,9 @@ This is useful for local testing and debugging.
 
 import pathlib
 import shutil
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Any
 
+from attrs import define, field
 from loguru import logger
 from sqlalchemy import insert
 
@@ -66,14 +67,45 @@ def _copy_file_to_results(
     shutil.copy(input_directory / filename, output_filename)
 
 
-def _process_execution_scalar(
-    database: Database,
-    result: "ExecutionResult",
-    execution: Execution,
-    cv: CV,
-) -> None:
+@define
+class PreparedExecutionResult:
+    """
+    The result of an execution that has been published to the results directory
+
+    This contains everything that is needed to update the database with the result,
+    but it is created without accessing the database
+    so that the results of several executions can be prepared concurrently.
+    """
+
+    result: ExecutionResult
+    """
+    The result of the execution
+    """
+
+    log_copied: bool = True
+    """
+    Whether the log file of the execution was copied to the results directory
+    """
+
+    outputs: list[tuple[ResultOutputType, str, str, OutputDict]] = field(factory=list)
+    """
+    The type, short name, relative filename and description of each output that was copied
+    """
+
+    scalar_values: list[dict[str, Any]] = field(factory=list)
+    """
+    The scalar values to insert, without the execution ID
+    """
+
+    series_values: list[dict[str, Any]] = field(factory=list)
+    """
+    The series values to insert, without the execution ID
     """
-    Process the scalar values from the execution result and store them in the database
+
+
+def _load_execution_scalars(result: ExecutionResult, cv: CV) -> list[dict[str, Any]]:
+    """
+    Load the scalar values from the metric bundle of an execution
 
     This also validates the scalar values against the controlled vocabulary
     """
@@ -88,41 +120,30 @@ def _process_execution_scalar(
         logger.exception("Diagnostic values do not conform with the controlled vocabulary")
         # execution.mark_failed()
 
-    # Perform a bulk insert of scalar values
     # The current implementation will swallow the exception, but display a log message
     try:
-        scalar_values = [
+        return [
             {
-                "execution_id": execution.id,
-                "value": result.value,
-                "attributes": result.attributes,
-                **result.dimensions,
+                "value": metric_result.value,
+                "attributes": metric_result.attributes,
+                **metric_result.dimensions,
             }
-            for result in cmec_metric_bundle.iter_results()
+            for metric_result in cmec_metric_bundle.iter_results()
         ]
-        logger.debug(f"Ingesting {len(scalar_values)} scalar values for execution {execution.id}")
-        if scalar_values:
-            # Perform this in a nested transaction to rollback if something goes wrong
-            # We will lose the metric values for a given execution, but not the whole execution
-            with database.session.begin_nested():
-                database.session.execute(
-                    insert(ScalarMetricValue),
-                    scalar_values,
-                )
     # This is a broad exception catch to ensure we log any issues
     except Exception:
-        logger.exception("Something went wrong when ingesting diagnostic values")
+        logger.exception("Something went wrong when ingesting diagnostic scalar values")
+        return []
 
 
-def _process_execution_series(
+def _load_execution_series(
     config: "Config",
-    database: Database,
-    result: "ExecutionResult",
-    execution: Execution,
+    output_fragment: str,
+    result: ExecutionResult,
     cv: CV,
-) -> None:
+) -> list[dict[str, Any]]:
     """
-    Process the series values from the execution result and store them in the database
+    Load the series values from the execution result
 
     This also copies the series values file from the scratch directory to the results directory
     and validates the series values against the controlled vocabulary.
@@ -132,7 +153,7 @@ def _process_execution_series(
     _copy_file_to_results(
         config.paths.scratch,
         config.paths.results,
-        execution.output_fragment,
+        output_fragment,
         result.series_filename,
     )
 
@@ -147,11 +168,9 @@ def _process_execution_series(
         logger.exception("Diagnostic values do not conform with the controlled vocabulary")
         # execution.mark_failed()
 
-    # Perform a bulk insert of series values
     try:
-        series_values_content = [
+        return [
             {
-                "execution_id": execution.id,
                 "values": series_result.values,
                 "attributes": series_result.attributes,
                 "index": series_result.index,
@@ -160,95 +179,174 @@ def _process_execution_series(
             }
             for series_result in series_values
         ]
-        logger.debug(f"Ingesting {len(series_values)} series values for execution {execution.id}")
-        if series_values:
-            # Perform this in a nested transaction to rollback if something goes wrong
-            # We will lose the metric values for a given execution, but not the whole execution
-            with database.session.begin_nested():
-                database.session.execute(
-                    insert(SeriesMetricValue),
-                    series_values_content,
-                )
     except Exception:
         logger.exception("Something went wrong when ingesting diagnostic series values")
+        return []
 
 
-def handle_execution_result(
-    config: "Config",
+def _insert_metric_values(
     database: Database,
+    model: type[ScalarMetricValue] | type[SeriesMetricValue],
     execution: Execution,
-    result: "ExecutionResult",
+    values: list[dict[str, Any]],
+    kind: str,
 ) -> None:
     """
-    Handle the result of a diagnostic execution
+    Perform a bulk insert of the metric values of an execution
+
+    The current implementation will swallow the exception, but display a log message
+    """
+    logger.debug(f"Ingesting {len(values)} {kind} values for execution {execution.id}")
+    if not values:
+        return
+
+    try:
+        # Perform this in a nested transaction to rollback if something goes wrong
+        # We will lose the metric values for a given execution, but not the whole execution
+        with database.session.begin_nested():
+            database.session.execute(
+                insert(model),
+                [{"execution_id": execution.id, **value} for value in values],
+            )
+    # This is a broad exception catch to ensure we log any issues
+    except Exception:
+        logger.exception(f"Something went wrong when ingesting diagnostic {kind} values")
 
-    This will update the diagnostic execution result with the output of the diagnostic execution.
-    The output will be copied from the scratch directory to the executions directory.
+
+def prepare_execution_result(
+    config: "Config",
+    output_fragment: str,
+    result: ExecutionResult,
+    cv: CV | None = None,
+) -> PreparedExecutionResult:
+    """
+    Publish the outputs of a diagnostic execution to the results directory
+
+    The outputs are copied from the scratch directory to the executions directory
+    and the metric values are loaded and validated.
+    This doesn't access the database so it is safe to call from multiple threads.
 
     Parameters
     ----------
     config
         The configuration to use
-    database
-        The active database session to use
-    execution
-        The diagnostic execution result DB object to update
+    output_fragment
+        The fragment of the executions directory containing the outputs of the execution
     result
         The result of the diagnostic execution, either successful or failed
+    cv
+        The controlled vocabulary to validate the metric values against.
+
+        If not provided, this is loaded from `config.paths.dimensions_cv`.
+
+    Returns
+    -------
+    :
+        The result that is ready to be written to the database
+        using [apply_execution_result][climate_ref.executor.result_handling.apply_execution_result]
     """
     # Always copy log data to the results directory
     try:
         _copy_file_to_results(
             config.paths.scratch,
             config.paths.results,
-            execution.output_fragment,
+            output_fragment,
             EXECUTION_LOG_FILENAME,
         )
     except FileNotFoundError:
         logger.error(
             f"Could not find log file {EXECUTION_LOG_FILENAME} in scratch directory: {config.paths.scratch}"
         )
-        execution.mark_failed()
-        return
+        return PreparedExecutionResult(result=result, log_copied=False)
 
     if not result.successful or result.metric_bundle_filename is None:
-        logger.error(f"{execution} failed")
-        execution.mark_failed()
-        return
-
-    logger.info(f"{execution} successful")
+        return PreparedExecutionResult(result=result)
 
     _copy_file_to_results(
         config.paths.scratch,
         config.paths.results,
-        execution.output_fragment,
+        output_fragment,
         result.metric_bundle_filename,
     )
 
+    outputs: list[tuple[ResultOutputType, str, str, OutputDict]] = []
     if result.output_bundle_filename:
         _copy_file_to_results(
             config.paths.scratch,
             config.paths.results,
-            execution.output_fragment,
+            output_fragment,
             result.output_bundle_filename,
         )
-        _handle_output_bundle(
+        outputs = _publish_output_bundle(
             config,
-            database,
-            execution,
+            output_fragment,
             result.to_output_path(result.output_bundle_filename),
         )
 
-    cv = CV.load_from_file(config.paths.dimensions_cv)
+    if cv is None:
+        cv = CV.load_from_file(config.paths.dimensions_cv)
 
+    series_values: list[dict[str, Any]] = []
     if result.series_filename:
         # Process the series values if they are present
-        # This will ingest the series values into the database
-        _process_execution_series(config=config, database=database, result=result, execution=execution, cv=cv)
+        series_values = _load_execution_series(config, output_fragment, result, cv)
 
-    # Process the scalar values
-    # This will ingest the scalar values into the database
-    _process_execution_scalar(database=database, result=result, execution=execution, cv=cv)
+    return PreparedExecutionResult(
+        result=result,
+        outputs=outputs,
+        scalar_values=_load_execution_scalars(result, cv),
+        series_values=series_values,
+    )
+
+
+def apply_execution_result(
+    database: Database,
+    execution: Execution,
+    prepared: PreparedExecutionResult,
+) -> None:
+    """
+    Update the database with the result of a diagnostic execution
+
+    Parameters
+    ----------
+    database
+        The active database session to use
+    execution
+        The diagnostic execution result DB object to update
+    prepared
+        The result of the diagnostic execution
+        after it has been published by
+        [prepare_execution_result][climate_ref.executor.result_handling.prepare_execution_result]
+    """
+    result = prepared.result
+    if not prepared.log_copied:
+        execution.mark_failed()
+        return
+
+    if not result.successful or result.metric_bundle_filename is None:
+        logger.error(f"{execution} failed")
+        execution.mark_failed()
+        return
+
+    logger.info(f"{execution} successful")
+
+    # Track the registered outputs in the db
+    for output_type, short_name, filename, output_info in prepared.outputs:
+        database.session.add(
+            ExecutionOutput.build(
+                execution_id=execution.id,
+                output_type=output_type,
+                filename=filename,
+                description=output_info.description,
+                short_name=short_name,
+                long_name=output_info.long_name,
+                dimensions=output_info.dimensions or {},
+            )
+        )
+
+    # This will ingest the series and scalar values into the database
+    _insert_metric_values(database, SeriesMetricValue, execution, prepared.series_values, "series")
+    _insert_metric_values(database, ScalarMetricValue, execution, prepared.scalar_values, "scalar")
 
     # TODO: This should check if the result is the most recent for the execution,
     # if so then update the dirty fields
@@ -259,67 +357,65 @@ def handle_execution_result(
     execution.mark_successful(result.as_relative_path(result.metric_bundle_filename))
 
 
-def _handle_output_bundle(
+def handle_execution_result(
     config: "Config",
     database: Database,
     execution: Execution,
-    cmec_output_bundle_filename: pathlib.Path,
+    result: "ExecutionResult",
 ) -> None:
+    """
+    Handle the result of a diagnostic execution
+
+    This will update the diagnostic execution result with the output of the diagnostic execution.
+    The output will be copied from the scratch directory to the executions directory.
+
+    Parameters
+    ----------
+    config
+        The configuration to use
+    database
+        The active database session to use
+    execution
+        The diagnostic execution result DB object to update
+    result
+        The result of the diagnostic execution, either successful or failed
+    """
+    prepared = prepare_execution_result(config, execution.output_fragment, result)
+    apply_execution_result(database, execution, prepared)
+
+
+def _publish_output_bundle(
+    config: "Config",
+    output_fragment: str,
+    cmec_output_bundle_filename: pathlib.Path,
+) -> list[tuple[ResultOutputType, str, str, OutputDict]]:
     # Extract the registered outputs
     # Copy the content to the output directory
-    # Track in the db
     cmec_output_bundle = CMECOutput.load_from_json(cmec_output_bundle_filename)
-    _handle_outputs(
-        cmec_output_bundle.plots,
-        output_type=ResultOutputType.Plot,
-        config=config,
-        database=database,
-        execution=execution,
-    )
-    _handle_outputs(
-        cmec_output_bundle.data,
-        output_type=ResultOutputType.Data,
-        config=config,
-        database=database,
-        execution=execution,
-    )
-    _handle_outputs(
-        cmec_output_bundle.html,
-        output_type=ResultOutputType.HTML,
-        config=config,
-        database=database,
-        execution=execution,
-    )
+    return [
+        *_publish_outputs(cmec_output_bundle.plots, ResultOutputType.Plot, config, output_fragment),
+        *_publish_outputs(cmec_output_bundle.data, ResultOutputType.Data, config, output_fragment),
+        *_publish_outputs(cmec_output_bundle.html, ResultOutputType.HTML, config, output_fragment),
+    ]
 
 
-def _handle_outputs(
+def _publish_outputs(
     outputs: dict[str, OutputDict] | None,
     output_type: ResultOutputType,
     config: "Config",
-    database: Database,
-    execution: Execution,
-) -> None:
+    output_fragment: str,
+) -> list[tuple[ResultOutputType, str, str, OutputDict]]:
     outputs = outputs or {}
 
+    published: list[tuple[ResultOutputType, str, str, OutputDict]] = []
     for key, output_info in outputs.items():
-        filename = ensure_relative_path(
-            output_info.filename, config.paths.scratch / execution.output_fragment
-        )
+        filename = ensure_relative_path(output_info.filename, config.paths.scratch / output_fragment)
 
         _copy_file_to_results(
             config.paths.scratch,
             config.paths.results,
-            execution.output_fragment,
+            output_fragment,
             filename,
         )
-        database.session.add(
-            ExecutionOutput.build(
-                execution_id=execution.id,
-                output_type=output_type,
-                filename=str(filename),
-                description=output_info.description,
-                short_name=key,
-                long_name=output_info.long_name,
-                dimensions=output_info.dimensions or {},
-            )
-        )
+        published.append((output_type, key, str(filename), output_info))
+    return published
@@ -43,10 +43,11 @@ class SynchronousExecutor:
             A description of the information needed for this execution of the diagnostic
         execution
             A database model representing the execution of the diagnostic.
-            If provided, the result will be updated in the database when completed.
+            If provided, the result will be written to the database in a new transaction when completed.
         """
         result = execute_locally(definition, log_level=self.config.log_level)
-        process_result(self.config, self.database, result, execution)
+        with self.database.session.begin():
+            process_result(self.config, self.database, result, execution)
 
     def join(self, timeout: float) -> None:
         """
@@ -1,7 +1,7 @@
 import datetime
 from typing import Any, ClassVar
 
-from sqlalchemy import ForeignKey, func
+from sqlalchemy import BigInteger, ForeignKey, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from climate_ref.models.base import Base
@@ -95,6 +95,18 @@ class DatasetFile(Base):
     Prefix that describes where the dataset is stored relative to the data directory
     """
 
+    size: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    """
+    Size of the file in bytes when it was registered
+    """
+
+    mtime_ns: Mapped[int | None] = mapped_column(BigInteger, nullable=True)
+    """
+    Modification time of the file in nanoseconds when it was registered
+
+    Together with the size, this is used to skip files that haven't changed when re-ingesting.
+    """
+
     dataset = relationship("Dataset", backref="files")
 
 
@@ -1,3 +1,4 @@
+import datetime
 from typing import TYPE_CHECKING
 
 from sqlalchemy import ForeignKey, UniqueConstraint
@@ -44,6 +45,23 @@ class Diagnostic(CreatedUpdatedMixin, Base):
     If a diagnostic is not enabled, it will not be used for any calculations.
     """
 
+    solve_watermark: Mapped[datetime.datetime | None] = mapped_column(nullable=True, default=None)
+    """
+    The most recent dataset update that was considered when this diagnostic was last solved
+
+    This is used by incremental solves to only consider the datasets that have been
+    added or updated since the previous solve.
+    A value of None indicates that the diagnostic has never been solved.
+    """
+
+    solve_fingerprint: Mapped[str | None] = mapped_column(nullable=True, default=None)
+    """
+    Fingerprint of the definition of the diagnostic when `solve_watermark` was recorded
+
+    The watermark is ignored if the diagnostic has since changed,
+    for example if the provider version or the data requirements have been updated.
+    """
+
     provider: Mapped["Provider"] = relationship(back_populates="diagnostics")
     execution_groups: Mapped[list["ExecutionGroup"]] = relationship(back_populates="diagnostic")
 
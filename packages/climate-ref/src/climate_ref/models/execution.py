@@ -187,11 +187,7 @@ class Execution(CreatedUpdatedMixin, Base):
         """
         Register the datasets used in the diagnostic calculation with the execution
         """
-        for _, dataset in execution_dataset.items():
-            db.session.execute(
-                execution_datasets.insert(),
-                [{"execution_id": self.id, "dataset_id": idx} for idx in dataset.index],
-            )
+        register_execution_datasets(db, [(self, execution_dataset)])
 
     def mark_successful(self, path: pathlib.Path | str) -> None:
         """
@@ -220,6 +216,32 @@ class ResultOutputType(enum.Enum):
     HTML = "html"
 
 
+def register_execution_datasets(
+    db: "Database", executions: Sequence[tuple[Execution, ExecutionDatasetCollection]]
+) -> None:
+    """
+    Register the datasets used by a collection of executions
+
+    The links for all the executions are inserted using a single statement.
+    The executions must have been flushed to the database so that they have an id.
+
+    Parameters
+    ----------
+    db
+        Database instance
+    executions
+        The executions and the datasets that they used
+    """
+    rows = [
+        {"execution_id": execution.id, "dataset_id": idx}
+        for execution, execution_dataset in executions
+        for _, dataset in execution_dataset.items()
+        for idx in dataset.index
+    ]
+    if rows:
+        db.session.execute(execution_datasets.insert(), rows)
+
+
 class ExecutionOutput(DimensionMixin, CreatedUpdatedMixin, Base):
     """
     An output generated as part of an execution.
@@ -0,0 +1,212 @@
+"""
+Cache of the executions that were identified when solving a diagnostic
+
+Solving a diagnostic requires filtering and grouping the data catalog for every data requirement.
+If neither the datasets nor the diagnostic have changed since the previous solve,
+the same candidate executions will be identified again.
+
+The candidate executions for each diagnostic are stored alongside a fingerprint of the inputs to the solve.
+If the fingerprint matches on a subsequent solve,
+the stored executions can be compared to the state of the database
+without solving the diagnostic again.
+"""
+
+import hashlib
+import json
+import os
+from collections.abc import Iterable, Mapping
+from pathlib import Path
+
+from attrs import define, frozen
+from loguru import logger
+
+from climate_ref.database import Database
+from climate_ref.datasets import get_dataset_adapter
+from climate_ref.datasets.snapshot import catalog_fingerprint
+from climate_ref_core.datasets import SourceDatasetType
+from climate_ref_core.diagnostics import DataRequirement, Diagnostic
+
+SOLVE_PLAN_FORMAT_VERSION = 1
+"""
+Version of the solve plan format
+
+Increment this if the structure of the solve plan changes to invalidate any existing plans.
+"""
+
+
+@frozen
+class PlannedExecution:
+    """
+    A candidate execution that was identified when solving a diagnostic
+    """
+
+    key: str
+    """
+    Key of the execution group
+    """
+    dataset_hash: str
+    """
+    Hash of the datasets used by the execution
+    """
+
+
+@frozen
+class CatalogFingerprint:
+    """
+    Fingerprint of the data catalog for a source dataset type
+    """
+
+    fingerprint: str
+    settled: bool
+    """
+    Whether the fingerprint is stable enough to be used to store a plan
+
+    See [catalog_fingerprint][climate_ref.datasets.snapshot.catalog_fingerprint].
+    """
+
+
+def _iter_source_types(diagnostic: Diagnostic) -> set[SourceDatasetType]:
+    source_types: set[SourceDatasetType] = set()
+    for item in diagnostic.data_requirements:
+        requirements = [item] if isinstance(item, DataRequirement) else item
+        source_types.update(requirement.source_type for requirement in requirements)
+    return source_types
+
+
+@define
+class SolvePlanCache:
+    """
+    Persistent cache of the candidate executions for each diagnostic
+    """
+
+    root: Path
+    """
+    Directory where the solve plans are stored
+    """
+
+    catalogs: Mapping[SourceDatasetType, CatalogFingerprint]
+    """
+    Fingerprints of the data catalogs at the start of the solve
+    """
+
+    @staticmethod
+    def from_db(root: Path, db: Database) -> "SolvePlanCache":
+        """
+        Create a solve plan cache using the current state of the database
+
+        Parameters
+        ----------
+        root
+            Directory where the solve plans are stored
+        db
+            Database instance
+
+        Returns
+        -------
+        :
+            A new SolvePlanCache instance
+        """
+        catalogs = {}
+        with db.session.begin():
+            for source_type in SourceDatasetType:
+                try:
+                    adapter = get_dataset_adapter(source_type.value)
+                except ValueError:
+                    # Source types without an adapter can't be ingested
+                    continue
+                fingerprint, settled = catalog_fingerprint(adapter, db)
+                catalogs[source_type] = CatalogFingerprint(fingerprint, settled)
+        return SolvePlanCache(root=root, catalogs=catalogs)
+
+    def fingerprint(self, diagnostic: Diagnostic) -> tuple[str, bool]:
+        """
+        Calculate the fingerprint of the inputs used to solve a diagnostic
+
+        This includes the fingerprints of the data catalogs used by the diagnostic,
+        the version of the provider and the data requirements of the diagnostic.
+
+        Returns
+        -------
+        :
+            The fingerprint and whether it can be used to store a plan
+        """
+        catalogs = {
+            source_type.value: self.catalogs.get(source_type)
+            for source_type in _iter_source_types(diagnostic)
+        }
+        state = {
+            "format": SOLVE_PLAN_FORMAT_VERSION,
+            "catalogs": {
+                source_type: catalog.fingerprint if catalog else None
+                for source_type, catalog in catalogs.items()
+            },
+            "provider": diagnostic.provider.slug,
+            "provider_version": diagnostic.provider.version,
+            "diagnostic": diagnostic.slug,
+            "data_requirements": repr(diagnostic.data_requirements),
+        }
+        fingerprint = hashlib.sha1(
+            json.dumps(state, sort_keys=True).encode(), usedforsecurity=False
+        ).hexdigest()
+        settled = all(catalog is not None and catalog.settled for catalog in catalogs.values())
+
+        return fingerprint, settled
+
+    def _path(self, diagnostic: Diagnostic) -> Path:
+        return self.root / diagnostic.provider.slug / f"{diagnostic.slug}.json"
+
+    def load(self, diagnostic: Diagnostic) -> list[PlannedExecution] | None:
+        """
+        Load the candidate executions from the previous solve of a diagnostic
+
+        Returns
+        -------
+        :
+            The candidate executions or None if there is no plan that matches the current inputs
+        """
+        path = self._path(diagnostic)
+        if not path.exists():
+            return None
+
+        try:
+            content = json.loads(path.read_text())
+        except (OSError, ValueError) as exc:
+            logger.warning(f"Unable to read solve plan {path}: {exc}")
+            return None
+
+        fingerprint, _ = self.fingerprint(diagnostic)
+        if content.get("fingerprint") != fingerprint:
+            logger.debug(f"Solve plan for {diagnostic.full_slug()} is stale")
+            return None
+
+        return [
+            PlannedExecution(key=key, dataset_hash=dataset_hash)
+            for key, dataset_hash in content["executions"]
+        ]
+
+    def save(self, diagnostic: Diagnostic, executions: Iterable[PlannedExecution]) -> None:
+        """
+        Store the candidate executions identified when solving a diagnostic
+
+        The plan is not stored if the data catalogs are still being modified.
+        """
+        fingerprint, settled = self.fingerprint(diagnostic)
+        if not settled:
+            logger.debug(
+                f"Not storing the solve plan for {diagnostic.full_slug()} as the datasets have changed"
+            )
+            return
+
+        path = self._path(diagnostic)
+        tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+        content = {
+            "fingerprint": fingerprint,
+            "executions": [[execution.key, execution.dataset_hash] for execution in executions],
+        }
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path.write_text(json.dumps(content))
+            os.replace(tmp_path, path)
+        except OSError as exc:
+            logger.warning(f"Unable to write solve plan {path}: {exc}")
+            tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,336 @@
+"""
+Profiling of the stages of a solve
+
+The solver is instrumented with a number of named stages,
+e.g. filtering the data catalog, grouping the datasets and applying each of the constraints.
+When a [SolveProfiler][climate_ref.solve_profile.SolveProfiler] is active,
+the wall time and the number of rows going in and out of each stage is recorded
+along with the diagnostic that was being solved.
+
+Profiling is disabled by default and has a negligible overhead when no profiler is active.
+When the diagnostics are solved in parallel,
+the stages that run in each of the worker processes are merged into the active profiler.
+
+```python
+profiler = SolveProfiler()
+with profiler.activate():
+    solve_required_executions(db)
+
+print(profiler.summary())
+```
+"""
+
+import contextlib
+import contextvars
+import enum
+import json
+import os
+import time
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any
+
+import pandas as pd
+from attrs import asdict, define, field
+
+_active_profiler: contextvars.ContextVar["SolveProfiler | None"] = contextvars.ContextVar(
+    "solve_profiler", default=None
+)
+_active_diagnostic: contextvars.ContextVar[str | None] = contextvars.ContextVar(
+    "solve_profile_diagnostic", default=None
+)
+
+
+class ProfileFormat(enum.Enum):
+    """
+    Output format of a solve profile
+    """
+
+    JSON = "json"
+    """
+    The individual events and the summary as JSON
+    """
+    CHROME = "chrome"
+    """
+    Chrome trace event format, which can be viewed using Perfetto or `chrome://tracing`
+    """
+
+
+@define
+class ProfileEvent:
+    """
+    A single timed stage of a solve
+    """
+
+    stage: str
+    """
+    Name of the stage
+    """
+    diagnostic: str | None
+    """
+    Full slug of the diagnostic that was being solved
+    """
+    detail: str | None
+    """
+    Additional information about the stage, e.g. the name of a constraint
+    """
+    start: float
+    """
+    Start time in seconds relative to the creation of the profiler
+    """
+    duration: float
+    """
+    Wall time in seconds
+    """
+    rows_in: int | None = None
+    rows_out: int | None = None
+
+
+@define
+class StageRecord:
+    """
+    Mutable record used to report the result of a stage while it is being timed
+    """
+
+    rows_out: int | None = None
+
+
+@define
+class SolveProfiler:
+    """
+    Collects the timings of the stages of a solve
+    """
+
+    events: list[ProfileEvent] = field(factory=list)
+    candidates: dict[str, int] = field(factory=dict)
+    """
+    Number of candidate executions identified for each diagnostic
+    """
+    origin: float = field(factory=time.perf_counter)
+
+    @contextlib.contextmanager
+    def activate(self) -> Iterator["SolveProfiler"]:
+        """
+        Record the stages of any solves within this context
+        """
+        token = _active_profiler.set(self)
+        try:
+            yield self
+        finally:
+            _active_profiler.reset(token)
+
+    def merge(self, other: "SolveProfiler") -> None:
+        """
+        Add the events and candidates recorded by another profiler
+
+        This is used to combine the profiles recorded by the processes of a parallel solve.
+        The other profiler should use the same `origin` so that the start times are comparable.
+
+        Parameters
+        ----------
+        other
+            Profiler to add to this profiler
+        """
+        self.events.extend(other.events)
+        for diagnostic, count in other.candidates.items():
+            self.candidates[diagnostic] = self.candidates.get(diagnostic, 0) + count
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Summarise the time spent in each stage
+
+        Stages are nested so the time of a stage includes the time spent in any stages that it contains.
+
+        Returns
+        -------
+        :
+            The number of calls, wall time and rows for each stage of each diagnostic,
+            sorted by the total time spent in the stage
+        """
+        columns = ["diagnostic", "stage", "detail", "calls", "total_time", "mean_time", "rows_in", "rows_out"]
+        if not self.events:
+            return pd.DataFrame(columns=columns)
+
+        events = pd.DataFrame([asdict(event) for event in self.events]).fillna(
+            {"diagnostic": "-", "detail": "-"}
+        )
+        summary = (
+            events.groupby(["diagnostic", "stage", "detail"])
+            .agg(
+                calls=("duration", "size"),
+                total_time=("duration", "sum"),
+                mean_time=("duration", "mean"),
+                rows_in=("rows_in", "sum"),
+                rows_out=("rows_out", "sum"),
+            )
+            .reset_index()
+            .sort_values("total_time", ascending=False, ignore_index=True)
+        )
+        return summary[columns]
+
+    def diagnostic_summary(self) -> pd.DataFrame:
+        """
+        Summarise the time spent solving each diagnostic
+
+        Returns
+        -------
+        :
+            The wall time and number of candidate executions for each diagnostic,
+            sorted by the time spent solving the diagnostic
+        """
+        times: dict[str, float] = {}
+        for event in self.events:
+            if event.stage == "solve" and event.diagnostic is not None:
+                times[event.diagnostic] = times.get(event.diagnostic, 0.0) + event.duration
+
+        return pd.DataFrame(
+            [
+                {"diagnostic": slug, "time": times.get(slug, 0.0), "candidates": self.candidates.get(slug, 0)}
+                for slug in sorted(times.keys() | self.candidates.keys())
+            ],
+            columns=["diagnostic", "time", "candidates"],
+        ).sort_values("time", ascending=False, ignore_index=True)
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """
+        Convert the events to the Chrome trace event format
+
+        Each diagnostic is displayed as a separate track.
+        """
+        tracks: dict[str | None, int] = {None: 0}
+        trace_events = []
+        for event in self.events:
+            tid = tracks.setdefault(event.diagnostic, len(tracks))
+            trace_events.append(
+                {
+                    "name": event.stage if event.detail is None else f"{event.stage}: {event.detail}",
+                    "cat": event.stage,
+                    "ph": "X",
+                    "ts": event.start * 1e6,
+                    "dur": event.duration * 1e6,
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {"rows_in": event.rows_in, "rows_out": event.rows_out},
+                }
+            )
+        for diagnostic, tid in tracks.items():
+            trace_events.append(
+                {
+                    "name": "thread_name",
+                    "ph": "M",
+                    "pid": os.getpid(),
+                    "tid": tid,
+                    "args": {"name": diagnostic or "solve"},
+                }
+            )
+        return {"traceEvents": trace_events, "displayTimeUnit": "ms"}
+
+    def write(self, path: Path, profile_format: ProfileFormat = ProfileFormat.JSON) -> None:
+        """
+        Write the profile to disk
+
+        Parameters
+        ----------
+        path
+            Path to write the profile to
+        profile_format
+            Format of the profile
+        """
+        if profile_format == ProfileFormat.CHROME:
+            content = self.to_chrome_trace()
+        else:
+            content = {
+                "events": [asdict(event) for event in self.events],
+                "candidates": self.candidates,
+                "summary": self.summary().to_dict(orient="records"),
+            }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(content, indent=2))
+
+
+def active_profiler() -> SolveProfiler | None:
+    """
+    Get the profiler that is active in the current context
+
+    Returns
+    -------
+    :
+        The active profiler or None if profiling is disabled
+    """
+    return _active_profiler.get()
+
+
+@contextlib.contextmanager
+def profile_stage(
+    stage: str, *, detail: str | None = None, rows_in: int | None = None
+) -> Iterator[StageRecord]:
+    """
+    Time a stage of the solve if a profiler is active
+
+    The stage is attributed to the diagnostic that is currently being solved (if any).
+
+    Parameters
+    ----------
+    stage
+        Name of the stage
+    detail
+        Additional information about the stage
+    rows_in
+        Number of rows that are processed by the stage
+
+    Yields
+    ------
+    :
+        A record that can be used to set the number of rows produced by the stage
+    """
+    record = StageRecord()
+    profiler = _active_profiler.get()
+    if profiler is None:
+        yield record
+        return
+
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        profiler.events.append(
+            ProfileEvent(
+                stage=stage,
+                diagnostic=_active_diagnostic.get(),
+                detail=detail,
+                start=start - profiler.origin,
+                duration=time.perf_counter() - start,
+                rows_in=rows_in,
+                rows_out=record.rows_out,
+            )
+        )
+
+
+@contextlib.contextmanager
+def profile_diagnostic(diagnostic: str) -> Iterator[None]:
+    """
+    Attribute the stages within this context to a diagnostic
+
+    This must not span a `yield` as the diagnostic would also be attributed
+    to any stages of the consumer of the generator.
+
+    Parameters
+    ----------
+    diagnostic
+        Full slug of the diagnostic
+    """
+    token = _active_diagnostic.set(diagnostic)
+    try:
+        with profile_stage("solve"):
+            yield
+    finally:
+        _active_diagnostic.reset(token)
+
+
+def record_candidate(diagnostic: str) -> None:
+    """
+    Count a candidate execution for a diagnostic if a profiler is active
+    """
+    profiler = _active_profiler.get()
+    if profiler is not None:
+        profiler.candidates[diagnostic] = profiler.candidates.get(diagnostic, 0) + 1
@@ -4,35 +4,71 @@ Solver to determine which diagnostics need to be calculated
 This module provides a solver to determine which diagnostics need to be calculated.
 """
 
+import concurrent.futures
+import contextlib
+import copy
+import datetime
+import enum
+import hashlib
 import itertools
+import json
+import multiprocessing
 import pathlib
+import tempfile
+import time
 import typing
-from collections.abc import Sequence
+from collections.abc import Collection, Mapping, Sequence
 
+import attrs
 import pandas as pd
-from attrs import define, frozen
+from attrs import define, evolve, field, frozen
 from loguru import logger
+from sqlalchemy import func
 
 from climate_ref.config import Config
+from climate_ref.constraint_stats import ConstraintStatistics
 from climate_ref.database import Database
 from climate_ref.datasets import get_dataset_adapter
+from climate_ref.datasets.base import DatasetAdapter
 from climate_ref.datasets.cmip6 import CMIP6DatasetAdapter
 from climate_ref.datasets.obs4mips import Obs4MIPsDatasetAdapter
 from climate_ref.datasets.pmp_climatology import PMPClimatologyDatasetAdapter
+from climate_ref.datasets.snapshot import read_snapshot, write_snapshot
 from climate_ref.models import Diagnostic as DiagnosticModel
 from climate_ref.models import ExecutionGroup
 from climate_ref.models import Provider as ProviderModel
-from climate_ref.models.execution import Execution
+from climate_ref.models.dataset import Dataset
+from climate_ref.models.execution import Execution, register_execution_datasets
 from climate_ref.provider_registry import ProviderRegistry
-from climate_ref_core.constraints import apply_constraint
+from climate_ref.solve_plan import PlannedExecution, SolvePlanCache
+from climate_ref.solve_profile import (
+    SolveProfiler,
+    active_profiler,
+    profile_diagnostic,
+    profile_stage,
+    record_candidate,
+)
+from climate_ref_core.constraints import (
+    AddSupplementaryDataset,
+    GroupConstraint,
+    RequireContiguousTimerange,
+    RequireFacets,
+    RequireOverlappingTimerange,
+    RequireTimerange,
+    apply_constraint,
+)
 from climate_ref_core.datasets import (
     DatasetCollection,
     ExecutionDatasetCollection,
+    FacetFilter,
+    FacetIndex,
     Selector,
     SourceDatasetType,
 )
 from climate_ref_core.diagnostics import DataRequirement, Diagnostic, ExecutionDefinition
 from climate_ref_core.exceptions import InvalidDiagnosticException
+from climate_ref_core.executor import Executor
+from climate_ref_core.logging import initialise_logging
 from climate_ref_core.providers import DiagnosticProvider
 
 
@@ -110,37 +146,201 @@ class DiagnosticExecution:
         )
 
 
+GROUP_LOCAL_CONSTRAINTS = (
+    RequireFacets,
+    RequireTimerange,
+    RequireContiguousTimerange,
+    RequireOverlappingTimerange,
+)
+"""
+Constraints that only depend on the datasets within a group
+
+Changes to datasets outside a group can not change the outcome of these constraints for that group.
+"""
+
+
+def _stable_state(value: typing.Any) -> typing.Any:
+    """
+    Convert a data requirement into a JSON-serialisable structure
+
+    Unlike `repr`, the result only depends on the values of the attributes
+    and not on how the classes or library types are formatted.
+    """
+    if attrs.has(type(value)):
+        return {
+            "type": f"{type(value).__module__}.{type(value).__qualname__}",
+            "fields": {
+                attribute.name: _stable_state(getattr(value, attribute.name))
+                for attribute in attrs.fields(type(value))
+                if attribute.eq
+            },
+        }
+    if isinstance(value, Mapping):
+        return {str(key): _stable_state(item) for key, item in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted((_stable_state(item) for item in value), key=json.dumps)
+    if isinstance(value, (list, tuple)):
+        return [_stable_state(item) for item in value]
+    if isinstance(value, enum.Enum):
+        value = value.value
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    return str(value)
+
+
+def diagnostic_fingerprint(diagnostic: Diagnostic) -> str:
+    """
+    Calculate a fingerprint of the definition of a diagnostic
+
+    The fingerprint changes if the provider version or the data requirements of the diagnostic change.
+    This is used to determine if the result of a previous solve of the diagnostic can be reused.
+
+    Parameters
+    ----------
+    diagnostic
+        Diagnostic of interest
+
+    Returns
+    -------
+    :
+        Hex digest of the definition of the diagnostic
+    """
+    state = {
+        "provider": diagnostic.provider.slug,
+        "provider_version": diagnostic.provider.version,
+        "diagnostic": diagnostic.slug,
+        "data_requirements": _stable_state(diagnostic.data_requirements),
+    }
+    return hashlib.sha1(json.dumps(state, sort_keys=True).encode(), usedforsecurity=False).hexdigest()
+
+
+@frozen
+class ChangedDatasets:
+    """
+    Datasets that have been added or updated since a diagnostic was last solved
+
+    This is used by the incremental solver to determine which groups of a diagnostic
+    could be affected by the changed datasets.
+    """
+
+    data_catalog: dict[SourceDatasetType, pd.DataFrame] = field(factory=dict)
+    """
+    The subset of the data catalog for each source type that has changed
+    """
+
+    def is_empty(self) -> bool:
+        """
+        Check if there are no changed datasets
+        """
+        return all(catalog.empty for catalog in self.data_catalog.values())
+
+    def affected_groups(self, requirement: DataRequirement) -> set[Selector] | None:
+        """
+        Determine the groups of a data requirement that may be affected by the changed datasets
+
+        Parameters
+        ----------
+        requirement
+            Data requirement of interest
+
+        Returns
+        -------
+        :
+            The selectors of the groups that may have changed.
+
+            None is returned if any of the groups may have changed,
+            for example if the changed datasets include a supplementary dataset
+            or the requirement isn't grouped.
+        """
+        changed = self.data_catalog.get(requirement.source_type)
+        if changed is None or changed.empty:
+            return set()
+
+        for constraint in requirement.constraints:
+            if isinstance(constraint, AddSupplementaryDataset):
+                # A new supplementary dataset may be added to any group
+                mask = pd.Series(True, index=changed.index)
+                for facet, values in constraint.supplementary_facets.items():
+                    if facet in changed.columns:
+                        mask &= changed[facet].isin(values if isinstance(values, tuple) else (values,))
+                if mask.any():
+                    return None
+            elif not isinstance(constraint, GROUP_LOCAL_CONSTRAINTS):
+                # Be conservative with constraints that may use datasets outside the group
+                return None
+
+        matched = requirement.apply_filters(changed)
+        if matched.empty:
+            return set()
+        if not requirement.group_by:
+            return None
+
+        group_by = list(requirement.group_by)
+        group_values = matched[group_by].dropna().drop_duplicates()
+        return {tuple(zip(group_by, values)) for values in group_values.itertuples(index=False, name=None)}
+
+
 def extract_covered_datasets(
-    data_catalog: pd.DataFrame, requirement: DataRequirement
+    data_catalog: pd.DataFrame,
+    requirement: DataRequirement,
+    selectors: Collection[Selector] | None = None,
+    cache: "SolveCache | None" = None,
 ) -> dict[Selector, pd.DataFrame]:
     """
     Determine the different diagnostic executions that should be performed with the current data catalog
+
+    Parameters
+    ----------
+    data_catalog
+        Data catalog for the source type of the requirement
+    requirement
+        Data requirement to solve
+    selectors
+        If provided, only the groups with these selectors are considered.
+
+        This is used to avoid evaluating the constraints of groups that are known to be unchanged.
+    cache
+        Cache of the filtered and grouped data catalogs shared between the diagnostics in a solve.
+
+        If provided, `data_catalog` must be the data catalog for the source type of the requirement
+        that the cache was created with.
+
+    Returns
+    -------
+    :
+        The datasets for each group that satisfies the constraints of the requirement
     """
     if len(data_catalog) == 0:
         logger.error(f"No datasets found in the data catalog: {requirement.source_type.value}")
         return {}
 
-    subset = requirement.apply_filters(data_catalog)
-
-    if len(subset) == 0:
+    if cache is not None:
+        if cache.data_catalog.get(requirement.source_type) is not data_catalog:
+            raise ValueError(
+                f"The solve cache was not created for this {requirement.source_type.value} catalog"
+            )
+        groups = cache.get_groups(requirement)
+    else:
+        with profile_stage(
+            "filter", detail=requirement.source_type.value, rows_in=len(data_catalog)
+        ) as stage:
+            subset = requirement.apply_filters(data_catalog)
+            stage.rows_out = len(subset)
+        groups = _group_datasets(subset, requirement)
+
+    if selectors is not None and requirement.group_by:
+        selectors = set(selectors)
+        groups = [(group_keys, group) for group_keys, group in groups if group_keys in selectors]
+
+    if not groups:
         logger.debug(f"No datasets found for requirement {requirement}")
         return {}
 
-    if requirement.group_by is None:
-        # Use a single group
-        groups = [((), subset)]
-    else:
-        groups = list(subset.groupby(list(requirement.group_by)))
-
     results = {}
 
-    for name, group in groups:
-        if requirement.group_by is None:
-            assert len(groups) == 1
-            group_keys: Selector = ()
-        else:
-            group_keys = tuple(zip(requirement.group_by, name))
-        constrained_group = _process_group_constraints(data_catalog, group, requirement)
+    statistics = cache.constraint_statistics if cache is not None else None
+    for group_keys, group in groups:
+        constrained_group = _process_group_constraints(data_catalog, group, requirement, statistics, cache)
 
         if constrained_group is not None:
             results[group_keys] = constrained_group
@@ -148,11 +348,192 @@ def extract_covered_datasets(
     return results
 
 
+def _group_datasets(
+    subset: pd.DataFrame, requirement: DataRequirement
+) -> list[tuple[Selector, pd.DataFrame]]:
+    if len(subset) == 0:
+        return []
+
+    if requirement.group_by is None:
+        # Use a single group
+        return [((), subset)]
+
+    with profile_stage("group", detail=requirement.source_type.value, rows_in=len(subset)) as stage:
+        groups = [
+            (tuple(zip(requirement.group_by, name)), group)
+            for name, group in subset.groupby(list(requirement.group_by), observed=True)
+        ]
+        stage.rows_out = len(groups)
+    return groups
+
+
+FilterKey = frozenset[frozenset[tuple[str, frozenset[str]]]] | None
+"""
+Normalised representation of the filters of a data requirement
+
+The order of the filters, facets and values has no effect on the result of the filtering.
+None is used if the filters don't remove any datasets.
+"""
+
+
+def _normalise_filters(filters: Collection[FacetFilter]) -> FilterKey:
+    if not filters or any(not facet_filter.facets for facet_filter in filters):
+        return None
+    return frozenset(
+        frozenset((facet, frozenset(values)) for facet, values in facet_filter.facets.items())
+        for facet_filter in filters
+    )
+
+
+@define(eq=False)
+class SolveCache:
+    """
+    Cache of the intermediate results that are shared between diagnostics during a solve
+
+    Many diagnostics declare the same filters and grouping for a data requirement.
+    The filtered and grouped datasets are calculated once for each unique requirement
+    and then reused by the other diagnostics.
+    The constraints are still evaluated for each requirement.
+
+    The data catalogs must not be modified while the cache is in use.
+    """
+
+    data_catalog: Mapping[SourceDatasetType, pd.DataFrame]
+    constraint_statistics: ConstraintStatistics = field(factory=ConstraintStatistics)
+    """
+    Statistics used to reject groups early, which are updated as the constraints are evaluated
+    """
+    _facet_indexes: dict[SourceDatasetType, FacetIndex] = field(factory=dict, init=False, repr=False)
+    _groups: dict[
+        tuple[SourceDatasetType, FilterKey, tuple[str, ...] | None], list[tuple[Selector, pd.DataFrame]]
+    ] = field(factory=dict, init=False, repr=False)
+    _supplementary_candidates: dict[
+        tuple[SourceDatasetType, frozenset[tuple[str, frozenset[str]]]], pd.DataFrame
+    ] = field(factory=dict, init=False, repr=False)
+
+    def get_facet_index(self, source_type: SourceDatasetType) -> FacetIndex:
+        """
+        Get the index of the facet values for a data catalog
+
+        Parameters
+        ----------
+        source_type
+            Source type of the data catalog
+
+        Returns
+        -------
+        :
+            Facet index for the data catalog
+        """
+        if source_type not in self._facet_indexes:
+            self._facet_indexes[source_type] = FacetIndex(self.data_catalog[source_type])
+        return self._facet_indexes[source_type]
+
+    def get_groups(self, requirement: DataRequirement) -> list[tuple[Selector, pd.DataFrame]]:
+        """
+        Get the groups of datasets that match the filters of a requirement
+
+        The constraints of the requirement are not applied.
+
+        Parameters
+        ----------
+        requirement
+            Data requirement of interest
+
+        Returns
+        -------
+        :
+            The selector and datasets for each group
+        """
+        key = (requirement.source_type, _normalise_filters(requirement.filters), requirement.group_by)
+        if key not in self._groups:
+            data_catalog = self.data_catalog[requirement.source_type]
+            with profile_stage(
+                "filter", detail=requirement.source_type.value, rows_in=len(data_catalog)
+            ) as stage:
+                subset = requirement.apply_filters(
+                    data_catalog, facet_index=self.get_facet_index(requirement.source_type)
+                )
+                stage.rows_out = len(subset)
+            self._groups[key] = _group_datasets(subset, requirement)
+        else:
+            logger.debug(f"Using cached groups for requirement {requirement}")
+        return self._groups[key]
+
+    def get_supplementary_candidates(
+        self, source_type: SourceDatasetType, constraint: AddSupplementaryDataset
+    ) -> pd.DataFrame:
+        """
+        Get the candidate supplementary datasets of a constraint
+
+        These don't depend on the group that the constraint is applied to,
+        so they are selected once per data catalog.
+
+        Parameters
+        ----------
+        source_type
+            Source type of the data catalog
+        constraint
+            Constraint that adds the supplementary datasets
+
+        Returns
+        -------
+        :
+            The candidate supplementary datasets in the data catalog
+        """
+        facets = constraint.candidate_facets()
+        key = (source_type, frozenset((facet, frozenset(values)) for facet, values in facets.items()))
+        if key not in self._supplementary_candidates:
+            self._supplementary_candidates[key] = constraint.select_candidates(self.data_catalog[source_type])
+        return self._supplementary_candidates[key]
+
+
+def _apply_constraint(  # noqa: PLR0913
+    data_catalog: pd.DataFrame,
+    group: pd.DataFrame,
+    constraint: GroupConstraint,
+    statistics: ConstraintStatistics | None,
+    candidates: pd.DataFrame | None = None,
+    precheck: bool = False,
+) -> pd.DataFrame | None:
+    with profile_stage("constraint", detail=type(constraint).__name__, rows_in=len(group)) as stage:
+        start = time.perf_counter()
+        if candidates is not None and isinstance(constraint, AddSupplementaryDataset):
+            updated_group = constraint.apply(group, data_catalog, candidates=candidates)
+            constrained_group = None if updated_group.empty else updated_group
+        else:
+            constrained_group = apply_constraint(group, constraint, data_catalog)
+        if statistics is not None:
+            statistics.record(
+                constraint,
+                time.perf_counter() - start,
+                rejected=constrained_group is None,
+                precheck=precheck,
+            )
+        stage.rows_out = 0 if constrained_group is None else len(constrained_group)
+    return constrained_group
+
+
 def _process_group_constraints(
-    data_catalog: pd.DataFrame, group: pd.DataFrame, requirement: DataRequirement
+    data_catalog: pd.DataFrame,
+    group: pd.DataFrame,
+    requirement: DataRequirement,
+    statistics: ConstraintStatistics | None = None,
+    cache: SolveCache | None = None,
 ) -> pd.DataFrame | None:
-    for constraint in requirement.constraints or []:
-        constrained_group = apply_constraint(group, constraint, data_catalog)
+    constraints = requirement.constraints or ()
+    if statistics is not None:
+        # Groups that are rejected by a pre-check would be rejected by the declared constraints,
+        # so the more expensive constraints don't need to be evaluated
+        for constraint in statistics.prechecks(constraints):
+            if _apply_constraint(data_catalog, group, constraint, statistics, precheck=True) is None:
+                return None
+
+    for constraint in constraints:
+        candidates = None
+        if cache is not None and isinstance(constraint, AddSupplementaryDataset):
+            candidates = cache.get_supplementary_candidates(requirement.source_type, constraint)
+        constrained_group = _apply_constraint(data_catalog, group, constraint, statistics, candidates)
         if constrained_group is None:
             return None
 
@@ -161,7 +542,11 @@ def _process_group_constraints(
 
 
 def solve_executions(
-    data_catalog: dict[SourceDatasetType, pd.DataFrame], diagnostic: Diagnostic, provider: DiagnosticProvider
+    data_catalog: dict[SourceDatasetType, pd.DataFrame],
+    diagnostic: Diagnostic,
+    provider: DiagnosticProvider,
+    changes: ChangedDatasets | None = None,
+    cache: SolveCache | None = None,
 ) -> typing.Generator["DiagnosticExecution", None, None]:
     """
     Calculate the diagnostic executions that need to be performed for a given diagnostic
@@ -174,6 +559,14 @@ def solve_executions(
         Diagnostic of interest
     provider
         Provider of the diagnostic
+    changes
+        Datasets that have changed since the diagnostic was last solved.
+
+        If provided, only the executions that may be affected by these changes are returned.
+    cache
+        Cache of intermediate results that are shared between the diagnostics in a solve.
+
+        This must have been created using `data_catalog`.
 
     Returns
     -------
@@ -193,6 +586,8 @@ def solve_executions(
             diagnostic,
             typing.cast(Sequence[DataRequirement], diagnostic.data_requirements),
             provider,
+            changes,
+            cache,
         )
     elif isinstance(first_item, Sequence):
         # We have a sequence of collections of data requirements
@@ -200,21 +595,24 @@ def solve_executions(
             if not isinstance(requirement_collection, Sequence):
                 raise TypeError(f"Expected a sequence of DataRequirement, got {type(requirement_collection)}")
             yield from _solve_from_data_requirements(
-                data_catalog, diagnostic, requirement_collection, provider
+                data_catalog, diagnostic, requirement_collection, provider, changes, cache
             )
     else:
         raise TypeError(f"Expected a DataRequirement, got {type(first_item)}")
 
 
-def _solve_from_data_requirements(
+def _is_affected(groups: set[Selector] | None, selector: Selector) -> bool:
+    return groups is None or selector in groups
+
+
+def _solve_from_data_requirements(  # noqa: PLR0913
     data_catalog: dict[SourceDatasetType, pd.DataFrame],
     diagnostic: Diagnostic,
     data_requirements: Sequence[DataRequirement],
     provider: DiagnosticProvider,
+    changes: ChangedDatasets | None = None,
+    cache: SolveCache | None = None,
 ) -> typing.Generator["DiagnosticExecution", None, None]:
-    # Collect up the different data groups that can be used to calculate the diagnostic
-    dataset_groups = {}
-
     for requirement in data_requirements:
         if not isinstance(requirement, DataRequirement):
             raise TypeError(f"Expected a DataRequirement, got {type(requirement)}")
@@ -223,22 +621,71 @@ def _solve_from_data_requirements(
                 diagnostic, f"No data catalog for source type {requirement.source_type}"
             )
 
-        dataset_groups[requirement.source_type] = extract_covered_datasets(
-            data_catalog[requirement.source_type], requirement
-        )
+    with profile_diagnostic(diagnostic.full_slug()):
+        affected_groups: dict[SourceDatasetType, set[Selector] | None] = {}
+        affected_source_types: list[SourceDatasetType] = []
+        if changes is not None:
+            affected_groups = {
+                requirement.source_type: changes.affected_groups(requirement)
+                for requirement in data_requirements
+            }
+            affected_source_types = [
+                source_type for source_type, groups in affected_groups.items() if groups is None or groups
+            ]
+            if not affected_source_types:
+                logger.debug(f"No changed datasets affect {diagnostic.full_slug()}")
+                return
+
+        # Collect up the different data groups that can be used to calculate the diagnostic
+        dataset_groups = {}
+
+        for requirement in data_requirements:
+            selectors = None
+            if changes is not None and affected_source_types == [requirement.source_type]:
+                # Only the groups of this requirement can have changed,
+                # so the other groups don't need to be evaluated
+                selectors = affected_groups[requirement.source_type]
+
+            with profile_stage(
+                "extract",
+                detail=requirement.source_type.value,
+                rows_in=len(data_catalog[requirement.source_type]),
+            ) as stage:
+                dataset_groups[requirement.source_type] = extract_covered_datasets(
+                    data_catalog[requirement.source_type],
+                    requirement,
+                    selectors=selectors,
+                    cache=cache,
+                )
+                stage.rows_out = len(dataset_groups[requirement.source_type])
+
+        # The collections are shared by all the executions that use a group,
+        # so the hash of each group is only calculated once.
+        # The datasets of a collection are only converted for the diagnostic if the execution is run.
+        collections: dict[SourceDatasetType, dict[Selector, DatasetCollection]] = {}
+        for source_type, groups in dataset_groups.items():
+            slug_column = get_dataset_adapter(source_type.value).slug_column
+            collections[source_type] = {
+                selector: DatasetCollection(datasets=datasets, slug_column=slug_column, selector=selector)
+                for selector, datasets in groups.items()
+            }
 
     # Calculate the product across each of the source types
     for items in itertools.product(*dataset_groups.values()):
+        if changes is not None and not any(
+            _is_affected(affected_groups[source_type], selector)
+            for source_type, selector in zip(dataset_groups.keys(), items)
+        ):
+            # None of the groups in this execution have changed
+            continue
+
+        record_candidate(diagnostic.full_slug())
         yield DiagnosticExecution(
             provider=provider,
             diagnostic=diagnostic,
             datasets=ExecutionDatasetCollection(
                 {
-                    source_type: DatasetCollection(
-                        datasets=dataset_groups[source_type][selector],
-                        slug_column=get_dataset_adapter(source_type.value).slug_column,
-                        selector=selector,
-                    )
+                    source_type: collections[source_type][selector]
                     for source_type, selector in zip(dataset_groups.keys(), items)
                 }
             ),
@@ -296,6 +743,205 @@ def matches_filter(diagnostic: Diagnostic, filters: SolveFilterOptions | None) -
     return True
 
 
+def _iter_data_requirements(diagnostic: Diagnostic) -> typing.Iterator[DataRequirement]:
+    for item in diagnostic.data_requirements:
+        if isinstance(item, DataRequirement):
+            yield item
+        else:
+            yield from item
+
+
+def _requirement_catalog_filters(requirement: DataRequirement) -> tuple[FacetFilter, ...] | None:
+    """
+    Get the filters that select every dataset that a data requirement may use
+
+    Returns None if the requirement may use any dataset in the data catalog.
+    """
+    if not requirement.filters or any(not facet_filter.facets for facet_filter in requirement.filters):
+        return None
+
+    catalog_filters = list(requirement.filters)
+    for constraint in requirement.constraints:
+        if isinstance(constraint, AddSupplementaryDataset):
+            catalog_filters.append(FacetFilter(dict(constraint.supplementary_facets)))
+        elif not isinstance(constraint, GROUP_LOCAL_CONSTRAINTS):
+            # Other constraints may look up any dataset in the data catalog
+            return None
+    return tuple(catalog_filters)
+
+
+def find_catalog_filters(
+    provider_registry: ProviderRegistry, filters: SolveFilterOptions | None
+) -> dict[SourceDatasetType, tuple[FacetFilter, ...] | None]:
+    """
+    Find the subset of the data catalogs that are required to solve a set of diagnostics
+
+    This allows a solve of a small number of diagnostics to only load the datasets
+    that could be used by those diagnostics.
+
+    Parameters
+    ----------
+    provider_registry
+        Registry of the providers
+    filters
+        Filters to limit the diagnostics that are solved
+
+    Returns
+    -------
+    :
+        Filters that select the required datasets for each source type.
+
+        The filters are None if the complete data catalog is required.
+        Source types that are not used by any of the diagnostics are not included.
+    """
+    catalog_filters: dict[SourceDatasetType, list[FacetFilter] | None] = {}
+    for provider in provider_registry.providers:
+        for diagnostic in provider.diagnostics():
+            if not matches_filter(diagnostic, filters):
+                continue
+            for requirement in _iter_data_requirements(diagnostic):
+                requirement_filters = _requirement_catalog_filters(requirement)
+                existing = catalog_filters.setdefault(requirement.source_type, [])
+                if existing is None or requirement_filters is None:
+                    catalog_filters[requirement.source_type] = None
+                else:
+                    existing.extend(requirement_filters)
+
+    return {
+        source_type: tuple(source_filters) if source_filters is not None else None
+        for source_type, source_filters in catalog_filters.items()
+    }
+
+
+_WORKER_CATALOG_FINGERPRINT = "solve-worker"
+
+_worker_provider_registry: ProviderRegistry | None = None
+_worker_data_catalog: dict[SourceDatasetType, pd.DataFrame] = {}
+_worker_cache: SolveCache | None = None
+_worker_profile_origin: float | None = None
+
+
+def _write_worker_catalogs(
+    data_catalog: Mapping[SourceDatasetType, pd.DataFrame], directory: pathlib.Path
+) -> dict[SourceDatasetType, pathlib.Path]:
+    """
+    Write the data catalogs to disk so that they can be read by the solve workers
+
+    The catalogs are written as Arrow IPC files which are memory-mapped by the workers.
+    If that isn't possible (e.g. pyarrow isn't installed),
+    the catalogs are pickled instead.
+
+    Returns
+    -------
+    :
+        The path to the catalog for each source type
+    """
+    paths = {}
+    for source_type, catalog in data_catalog.items():
+        path = directory / f"{source_type.value}.arrow"
+        write_snapshot(path, catalog, _WORKER_CATALOG_FINGERPRINT)
+        if not path.exists():
+            path = path.with_suffix(".pkl")
+            catalog.to_pickle(path)
+        paths[source_type] = path
+    return paths
+
+
+def _read_worker_catalog(path: pathlib.Path) -> pd.DataFrame:
+    if path.suffix == ".pkl":
+        # The file was written by the main process of the solve
+        return typing.cast(pd.DataFrame, pd.read_pickle(path))  # noqa: S301
+
+    catalog = read_snapshot(path, _WORKER_CATALOG_FINGERPRINT)
+    if catalog is None:
+        raise RuntimeError(f"Unable to read the data catalog {path}")
+    return catalog
+
+
+def _init_solve_worker(
+    provider_registry: ProviderRegistry,
+    catalog_paths: Mapping[SourceDatasetType, pathlib.Path],
+    constraint_statistics: ConstraintStatistics,
+    profile_origin: float | None,
+) -> None:
+    """
+    Initialise a process used for solving
+
+    The data catalogs are read from the files written by the main process
+    rather than being serialised and sent to each process.
+
+    Parameters
+    ----------
+    provider_registry
+        Registry of the providers to solve
+    catalog_paths
+        Path to the data catalog for each source type
+    constraint_statistics
+        Statistics about the constraints from previous solves
+    profile_origin
+        Origin of the active profiler in the main process,
+        or None if the solve isn't being profiled
+    """
+    global _worker_provider_registry, _worker_data_catalog, _worker_cache, _worker_profile_origin  # noqa: PLW0603
+    _worker_provider_registry = provider_registry
+    _worker_data_catalog = {
+        source_type: _read_worker_catalog(path) for source_type, path in catalog_paths.items()
+    }
+    _worker_cache = SolveCache(_worker_data_catalog, constraint_statistics=constraint_statistics)
+    _worker_profile_origin = profile_origin
+
+    try:
+        config = Config.default()
+        initialise_logging(
+            level=config.log_level,
+            format=config.log_format,
+            log_directory=config.paths.log,
+        )
+    except Exception as e:
+        # Don't raise an exception here as that would kill the process pool
+        logger.error(f"Failed to add log handler: {e}")
+
+
+@define
+class _WorkerResult:
+    """
+    The result of solving a diagnostic in a worker process
+    """
+
+    executions: list[DiagnosticExecution]
+    constraint_statistics: ConstraintStatistics
+    """
+    The constraint evaluations that were recorded while solving the diagnostic
+    """
+    profile: SolveProfiler | None
+    """
+    The stages that were recorded while solving the diagnostic, if the solve is being profiled
+    """
+
+
+def _solve_diagnostic_in_worker(
+    provider_slug: str, diagnostic_slug: str, changes: ChangedDatasets | None
+) -> _WorkerResult:
+    if _worker_provider_registry is None or _worker_cache is None:
+        raise RuntimeError("Solve worker has not been initialised")
+
+    provider = _worker_provider_registry.get(provider_slug)
+    diagnostic = provider.get(diagnostic_slug)
+
+    previous_statistics = copy.deepcopy(_worker_cache.constraint_statistics)
+    profiler = SolveProfiler(origin=_worker_profile_origin) if _worker_profile_origin is not None else None
+    with profiler.activate() if profiler is not None else contextlib.nullcontext():
+        executions = list(
+            solve_executions(_worker_data_catalog, diagnostic, provider, changes, _worker_cache)
+        )
+
+    return _WorkerResult(
+        executions=executions,
+        constraint_statistics=_worker_cache.constraint_statistics.difference(previous_statistics),
+        profile=profiler,
+    )
+
+
 @define
 class ExecutionSolver:
     """
@@ -306,31 +952,76 @@ class ExecutionSolver:
     data_catalog: dict[SourceDatasetType, pd.DataFrame]
 
     @staticmethod
-    def build_from_db(config: Config, db: Database) -> "ExecutionSolver":
+    def build_from_db(
+        config: Config,
+        db: Database,
+        filters: SolveFilterOptions | None = None,
+        provider_registry: ProviderRegistry | None = None,
+    ) -> "ExecutionSolver":
         """
         Initialise the solver using information from the database
 
+        The data catalogs are cached in `config.paths.cache`
+        and reused until the datasets in the database change.
+
         Parameters
         ----------
+        config
+            Configuration instance
         db
             Database instance
+        filters
+            Filters to limit the diagnostics that will be solved.
+
+            If provided, only the datasets that may be used by the matching diagnostics are loaded.
+            The resulting solver should only be used to solve using the same filters.
+        provider_registry
+            Registry of the providers to solve.
+
+            If not provided, the providers are loaded from the configuration.
 
         Returns
         -------
         :
             A new ExecutionSolver instance
         """
-        return ExecutionSolver(
-            provider_registry=ProviderRegistry.build_from_config(config, db),
-            data_catalog={
-                SourceDatasetType.CMIP6: CMIP6DatasetAdapter().load_catalog(db),
-                SourceDatasetType.obs4MIPs: Obs4MIPsDatasetAdapter().load_catalog(db),
-                SourceDatasetType.PMPClimatology: PMPClimatologyDatasetAdapter().load_catalog(db),
-            },
-        )
+        if provider_registry is None:
+            provider_registry = ProviderRegistry.build_from_config(config, db)
+        snapshot_dir = config.paths.cache / "catalog"
+
+        adapters: dict[SourceDatasetType, DatasetAdapter] = {
+            SourceDatasetType.CMIP6: CMIP6DatasetAdapter(),
+            SourceDatasetType.obs4MIPs: Obs4MIPsDatasetAdapter(),
+            SourceDatasetType.PMPClimatology: PMPClimatologyDatasetAdapter(),
+        }
+        catalog_filters = None
+        if filters is not None and (filters.diagnostic or filters.provider):
+            catalog_filters = find_catalog_filters(provider_registry, filters)
+
+        data_catalog = {}
+        for source_type, adapter in adapters.items():
+            if catalog_filters is not None and source_type not in catalog_filters:
+                logger.debug(f"Skipping {source_type.value} datasets as they are not required")
+                continue
+
+            with profile_stage("load_catalog", detail=source_type.value) as stage:
+                if catalog_filters is None:
+                    data_catalog[source_type] = adapter.load_catalog(db, snapshot_dir=snapshot_dir)
+                else:
+                    data_catalog[source_type] = adapter.load_catalog(
+                        db, snapshot_dir=snapshot_dir, filters=catalog_filters[source_type]
+                    )
+                    logger.debug(f"Loaded {len(data_catalog[source_type])} {source_type.value} datasets")
+                stage.rows_out = len(data_catalog[source_type])
+
+        return ExecutionSolver(provider_registry=provider_registry, data_catalog=data_catalog)
 
     def solve(
-        self, filters: SolveFilterOptions | None = None
+        self,
+        filters: SolveFilterOptions | None = None,
+        changes: Mapping[str, ChangedDatasets] | None = None,
+        n_workers: int = 1,
+        constraint_statistics: ConstraintStatistics | None = None,
     ) -> typing.Generator[DiagnosticExecution, None, None]:
         """
         Solve which executions need to be calculated for a dataset
@@ -339,21 +1030,417 @@ class ExecutionSolver:
         for each iteration we find all diagnostics that can be solved and calculate them.
         After each iteration we check if there are any more diagnostics to solve.
 
+        Parameters
+        ----------
+        filters
+            Filters to limit the diagnostics that are solved
+        changes
+            Datasets that have changed since each diagnostic was last solved,
+            keyed by the full slug of the diagnostic.
+
+            Only the executions that may be affected by these changes are yielded.
+            Diagnostics that are not included are solved in full.
+        n_workers
+            Number of processes used to solve the diagnostics in parallel.
+
+            Each diagnostic is solved in a separate task
+            and its executions are yielded as soon as the task completes,
+            so the order of the diagnostics may differ from a serial solve.
+            The data catalogs are written to a temporary directory that is shared by the processes.
+        constraint_statistics
+            Statistics about the constraints from previous solves.
+
+            These are used to reject groups early and are updated with the constraints
+            that are evaluated during the solve.
+
         Yields
         ------
         DiagnosticExecution
             A class containing the information related to the execution of a diagnostic
         """
+        diagnostics = []
         for provider in self.provider_registry.providers:
             for diagnostic in provider.diagnostics():
                 # Filter the diagnostic based on the provided filters
                 if not matches_filter(diagnostic, filters):
                     logger.debug(f"Skipping {diagnostic.full_slug()} due to filter")
                     continue
-                yield from solve_executions(self.data_catalog, diagnostic, provider)
+                diagnostics.append((provider, diagnostic))
+
+        def _changes_for(diagnostic: Diagnostic) -> ChangedDatasets | None:
+            return changes.get(diagnostic.full_slug()) if changes is not None else None
+
+        if constraint_statistics is None:
+            constraint_statistics = ConstraintStatistics()
+
+        if n_workers <= 1 or len(diagnostics) <= 1:
+            # The cache is shared by all the diagnostics in this solve
+            cache = SolveCache(self.data_catalog, constraint_statistics=constraint_statistics)
+            for provider, diagnostic in diagnostics:
+                yield from solve_executions(
+                    self.data_catalog, diagnostic, provider, _changes_for(diagnostic), cache
+                )
+            return
+
+        logger.info(f"Solving {len(diagnostics)} diagnostics using {n_workers} processes")
+        profiler = active_profiler()
+        with tempfile.TemporaryDirectory(prefix="ref-solve-") as catalog_dir:
+            catalog_paths = _write_worker_catalogs(self.data_catalog, pathlib.Path(catalog_dir))
+            pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_workers,
+                initializer=_init_solve_worker,
+                initargs=(
+                    self.provider_registry,
+                    catalog_paths,
+                    constraint_statistics,
+                    profiler.origin if profiler is not None else None,
+                ),
+                # Explicitly set the context to "spawn" to avoid issues with hanging on MacOS
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+            try:
+                futures = {
+                    pool.submit(
+                        _solve_diagnostic_in_worker,
+                        provider.slug,
+                        diagnostic.slug,
+                        _changes_for(diagnostic),
+                    ): (provider, diagnostic)
+                    for provider, diagnostic in diagnostics
+                }
+                # The executions of each diagnostic are yielded as soon as it has been solved
+                for future in concurrent.futures.as_completed(futures):
+                    provider, diagnostic = futures.pop(future)
+                    result = future.result()
+                    constraint_statistics.merge(result.constraint_statistics)
+                    if profiler is not None and result.profile is not None:
+                        profiler.merge(result.profile)
+                    for execution in result.executions:
+                        # Use the provider and diagnostic from this process rather than the copies
+                        yield evolve(execution, provider=provider, diagnostic=diagnostic)
+            finally:
+                pool.shutdown(wait=True, cancel_futures=True)
+
+    def find_changes(self, db: Database) -> dict[str, ChangedDatasets]:
+        """
+        Find the datasets that have changed since each diagnostic was last solved
+
+        Parameters
+        ----------
+        db
+            Database instance
+
+        Returns
+        -------
+        :
+            The changed datasets keyed by the full slug of the diagnostic.
+
+            Diagnostics that have not been solved previously are not included.
+            Diagnostics that have changed since they were last solved,
+            for example due to a new provider version, are also not included.
+        """
+        fingerprints = {
+            diagnostic.full_slug(): diagnostic_fingerprint(diagnostic)
+            for provider in self.provider_registry.providers
+            for diagnostic in provider.diagnostics()
+        }
+
+        with db.session.begin():
+            watermarks = {}
+            for diagnostic in db.session.query(DiagnosticModel).filter(
+                DiagnosticModel.solve_watermark.is_not(None)
+            ):
+                slug = diagnostic.full_slug()
+                if diagnostic.solve_watermark is None:
+                    continue
+                if diagnostic.solve_fingerprint != fingerprints.get(slug):
+                    logger.info(f"{slug} has changed since it was last solved and will be solved in full")
+                    continue
+                watermarks[slug] = diagnostic.solve_watermark
+
+            changes_by_watermark: dict[datetime.datetime, ChangedDatasets] = {}
+            for watermark in set(watermarks.values()):
+                # Timestamps may be truncated by the database so datasets updated
+                # at the same time as the watermark are also considered changed
+                changed_ids = pd.DataFrame(
+                    db.session.query(Dataset.id, Dataset.dataset_type)
+                    .filter(Dataset.updated_at >= watermark)
+                    .all(),
+                    columns=["id", "dataset_type"],
+                )
+                changes_by_watermark[watermark] = ChangedDatasets(
+                    {
+                        source_type: catalog[
+                            catalog.index.isin(
+                                changed_ids.loc[changed_ids["dataset_type"] == source_type, "id"]
+                            )
+                        ]
+                        for source_type, catalog in self.data_catalog.items()
+                    }
+                )
+                logger.debug(f"Found {len(changed_ids)} datasets that have changed since {watermark}")
+
+        return {slug: changes_by_watermark[watermark] for slug, watermark in watermarks.items()}
+
+
+def _record_solve_watermark(
+    db: Database,
+    provider_registry: ProviderRegistry,
+    filters: SolveFilterOptions | None,
+    watermark: datetime.datetime,
+) -> None:
+    """
+    Record the watermark against each of the diagnostics that were solved
+
+    The fingerprint of each diagnostic is also recorded
+    so that the watermark is ignored if the diagnostic changes.
+    """
+    solved = {
+        (provider.slug, diagnostic.slug): diagnostic_fingerprint(diagnostic)
+        for provider in provider_registry.providers
+        for diagnostic in provider.diagnostics()
+        if matches_filter(diagnostic, filters)
+    }
+
+    with db.session.begin():
+        for diagnostic_model in db.session.query(DiagnosticModel).join(DiagnosticModel.provider):
+            key = (diagnostic_model.provider.slug, diagnostic_model.slug)
+            if key in solved:
+                diagnostic_model.solve_watermark = watermark
+                diagnostic_model.solve_fingerprint = solved[key]
+
+
+SOLVE_BATCH_SIZE = 1000
+"""
+Maximum number of new executions that are written to the database in a single transaction
+
+The batch is also written once the solver moves on to a different diagnostic,
+so that the executions of a diagnostic are started without waiting for a full batch.
+"""
+
+
+@define
+class _ExecutionGroupState:
+    """
+    The state of an execution group that is tracked during a solve
+    """
+
+    id: int | None
+    dirty: bool
+    latest_hash: str | None
+    model: ExecutionGroup | None = None
+    """
+    The model of an execution group that was created during the solve
+    """
+
+    def should_run(self, slug: str, dataset_hash: str) -> bool:
+        """
+        Check if the execution group needs to be executed
+
+        This mirrors `ExecutionGroup.should_run` without requiring the executions to be loaded
+        """
+        if self.latest_hash is None:
+            logger.debug(f"Execution group {slug} was never executed")
+            return True
+
+        if self.latest_hash != dataset_hash:
+            logger.debug(f"Execution group {slug} hash mismatch: {self.latest_hash} != {dataset_hash}")
+            return True
+
+        if self.dirty:
+            logger.debug(f"Execution group {slug} is dirty")
+            return True
+
+        return False
+
+
+@define
+class _PendingExecution:
+    """
+    An execution that has been identified, but not yet written to the database
+    """
+
+    definition: ExecutionDefinition
+    execution_group: _ExecutionGroupState
+
+
+@define
+class _SolveState:
+    """
+    An in-memory copy of the diagnostics and execution groups in the database
+
+    This avoids querying the database for every candidate execution.
+    """
+
+    diagnostic_ids: dict[tuple[str, str], int]
+    execution_groups: dict[tuple[int, str], _ExecutionGroupState]
+    new_execution_groups: list[ExecutionGroup] = field(factory=list)
+
+    @staticmethod
+    def load(db: Database) -> "_SolveState":
+        """
+        Load the diagnostics and execution groups from the database
+
+        The hash of the latest execution for each execution group is also loaded.
+        """
+        latest_execution = (
+            db.session.query(
+                Execution.execution_group_id,
+                Execution.dataset_hash,
+                func.row_number()
+                .over(
+                    partition_by=Execution.execution_group_id,
+                    order_by=(Execution.created_at.desc(), Execution.id.desc()),
+                )
+                .label("row_number"),
+            )
+        ).subquery()
+
+        with db.session.begin():
+            diagnostic_ids = {
+                (provider_slug, diagnostic_slug): diagnostic_id
+                for diagnostic_id, diagnostic_slug, provider_slug in db.session.query(
+                    DiagnosticModel.id, DiagnosticModel.slug, ProviderModel.slug
+                ).join(DiagnosticModel.provider)
+            }
+            execution_groups = {
+                (diagnostic_id, key): _ExecutionGroupState(id=group_id, dirty=dirty, latest_hash=latest_hash)
+                for group_id, diagnostic_id, key, dirty, latest_hash in db.session.query(
+                    ExecutionGroup.id,
+                    ExecutionGroup.diagnostic_id,
+                    ExecutionGroup.key,
+                    ExecutionGroup.dirty,
+                    latest_execution.c.dataset_hash,
+                ).outerjoin(
+                    latest_execution,
+                    (latest_execution.c.execution_group_id == ExecutionGroup.id)
+                    & (latest_execution.c.row_number == 1),
+                )
+            }
+        logger.debug(f"Loaded {len(diagnostic_ids)} diagnostics and {len(execution_groups)} execution groups")
+
+        return _SolveState(diagnostic_ids=diagnostic_ids, execution_groups=execution_groups)
+
+    def get_diagnostic_id(self, db: Database, provider_slug: str, diagnostic_slug: str) -> int:
+        """
+        Get the id of a diagnostic
+        """
+        key = (provider_slug, diagnostic_slug)
+        if key not in self.diagnostic_ids:
+            # Fallback in case the diagnostic was registered after the state was loaded
+            with db.session.begin():
+                self.diagnostic_ids[key] = (
+                    db.session.query(DiagnosticModel.id)
+                    .join(DiagnosticModel.provider)
+                    .filter(ProviderModel.slug == provider_slug, DiagnosticModel.slug == diagnostic_slug)
+                    .one()
+                    .id
+                )
+        return self.diagnostic_ids[key]
+
+    def get_or_create_group(
+        self, diagnostic_id: int, key: str, selectors: dict[str, Selector]
+    ) -> tuple[_ExecutionGroupState, bool]:
+        """
+        Get an execution group, creating a new execution group if it doesn't exist
+
+        New execution groups are written to the database during the next call to `write`.
+
+        Returns
+        -------
+        :
+            The execution group and a flag indicating if the execution group was created
+        """
+        created = (diagnostic_id, key) not in self.execution_groups
+        if created:
+            model = ExecutionGroup(diagnostic_id=diagnostic_id, key=key, selectors=selectors, dirty=True)
+            self.new_execution_groups.append(model)
+            self.execution_groups[(diagnostic_id, key)] = _ExecutionGroupState(
+                id=None, dirty=True, latest_hash=None, model=model
+            )
+        return self.execution_groups[(diagnostic_id, key)], created
+
+    def is_up_to_date(self, diagnostic: Diagnostic, executions: Sequence[PlannedExecution]) -> bool:
+        """
+        Check if all the planned executions for a diagnostic have already been executed
+
+        Returns
+        -------
+        :
+            True if solving the diagnostic would not result in any new executions
+        """
+        diagnostic_id = self.diagnostic_ids.get((diagnostic.provider.slug, diagnostic.slug))
+        if diagnostic_id is None:
+            return False
+
+        for execution in executions:
+            execution_group = self.execution_groups.get((diagnostic_id, execution.key))
+            if execution_group is None or execution_group.should_run(
+                f"{diagnostic.full_slug()}/{execution.key}", execution.dataset_hash
+            ):
+                return False
+        return True
+
+    def write(self, db: Database, batch: Sequence[_PendingExecution], executor: Executor | None) -> None:
+        """
+        Write the new execution groups and executions to the database
+
+        The executions are then passed to the executor if one is provided.
+        This happens after the transaction has been committed,
+        so the executor can write the results of completed executions in its own transactions.
+        """
+        if not (batch or self.new_execution_groups):
+            return
+
+        # The models aren't expired when the transaction is committed,
+        # so that passing them to the executor doesn't start a new transaction to reload them
+        expire_on_commit = db.session.expire_on_commit
+        db.session.expire_on_commit = False
+        try:
+            executions = self._write_models(db, batch)
+
+            if executor is not None:
+                for execution, pending in zip(executions, batch):
+                    executor.run(
+                        definition=pending.definition,
+                        execution=execution,
+                    )
+        finally:
+            db.session.expire_on_commit = expire_on_commit
+
+    def _write_models(self, db: Database, batch: Sequence[_PendingExecution]) -> list[Execution]:
+        # Use a transaction to make sure that the models
+        # are created correctly before potentially executing out of process
+        with db.session.begin():
+            db.session.add_all(self.new_execution_groups)
+            db.session.flush()
+            for execution_group in self.new_execution_groups:
+                self.execution_groups[
+                    (execution_group.diagnostic_id, execution_group.key)
+                ].id = execution_group.id
+            self.new_execution_groups = []
+
+            executions = [
+                Execution(
+                    execution_group_id=pending.execution_group.id,
+                    dataset_hash=pending.definition.datasets.hash,
+                    output_fragment=str(pending.definition.output_fragment()),
+                )
+                for pending in batch
+            ]
+            db.session.add_all(executions)
+            db.session.flush()
+
+            # Add links to the datasets used in the executions
+            register_execution_datasets(
+                db,
+                [(execution, pending.definition.datasets) for execution, pending in zip(executions, batch)],
+            )
+            logger.debug(f"Created {len(executions)} new executions")
+        return executions
 
 
-def solve_required_executions(  # noqa: PLR0912, PLR0913
+def solve_required_executions(  # noqa: PLR0912, PLR0913, PLR0915
     db: Database,
     dry_run: bool = False,
     execute: bool = True,
@@ -363,6 +1450,8 @@ def solve_required_executions(  # noqa: PLR0912, PLR0913
     one_per_provider: bool = False,
     one_per_diagnostic: bool = False,
     filters: SolveFilterOptions | None = None,
+    incremental: bool = False,
+    solve_workers: int = 1,
 ) -> None:
     """
     Solve for executions that require recalculation
@@ -370,6 +1459,26 @@ def solve_required_executions(  # noqa: PLR0912, PLR0913
     This may trigger a number of additional calculations depending on what data has been ingested
     since the last solve.
 
+    After a successful solve, the most recent dataset update is recorded against each of the solved
+    diagnostics.
+    An incremental solve uses this watermark to only re-evaluate the diagnostics and groups
+    that may be affected by datasets that have been added or updated since.
+    Diagnostics that have not been solved previously, or that have changed since they were last solved
+    (for example, a new provider version or different data requirements), are always solved in full.
+
+    The candidate executions for each diagnostic that is solved in full are stored in
+    `config.paths.cache` (see [SolvePlanCache][climate_ref.solve_plan.SolvePlanCache]).
+    If the datasets and the diagnostic are unchanged on a subsequent solve
+    and all the stored executions are up to date, the diagnostic is not solved again.
+
+    The cost and rejection rate of the constraints are also stored in `config.paths.cache`
+    and used to reject groups of datasets early
+    (see [ConstraintStatistics][climate_ref.constraint_stats.ConstraintStatistics]).
+
+    Diagnostics can be solved in parallel using `solve_workers` processes.
+    The database writes and the execution of the diagnostics are always performed
+    by the current process.
+
     Raises
     ------
     TimeoutError
@@ -377,17 +1486,80 @@ def solve_required_executions(  # noqa: PLR0912, PLR0913
     """
     if config is None:
         config = Config.default()
-    if solver is None:
-        solver = ExecutionSolver.build_from_db(config, db)
+
+    provider_registry = (
+        solver.provider_registry if solver is not None else ProviderRegistry.build_from_config(config, db)
+    )
+    with profile_stage("db.load_state"):
+        state = None if dry_run else _SolveState.load(db)
+
+    # The plans must be fingerprinted before the data catalogs are loaded by the solver,
+    # so that a plan is never associated with datasets that weren't used to build it
+    plan_cache = None
+    diagnostics: dict[str, Diagnostic] = {}
+    up_to_date: set[str] = set()
+    if state is not None:
+        with profile_stage("db.fingerprint"):
+            plan_cache = SolvePlanCache.from_db(config.paths.cache / "solve_plan", db)
+        diagnostics = {
+            diagnostic.full_slug(): diagnostic
+            for provider in provider_registry.providers
+            for diagnostic in provider.diagnostics()
+            if matches_filter(diagnostic, filters)
+        }
+        for slug, diagnostic in diagnostics.items():
+            plan = plan_cache.load(diagnostic)
+            if plan is not None and state.is_up_to_date(diagnostic, plan):
+                up_to_date.add(slug)
+        if up_to_date:
+            logger.info(f"{len(up_to_date)} diagnostics are up to date with their previous solve")
+
+    # Plans are only stored if the data catalogs were loaded after the plans were fingerprinted
+    store_plans = plan_cache is not None and solver is None
+    if solver is None and not (diagnostics and up_to_date == diagnostics.keys()):
+        solver = ExecutionSolver.build_from_db(
+            config, db, filters=filters, provider_registry=provider_registry
+        )
 
     logger.info("Solving for diagnostics that require recalculation...")
 
+    # Read the watermark before solving so that any datasets ingested during the solve
+    # are picked up by the next incremental solve
+    with db.session.begin():
+        watermark = db.session.query(func.max(Dataset.updated_at)).scalar()
+
+    changes = None
+    if incremental and solver is not None:
+        changes = solver.find_changes(db)
+        logger.info(f"Incremental solve: {len(changes)} diagnostics have been solved previously")
+    if up_to_date:
+        # Diagnostics without any changes are not re-evaluated
+        changes = {**(changes or {}), **{slug: ChangedDatasets() for slug in up_to_date}}
+
+    # Only diagnostics that are solved in full can be used to create a plan
+    plans: dict[str, list[PlannedExecution]] = {
+        slug: [] for slug in diagnostics if store_plans and (changes is None or slug not in changes)
+    }
+
     executor = config.executor.build(config, db)
 
-    diagnostic_count = {}
-    provider_count = {}
+    diagnostic_count: dict[str, int] = {}
+    provider_count: dict[str, int] = {}
 
-    for potential_execution in solver.solve(filters):
+    batch: list[_PendingExecution] = []
+    batch_diagnostic: str | None = None
+
+    constraint_stats_path = config.paths.cache / "constraint_stats.json"
+    constraint_statistics = ConstraintStatistics.load(constraint_stats_path)
+
+    potential_executions = (
+        solver.solve(
+            filters, changes=changes, n_workers=solve_workers, constraint_statistics=constraint_statistics
+        )
+        if solver is not None
+        else ()
+    )
+    for potential_execution in potential_executions:
         # The diagnostic output is first written to the scratch directory
         definition = potential_execution.build_execution_definition(output_root=config.paths.scratch)
 
@@ -396,83 +1568,79 @@ def solve_required_executions(  # noqa: PLR0912, PLR0913
             f"for {potential_execution.diagnostic.full_slug()}"
         )
 
-        if potential_execution.provider.slug not in provider_count:
-            provider_count[potential_execution.provider.slug] = 0
-        if potential_execution.diagnostic.full_slug() not in diagnostic_count:
-            diagnostic_count[potential_execution.diagnostic.full_slug()] = 0
-
-        if dry_run:
-            provider_count[potential_execution.provider.slug] += 1
-            diagnostic_count[potential_execution.diagnostic.full_slug()] += 1
+        provider_slug = potential_execution.provider.slug
+        diagnostic_slug = potential_execution.diagnostic.full_slug()
+        if state is not None and batch and diagnostic_slug != batch_diagnostic:
+            # Start the executions of the previous diagnostic rather than waiting for a full batch
+            with profile_stage("db.write", rows_in=len(batch)):
+                state.write(db, batch, executor if execute else None)
+            batch = []
+        batch_diagnostic = diagnostic_slug
+        if provider_slug not in provider_count:
+            provider_count[provider_slug] = 0
+        if diagnostic_slug not in diagnostic_count:
+            diagnostic_count[diagnostic_slug] = 0
+        if diagnostic_slug in plans:
+            plans[diagnostic_slug].append(PlannedExecution(definition.key, definition.datasets.hash))
+
+        if state is None:
+            provider_count[provider_slug] += 1
+            diagnostic_count[diagnostic_slug] += 1
             continue
 
-        # Use a transaction to make sure that the models
-        # are created correctly before potentially executing out of process
-        with db.session.begin():
-            diagnostic = (
-                db.session.query(DiagnosticModel)
-                .join(DiagnosticModel.provider)
-                .filter(
-                    ProviderModel.slug == potential_execution.provider.slug,
-                    DiagnosticModel.slug == potential_execution.diagnostic.slug,
-                )
-                .one()
-            )
-            execution_group, created = db.get_or_create(
-                ExecutionGroup,
-                key=definition.key,
-                diagnostic_id=diagnostic.id,
-                defaults={
-                    "selectors": potential_execution.selectors,
-                    "dirty": True,
-                },
-            )
+        diagnostic_id = state.get_diagnostic_id(db, provider_slug, potential_execution.diagnostic.slug)
+        execution_group, created = state.get_or_create_group(
+            diagnostic_id, definition.key, selectors=potential_execution.selectors
+        )
+        if created:
+            logger.info(f"Created new execution group: {potential_execution.execution_slug()!r}")
 
-            if created:
-                logger.info(f"Created new execution group: {potential_execution.execution_slug()!r}")
-                db.session.flush()
+        # TODO: Move this logic to the solver
+        # Check if we should run given the one_per_provider or one_per_diagnostic flags
+        one_of_check_failed = (one_per_provider and provider_count.get(provider_slug, 0) > 0) or (
+            one_per_diagnostic and diagnostic_count.get(diagnostic_slug, 0) > 0
+        )
 
-            # TODO: Move this logic to the solver
-            # Check if we should run given the one_per_provider or one_per_diagnostic flags
-            one_of_check_failed = (
-                one_per_provider and provider_count.get(diagnostic.provider.slug, 0) > 0
-            ) or (one_per_diagnostic and diagnostic_count.get(diagnostic.full_slug(), 0) > 0)
+        logger.debug(
+            f"one_per_provider={one_per_provider}, one_per_diagnostic={one_per_diagnostic}, "
+            f"one_of_check_failed={one_of_check_failed}, diagnostic_count={diagnostic_count}, "
+            f"provider_count={provider_count}"
+        )
+
+        if execution_group.should_run(f"{diagnostic_slug}/{definition.key}", definition.datasets.hash):
+            if (one_per_provider or one_per_diagnostic) and one_of_check_failed:
+                logger.info(
+                    f"Skipping execution due to one-of check: {potential_execution.execution_slug()!r}"
+                )
+                continue
 
-            logger.debug(
-                f"one_per_provider={one_per_provider}, one_per_diagnostic={one_per_diagnostic}, "
-                f"one_of_check_failed={one_of_check_failed}, diagnostic_count={diagnostic_count}, "
-                f"provider_count={provider_count}"
+            logger.info(
+                f"Running new execution for execution group: {potential_execution.execution_slug()!r}"
             )
+            execution_group.latest_hash = definition.datasets.hash
+            batch.append(_PendingExecution(definition=definition, execution_group=execution_group))
 
-            if execution_group.should_run(definition.datasets.hash):
-                if (one_per_provider or one_per_diagnostic) and one_of_check_failed:
-                    logger.info(
-                        f"Skipping execution due to one-of check: {potential_execution.execution_slug()!r}"
-                    )
-                    continue
+            provider_count[provider_slug] += 1
+            diagnostic_count[diagnostic_slug] += 1
 
-                logger.info(
-                    f"Running new execution for execution group: {potential_execution.execution_slug()!r}"
-                )
-                execution = Execution(
-                    execution_group=execution_group,
-                    dataset_hash=definition.datasets.hash,
-                    output_fragment=str(definition.output_fragment()),
-                )
-                db.session.add(execution)
-                db.session.flush()
+        if len(batch) >= SOLVE_BATCH_SIZE:
+            with profile_stage("db.write", rows_in=len(batch)):
+                state.write(db, batch, executor if execute else None)
+            batch = []
 
-                # Add links to the datasets used in the execution
-                execution.register_datasets(db, definition.datasets)
+    if state is not None:
+        with profile_stage("db.write", rows_in=len(batch)):
+            state.write(db, batch, executor if execute else None)
 
-                if execute:
-                    executor.run(
-                        definition=definition,
-                        execution=execution,
-                    )
+    if plan_cache is not None:
+        for slug, planned_executions in plans.items():
+            plan_cache.save(diagnostics[slug], planned_executions)
+
+    if solver is not None:
+        constraint_statistics.save(constraint_stats_path)
 
-                provider_count[diagnostic.provider.slug] += 1
-                diagnostic_count[diagnostic.full_slug()] += 1
+    if not (dry_run or one_per_provider or one_per_diagnostic) and watermark is not None:
+        _record_solve_watermark(db, provider_registry, filters, watermark)
 
     logger.info("Solve complete")
     logger.info(f"Found {sum(diagnostic_count.values())} new executions")
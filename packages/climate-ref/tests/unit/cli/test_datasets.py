@@ -1,5 +1,6 @@
 from pathlib import Path
 
+import pandas as pd
 import pytest
 from sqlalchemy import select
 
@@ -133,6 +134,88 @@ class TestIngest:
 
         assert db.session.query(Dataset).count() == 2
 
+    def test_ingest_skip_unchanged(self, sample_data_dir, db, invoke_cli):
+        args = [
+            "--log-level",
+            "info",
+            "datasets",
+            "ingest",
+            str(sample_data_dir / self.data_dir / "Amon" / "tas"),
+            "--source-type",
+            "cmip6",
+        ]
+        invoke_cli(args)
+
+        result = invoke_cli(args)
+        assert "No new or modified files found" in result.stderr
+
+        result = invoke_cli([*args, "--no-skip-unchanged"])
+        assert "No new or modified files found" not in result.stderr
+        assert db.session.query(DatasetFile).count() == 1
+
+    def test_ingest_from_manifest(self, sample_data_dir, db, invoke_cli, tmp_path):
+        manifest_path = tmp_path / "manifest.csv"
+        files = sorted((sample_data_dir / self.data_dir).rglob("*.nc"))
+        pd.DataFrame({"path": [str(file) for file in files]}).to_csv(manifest_path, index=False)
+
+        args = [
+            "--log-level",
+            "info",
+            "datasets",
+            "ingest",
+            "--from-manifest",
+            str(manifest_path),
+            "--source-type",
+            "cmip6",
+        ]
+        invoke_cli(args)
+
+        assert db.session.query(DatasetFile).count() == len(files)
+
+        result = invoke_cli(args)
+        assert "No new or modified files found" in result.stderr
+
+    def test_ingest_include(self, sample_data_dir, db, invoke_cli):
+        invoke_cli(
+            [
+                "datasets",
+                "ingest",
+                str(sample_data_dir / "CMIP6"),
+                "--source-type",
+                "cmip6",
+                "--include",
+                "table_id=fx",
+                "--include",
+                "experiment_id=ssp126,historical",
+            ]
+        )
+
+        datasets = db.session.query(CMIP6Dataset).all()
+        assert len(datasets)
+        assert {dataset.table_id for dataset in datasets} == {"fx"}
+        assert {dataset.experiment_id for dataset in datasets} <= {"ssp126", "historical"}
+
+    def test_ingest_include_unknown_facet(self, sample_data_dir, db, invoke_cli):
+        result = invoke_cli(
+            [
+                "datasets",
+                "ingest",
+                str(sample_data_dir / "CMIP6"),
+                "--source-type",
+                "cmip6",
+                "--include",
+                "frequency=mon",
+            ],
+            expected_exit_code=1,
+        )
+
+        assert "Unable to filter cmip6 directories by ['frequency']" in result.stderr
+
+    def test_ingest_no_sources(self, db, invoke_cli):
+        result = invoke_cli(["datasets", "ingest", "--source-type", "cmip6"], expected_exit_code=1)
+
+        assert "No files or directories to ingest" in result.stderr
+
     def test_ingest_missing(self, sample_data_dir, db, invoke_cli):
         result = invoke_cli(
             [
@@ -147,6 +230,22 @@ class TestIngest:
         # Continues past the missing directory
         assert f"File or directory {sample_data_dir / 'missing'} does not exist" in result.stderr
 
+    def test_ingest_error(self, db, invoke_cli, mocker, tmp_path):
+        mocker.patch(
+            "climate_ref.cli.datasets.register_datasets",
+            side_effect=NotImplementedError("Removing files is not supported"),
+        )
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+
+        result = invoke_cli(
+            ["datasets", "ingest", str(tmp_path / "a"), str(tmp_path / "b"), "--source-type", "cmip6"]
+        )
+
+        # Continues past the source that failed to ingest
+        assert f"Error ingesting datasets from {tmp_path / 'a'}: Removing files" in result.stderr
+        assert f"Error ingesting datasets from {tmp_path / 'b'}: Removing files" in result.stderr
+
     def test_ingest_dryrun(self, sample_data_dir, db, invoke_cli):
         invoke_cli(
             [
@@ -17,6 +17,8 @@ class TestSolve:
         assert kwargs["execute"]
         assert kwargs["filters"].diagnostic is None
         assert kwargs["filters"].provider is None
+        assert not kwargs["incremental"]
+        assert kwargs["solve_workers"] == 1
 
     def test_solve_with_timeout(self, sample_data_dir, db, invoke_cli, mocker):
         mock_solve = mocker.patch("climate_ref.cli.solve.solve_required_executions")
@@ -49,3 +51,28 @@ class TestSolve:
         _args, kwargs = mock_solve.call_args
         assert kwargs["filters"].diagnostic == ["global-mean-timeseries"]
         assert kwargs["filters"].provider == ["esmvaltool", "ilamb"]
+
+    def test_solve_incremental(self, sample_data_dir, db, invoke_cli, mocker):
+        mock_solve = mocker.patch("climate_ref.cli.solve.solve_required_executions")
+        invoke_cli(["solve", "--incremental"])
+
+        _args, kwargs = mock_solve.call_args
+        assert kwargs["incremental"]
+
+    def test_solve_workers(self, sample_data_dir, db, invoke_cli, mocker):
+        mock_solve = mocker.patch("climate_ref.cli.solve.solve_required_executions")
+        invoke_cli(["solve", "--solve-workers", "4"])
+
+        _args, kwargs = mock_solve.call_args
+        assert kwargs["solve_workers"] == 4
+
+    def test_solve_profile(self, sample_data_dir, db, invoke_cli, mocker, tmp_path):
+        mock_solve = mocker.patch("climate_ref.cli.solve.solve_required_executions")
+        output = tmp_path / "trace.json"
+        result = invoke_cli(
+            ["solve", "--profile", "--profile-output", str(output), "--profile-format", "chrome"]
+        )
+
+        assert mock_solve.call_count == 1
+        assert "diagnostic" in result.stdout
+        assert "traceEvents" in output.read_text()
@@ -1,5 +1,6 @@
 import datetime
 
+import cftime
 import numpy as np
 import pandas as pd
 import pytest
@@ -11,7 +12,14 @@ from climate_ref.datasets.cmip6 import (
     _clean_branch_time,
     _parse_datetime,
 )
-from climate_ref.datasets.cmip6_parsers import parse_cmip6_complete, parse_cmip6_drs
+from climate_ref.datasets.cmip6_parsers import (
+    HEADER_KEYS,
+    _read_dataset,
+    parse_cmip6_complete,
+    parse_cmip6_drs,
+)
+from climate_ref_core.datasets import FacetFilter, SourceDatasetType
+from climate_ref_core.diagnostics import DataRequirement
 
 
 def test_parse_datetime():
@@ -32,6 +40,24 @@ def test_parse_exception(parsing_func):
     assert "TRACEBACK" in result
 
 
+def test_parse_complete_header_matches_xarray(sample_data_dir, mocker):
+    files = sorted(str(p) for p in (sample_data_dir / "CMIP6").rglob("*.nc"))
+    assert files
+
+    read_dataset = mocker.patch("climate_ref.datasets.cmip6_parsers._read_dataset", side_effect=_read_dataset)
+    from_header = [parse_cmip6_complete(file) for file in files]
+    read_dataset.assert_not_called()
+
+    # Force the fallback to xarray
+    mocker.patch("climate_ref.datasets.cmip6_parsers._read_header", side_effect=ValueError)
+    from_xarray = [parse_cmip6_complete(file) for file in files]
+
+    for header_info, xarray_info in zip(from_header, from_xarray):
+        assert "INVALID_ASSET" not in header_info
+        assert list(header_info) == list(xarray_info)
+        assert header_info == xarray_info
+
+
 def test_clean_branch_time():
     inp = pd.Series(["0D", "12", "12.0", "12.000", "12.0000", "12.00000", None, np.nan])
     exp = pd.Series([0.0, 12.0, 12.0, 12.0, 12.0, 12.0, np.nan, np.nan])
@@ -60,6 +86,91 @@ class TestCMIP6Adapter:
             df.sort_values(["instance_id", "start_time"]), basename=f"cmip6_catalog_db_{cmip6_parser}"
         )
 
+    def test_load_catalog_dtypes(self, db_seeded):
+        adapter = CMIP6DatasetAdapter()
+        df = adapter.load_catalog(db_seeded)
+
+        assert isinstance(df["instance_id"].dtype, pd.CategoricalDtype)
+        assert isinstance(df["source_id"].dtype, pd.CategoricalDtype)
+        assert df["version"].dtype == object
+        assert df["path"].dtype == object
+        assert df["start_time"].dtype == "datetime64[us]"
+        assert df["end_time"].dtype == "datetime64[us]"
+
+    @pytest.mark.parametrize(
+        "start_time",
+        [
+            pytest.param([cftime.Datetime360Day(2000, 2, 30), None], id="360_day"),
+            pytest.param([cftime.DatetimeNoLeap(2000, 2, 28), None], id="noleap"),
+            pytest.param(["2000-02-30", None], id="invalid-string"),
+        ],
+    )
+    def test_compact_catalog_calendars(self, start_time):
+        adapter = CMIP6DatasetAdapter()
+        catalog = pd.DataFrame(
+            {
+                "instance_id": ["CMIP6.a", "CMIP6.b"],
+                "start_time": pd.Series(start_time, dtype=object),
+                "end_time": [datetime.datetime(2000, 12, 1), None],
+            }
+        ).reindex(columns=[*adapter.dataset_specific_metadata, "start_time", "end_time"])
+
+        result = adapter._compact_catalog(catalog)
+
+        # Times that can't be represented as datetime64 are kept as they are
+        assert result["start_time"].dtype == object
+        assert result["start_time"].tolist() == start_time
+        assert result["end_time"].dtype == "datetime64[us]"
+        assert isinstance(result["instance_id"].dtype, pd.CategoricalDtype)
+
+    @pytest.mark.parametrize(
+        "filters",
+        [
+            (FacetFilter({"variable_id": "tas"}),),
+            (FacetFilter({"variable_id": ("tas", "pr"), "experiment_id": "historical"}),),
+            (FacetFilter({"frequency": "mon"}),),
+            (FacetFilter({"variable_id": "tas", "frequency": "mon"}), FacetFilter({"frequency": "fx"})),
+            (FacetFilter({"variable_id": "tas"}), FacetFilter({})),
+            (FacetFilter({"variable_id": "missing"}),),
+        ],
+    )
+    def test_load_catalog_filters(self, db_seeded, filters):
+        adapter = CMIP6DatasetAdapter()
+        expected = DataRequirement(
+            source_type=SourceDatasetType.CMIP6, filters=filters, group_by=None
+        ).apply_filters(adapter.load_catalog(db_seeded))
+
+        df = adapter.load_catalog(db_seeded, filters=filters)
+
+        if expected.empty:
+            assert df.empty
+        else:
+            pd.testing.assert_frame_equal(
+                df.sort_index(kind="stable"), expected.sort_index(kind="stable"), check_categorical=False
+            )
+
+    def test_load_catalog_filters_latest_version(self, config, db_seeded):
+        adapter = CMIP6DatasetAdapter()
+        data_catalog = adapter.load_catalog(db_seeded)
+        target_ds = "CMIP6.CMIP.CSIRO.ACCESS-ESM1-5.historical.r1i1p1f1.Amon.tas.gn.v20191115"
+        target_metadata = data_catalog[data_catalog["instance_id"] == target_ds].astype(object)
+
+        # A newer version with different metadata replaces the old version even if it isn't selected
+        target_metadata["version"] = "v20230101"
+        target_metadata["instance_id"] = target_ds.replace("v20191115", "v20230101")
+        target_metadata["frequency"] = "day"
+        with db_seeded.session.begin():
+            adapter.register_dataset(config, db_seeded, target_metadata)
+
+        df = adapter.load_catalog(
+            db_seeded, filters=(FacetFilter({"frequency": "mon", "variable_id": "tas"}),)
+        )
+        assert target_ds not in df.instance_id.tolist()
+
+    def test_load_catalog_filters_missing_facet(self, db_seeded):
+        with pytest.raises(KeyError, match="Facet 'missing' not in data catalog columns"):
+            CMIP6DatasetAdapter().load_catalog(db_seeded, filters=(FacetFilter({"missing": "tas"}),))
+
     def test_load_catalog_multiple_versions(self, config, db_seeded, catalog_regression, sample_data_dir):
         adapter = CMIP6DatasetAdapter()
         data_catalog = adapter.load_catalog(db_seeded)
@@ -91,6 +202,22 @@ class TestCMIP6Adapter:
         assert target_ds not in latest_instance_ids
         assert new_instance_id in latest_instance_ids
 
+        # The catalog of datasets should also only include the latest version
+        latest_datasets = adapter.load_catalog(db_seeded, include_files=False)
+        assert latest_datasets.instance_id.is_unique
+        assert target_ds not in latest_datasets.instance_id.tolist()
+        assert new_instance_id in latest_datasets.instance_id.tolist()
+        assert set(latest_datasets.index) == set(latest_data_catalog.index)
+
+    def test_load_catalog_limit(self, db_seeded):
+        adapter = CMIP6DatasetAdapter()
+        data_catalog = adapter.load_catalog(db_seeded)
+
+        limited = adapter.load_catalog(db_seeded, limit=5)
+        assert len(limited) == 5
+        assert limited.columns.tolist() == data_catalog.columns.tolist()
+        assert set(limited.path).issubset(set(data_catalog.path))
+
     @pytest.mark.parametrize("cmip6_parser", ["complete", "drs"])
     def test_round_trip(self, cmip6_parser, config, sample_data_dir):
         config.cmip6_parser = cmip6_parser
@@ -110,8 +237,12 @@ class TestCMIP6Adapter:
             .reset_index(drop=True)
         )
 
+        # The catalog from the database uses categorical and datetime64 columns
         db_data_catalog = (
-            adapter.load_catalog(database).sort_values(["instance_id", "start_time"]).reset_index(drop=True)
+            adapter.load_catalog(database)
+            .astype(object)
+            .sort_values(["instance_id", "start_time"])
+            .reset_index(drop=True)
         )
 
         pd.testing.assert_frame_equal(
@@ -144,6 +275,47 @@ class TestCMIP6Adapter:
             basename=f"cmip6_catalog_local_{cmip6_parser}",
         )
 
+    def test_load_local_datasets_parse_cache(self, config, sample_data_dir, mocker):
+        config.cmip6_parser = "complete"
+        adapter = CMIP6DatasetAdapter(config=config)
+        data_catalog = adapter.find_local_datasets(sample_data_dir / "CMIP6")
+
+        # The metadata is read from the cache rather than opening the files again
+        mock_open = mocker.patch("climate_ref.datasets.cmip6_parsers.xr.open_dataset")
+        mock_header = mocker.patch("climate_ref.datasets.cmip6_parsers.netCDF4.Dataset")
+        cached_catalog = adapter.find_local_datasets(sample_data_dir / "CMIP6")
+
+        mock_open.assert_not_called()
+        mock_header.assert_not_called()
+        pd.testing.assert_frame_equal(cached_catalog, data_catalog, check_dtype=False)
+
+    def test_parse_manifest(self, config, sample_data_dir, mocker):
+        config.cmip6_parser = "complete"
+        adapter = CMIP6DatasetAdapter(config=config)
+        files = adapter.find_files(sample_data_dir / "CMIP6")
+        expected = adapter.parse_files(files)
+
+        # A manifest containing the metadata of each file, e.g. from an intake-esm catalog
+        manifest = pd.DataFrame([parse_cmip6_complete(file) for file in files])[[*HEADER_KEYS, "path"]]
+
+        mock_open = mocker.patch("climate_ref.datasets.cmip6_parsers.xr.open_dataset")
+        mock_header = mocker.patch("climate_ref.datasets.cmip6_parsers.netCDF4.Dataset")
+        data_catalog = adapter.parse_manifest(manifest)
+
+        mock_open.assert_not_called()
+        mock_header.assert_not_called()
+        pd.testing.assert_frame_equal(data_catalog, expected, check_like=True, check_dtype=False)
+
+    def test_parse_manifest_missing_metadata(self, config, sample_data_dir, mocker):
+        config.cmip6_parser = "complete"
+        adapter = CMIP6DatasetAdapter(config=config)
+        files = adapter.find_files(sample_data_dir / "CMIP6")
+        mock_parse_files = mocker.patch.object(adapter, "parse_files")
+
+        manifest = pd.DataFrame({"path": files, "variable_id": "tas"})
+        assert adapter.parse_manifest(manifest) == mock_parse_files.return_value
+        mock_parse_files.assert_called_once_with(files)
+
 
 def test_apply_fixes():
     df = pd.DataFrame(
@@ -168,3 +340,107 @@ def test_apply_fixes():
         }
     )
     pd.testing.assert_frame_equal(res, exp)
+
+
+def _reference_parse_datetime(dt_str: pd.Series) -> pd.Series:
+    # Row-wise implementation that the vectorised version replaced
+    def _inner(date_string):
+        if not date_string or pd.isnull(date_string):
+            return None
+        for fmt in ("%Y-%m-%d", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f"):
+            try:
+                return datetime.datetime.strptime(date_string, fmt)
+            except ValueError:
+                continue
+        return None
+
+    return pd.Series([_inner(dt) for dt in dt_str], index=dt_str.index, dtype="object")
+
+
+def _reference_postprocess(catalog: pd.DataFrame) -> pd.DataFrame:
+    # Row-wise implementation of `CMIP6DatasetAdapter._postprocess` that the vectorised version replaced
+    adapter = CMIP6DatasetAdapter()
+    drs_items = [*adapter.dataset_id_metadata, adapter.version_metadata]
+
+    datasets = catalog.drop(["init_year"], axis=1)
+    datasets["start_time"] = _reference_parse_datetime(datasets["start_time"])
+    datasets["end_time"] = _reference_parse_datetime(datasets["end_time"])
+    datasets["instance_id"] = datasets.apply(
+        lambda row: "CMIP6." + ".".join([row[item] for item in drs_items]), axis=1
+    )
+    missing_columns = set(adapter.dataset_specific_metadata + adapter.file_specific_metadata) - set(
+        datasets.columns
+    )
+    for column in missing_columns:
+        datasets[column] = pd.NA
+
+    def _fix_parent_variant_label(group):
+        if group["parent_variant_label"].nunique() == 1:
+            return group
+        group["parent_variant_label"] = group["parent_variant_label"].iloc[0]
+        return group
+
+    datasets = (
+        datasets.groupby("instance_id")
+        .apply(_fix_parent_variant_label, include_groups=False)
+        .reset_index(level="instance_id")
+    )
+    datasets["branch_time_in_child"] = _clean_branch_time(datasets["branch_time_in_child"])
+    datasets["branch_time_in_parent"] = _clean_branch_time(datasets["branch_time_in_parent"])
+    return datasets
+
+
+def _synthetic_catalog(n_datasets: int, files_per_dataset: int = 5, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    drs_items = [*CMIP6DatasetAdapter.dataset_id_metadata, CMIP6DatasetAdapter.version_metadata]
+    n_rows = n_datasets * files_per_dataset
+    dataset = np.repeat(np.arange(n_datasets), files_per_dataset)
+
+    catalog = pd.DataFrame({item: [f"{item}{i % 97}" for i in dataset] for item in drs_items})
+    catalog["version"] = [f"v{i}" for i in dataset]
+    catalog["init_year"] = np.nan
+    years = rng.integers(1, 2500, n_rows)
+    formats = rng.integers(0, 3, n_rows)
+    catalog["start_time"] = [
+        [f"{year:04d}-01-16", f"{year:04d}-01-16 12:00:00", f"{year:04d}-01-16 12:00:00.500000"][fmt]
+        for year, fmt in zip(years, formats)
+    ]
+    catalog["end_time"] = [f"{year:04d}-12-16 12:00:00" for year in years]
+    catalog.loc[rng.random(n_rows) < 0.01, "end_time"] = None
+
+    # Some datasets have files with inconsistent parent variant labels
+    catalog["parent_variant_label"] = np.where(rng.random(n_rows) < 0.05, "r2i1p1f1", "r1i1p1f1")
+    catalog.loc[rng.random(n_rows) < 0.01, "parent_variant_label"] = None
+    return catalog
+
+
+def _compare(catalog: pd.DataFrame, expected: pd.DataFrame) -> None:
+    pd.testing.assert_frame_equal(
+        catalog.sort_index(),
+        expected.sort_index(),
+        check_like=True,
+    )
+
+
+@pytest.mark.parametrize(
+    "values",
+    [
+        ["2000-01-16", "2000-01-16 12:00:00", "2000-01-16 12:00:00.5", "0850-01-01", "2300-12-16"],
+        # 30th February only exists in a 360-day calendar
+        ["2000-02-30", "2000-01-16", None, ""],
+        ["16/01/2000", "2000-1-16", np.nan],
+        [None, None],
+        [],
+    ],
+)
+def test_parse_datetime_matches_reference(values):
+    dt_str = pd.Series(values, dtype="object", index=range(10, 10 + len(values)))
+
+    pd.testing.assert_series_equal(_parse_datetime(dt_str), _reference_parse_datetime(dt_str))
+
+
+@pytest.mark.parametrize("n_datasets", [500, pytest.param(20_000, marks=pytest.mark.slow)])
+def test_postprocess_matches_reference(n_datasets):
+    catalog = _synthetic_catalog(n_datasets)
+
+    _compare(CMIP6DatasetAdapter()._postprocess(catalog), _reference_postprocess(catalog))
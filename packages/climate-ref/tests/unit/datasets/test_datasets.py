@@ -263,6 +263,26 @@ def test_register_dataset_updates_and_adds_without_removal(monkeypatch, test_db)
     assert f2_file.end_time == pd.Timestamp("2001-12-31")
 
 
+def test_register_dataset_missing_times(test_db):
+    adapter, config, db = test_db
+    df = _mk_df(
+        rows=[
+            {"path": "fx.nc", "start_time": None, "end_time": None},
+            {"path": "f1.nc", "start_time": pd.Timestamp("1850-01-01"), "end_time": None},
+        ]
+    )
+
+    with db.session.begin():
+        adapter.register_dataset(config=config, db=db, data_catalog_dataset=df)
+    with db.session.begin():
+        result = adapter.register_dataset(config=config, db=db, data_catalog_dataset=df)
+
+    # Missing time bounds are equal to each other
+    assert result.dataset_state is None
+    assert set(result.files_unchanged) == {"fx.nc", "f1.nc"}
+    assert result.total_changes == 0
+
+
 def test_register_dataset_raises_on_removal(monkeypatch, test_db):
     adapter, config, db = test_db
 
@@ -374,3 +394,167 @@ def test_register_dataset_updates_dataset_metadata(monkeypatch, test_db):
     dataset = db.session.query(CMIP6Dataset).filter_by(slug="CESM2.tas.gn").first()
     assert dataset is not None
     assert dataset.grid_label == "gr2"
+
+
+def _file_rows(files):
+    return [
+        {
+            "path": str(path),
+            "start_time": pd.Timestamp("2001-01-01"),
+            "end_time": pd.Timestamp("2001-12-31"),
+        }
+        for path in files
+    ]
+
+
+def test_register_dataset_skipped_files(test_db, tmp_path):
+    adapter, config, db = test_db
+
+    (tmp_path / "a").mkdir()
+    (tmp_path / "b").mkdir()
+    paths = [tmp_path / "a" / f"f{i}.nc" for i in range(3)]
+    other_path = tmp_path / "b" / "f.nc"
+    for path in [*paths, other_path]:
+        path.write_text("data")
+
+    with db.session.begin():
+        adapter.register_dataset(
+            config=config, db=db, data_catalog_dataset=_mk_df(rows=_file_rows(paths[:2]))
+        )
+        adapter.register_dataset(
+            config=config,
+            db=db,
+            data_catalog_dataset=_mk_df(instance_id="CESM2.pr.gn", rows=_file_rows([other_path])),
+        )
+
+    with db.session.begin():
+        dataset_file = db.session.query(DatasetFile).filter_by(path=str(paths[0])).one()
+        assert dataset_file.size == len("data")
+        assert dataset_file.mtime_ns == paths[0].stat().st_mtime_ns
+
+    candidates = [str(path) for path in [*paths, other_path]]
+    assert adapter.find_changed_files(db, [str(other_path)]) == []
+
+    # The new file is parsed with the other files in its directory
+    assert adapter.find_changed_files(db, candidates) == [str(path) for path in paths]
+
+    # The files that weren't parsed are unchanged rather than removed
+    with db.session.begin():
+        result = adapter.register_dataset(
+            config=config, db=db, data_catalog_dataset=_mk_df(rows=_file_rows(paths[2:]))
+        )
+    assert result.files_added == [str(paths[2])]
+    assert set(result.files_unchanged) == {str(paths[0]), str(paths[1])}
+    assert adapter.find_changed_files(db, candidates) == []
+
+    # Modified files are parsed again with the other files of the dataset
+    paths[1].write_text("modified data")
+    assert adapter.find_changed_files(db, candidates) == [str(path) for path in paths]
+
+
+def test_find_changed_files_dataset(test_db, tmp_path):
+    adapter, config, db = test_db
+
+    # The files of the dataset are in different directories
+    paths = [tmp_path / "a" / "f.nc", tmp_path / "b" / "f.nc"]
+    for path in paths:
+        path.parent.mkdir()
+        path.write_text("data")
+
+    with db.session.begin():
+        adapter.register_dataset(config=config, db=db, data_catalog_dataset=_mk_df(rows=_file_rows(paths)))
+
+    paths[1].write_text("modified data")
+    changed_files = adapter.find_changed_files(db, [str(path) for path in paths])
+    assert changed_files == [str(path) for path in paths]
+
+    with db.session.begin():
+        result = adapter.register_dataset(
+            config=config, db=db, data_catalog_dataset=_mk_df(rows=_file_rows(changed_files))
+        )
+    assert result.files_added == []
+    assert set(result.files_unchanged) == {str(path) for path in paths}
+    assert adapter.find_changed_files(db, [str(path) for path in paths]) == []
+
+
+def test_find_changed_files_unfinalised(test_db, tmp_path):
+    adapter, config, db = test_db
+
+    path = tmp_path / "f.nc"
+    path.write_text("data")
+    df = _mk_df(rows=[{"path": str(path), "start_time": None, "end_time": None}])
+    df["finalised"] = False
+    adapter.dataset_specific_metadata = (*adapter.dataset_specific_metadata, "finalised")
+
+    with db.session.begin():
+        adapter.register_dataset(config=config, db=db, data_catalog_dataset=df)
+
+    adapter.config.cmip6_parser = "drs"
+    assert adapter.find_changed_files(db, [str(path)]) == []
+
+    # The complete parser would finalise the dataset
+    adapter.config.cmip6_parser = "complete"
+    assert adapter.find_changed_files(db, [str(path)]) == [str(path)]
+
+
+def test_register_data_catalog(test_db):
+    adapter, config, db = test_db
+
+    def _rows(*paths, start="2001-01-01"):
+        return [
+            {"path": path, "start_time": pd.Timestamp(start), "end_time": pd.Timestamp("2001-12-31")}
+            for path in paths
+        ]
+
+    with db.session.begin():
+        initial = adapter.register_data_catalog(
+            config,
+            db,
+            pd.concat(
+                [
+                    _mk_df(instance_id="CESM2.tas.gn", rows=_rows("tas_1.nc", "tas_2.nc")),
+                    _mk_df(instance_id="CESM2.pr.gn", rows=_rows("pr_1.nc")),
+                ],
+                ignore_index=True,
+            ),
+        )
+        # The datasets are expired once the transaction is committed
+        assert [result.dataset.slug for result in initial] == ["CESM2.tas.gn", "CESM2.pr.gn"]
+    assert [result.dataset_state for result in initial] == [ModelState.CREATED, ModelState.CREATED]
+    assert set(initial[0].files_added) == {"tas_1.nc", "tas_2.nc"}
+    assert initial[1].files_added == ["pr_1.nc"]
+
+    with db.session.begin():
+        results = adapter.register_data_catalog(
+            config,
+            db,
+            pd.concat(
+                [
+                    _mk_df(instance_id="CESM2.pr.gn", rows=_rows("pr_1.nc")),
+                    _mk_df(
+                        instance_id="CESM2.tas.gn",
+                        rows=_rows("tas_1.nc") + _rows("tas_2.nc", start="2001-02-01"),
+                    ),
+                    _mk_df(instance_id="CESM2.ts.gn", rows=_rows("ts_1.nc")),
+                ],
+                ignore_index=True,
+            ),
+        )
+
+    pr, tas, ts = results
+    assert pr.dataset_state is None
+    assert pr.files_unchanged == ["pr_1.nc"]
+    assert pr.total_changes == 0
+
+    assert tas.dataset_state == ModelState.UPDATED
+    assert tas.files_updated == ["tas_2.nc"]
+    assert tas.files_unchanged == ["tas_1.nc"]
+
+    assert ts.dataset_state == ModelState.CREATED
+    assert ts.files_added == ["ts_1.nc"]
+
+    with db.session.begin():
+        assert db.session.query(CMIP6Dataset).count() == 3
+        assert db.session.query(DatasetFile).count() == 4
+        tas_2 = db.session.query(DatasetFile).filter_by(path="tas_2.nc").one()
+        assert tas_2.start_time == pd.Timestamp("2001-02-01")
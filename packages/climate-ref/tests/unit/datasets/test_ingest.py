@@ -0,0 +1,167 @@
+import pandas as pd
+import pytest
+
+from climate_ref.datasets.cmip6 import CMIP6DatasetAdapter
+from climate_ref.datasets.ingest import (
+    IngestStats,
+    batch_files,
+    batch_manifest,
+    parse_datasets,
+    register_datasets,
+)
+from climate_ref.models.dataset import CMIP6Dataset, DatasetFile
+
+
+def test_batch_files():
+    files = ["b/3.nc", "a/1.nc", "a/2.nc", "c/4.nc", "c/5.nc", "c/6.nc"]
+
+    assert list(batch_files(files, batch_size=2)) == [
+        ["a/1.nc", "a/2.nc"],
+        ["b/3.nc", "c/4.nc", "c/5.nc", "c/6.nc"],
+    ]
+    assert list(batch_files(files, batch_size=100)) == [sorted(files)]
+    assert list(batch_files([], batch_size=2)) == []
+
+
+@pytest.mark.parametrize("n_workers", [1, 2])
+def test_parse_datasets(sample_data_dir, n_workers):
+    adapter = CMIP6DatasetAdapter()
+    files = adapter.find_files(sample_data_dir / "CMIP6")
+
+    catalogs = list(parse_datasets(adapter, files, n_workers=n_workers, batch_size=10))
+    assert len(catalogs) > 1
+
+    # Each dataset is parsed in a single batch
+    slugs = [slug for catalog in catalogs for slug in catalog["instance_id"].unique()]
+    assert len(slugs) == len(set(slugs))
+
+    expected = adapter.find_local_datasets(sample_data_dir / "CMIP6")
+    catalog = pd.concat(catalogs).sort_values("path").reset_index(drop=True)
+    pd.testing.assert_frame_equal(
+        catalog,
+        expected.sort_values("path").reset_index(drop=True),
+        check_like=True,
+        check_dtype=False,
+    )
+
+
+def test_parse_datasets_error(sample_data_dir, mocker, caplog):
+    adapter = CMIP6DatasetAdapter()
+    files = adapter.find_files(sample_data_dir / "CMIP6")
+    batches = []
+
+    def _parse_files(batch):
+        batches.append(batch)
+        if len(batches) == 1:
+            raise ValueError("bad batch")
+        return pd.DataFrame()
+
+    mocker.patch.object(adapter, "parse_files", side_effect=_parse_files)
+
+    catalogs = list(parse_datasets(adapter, files, batch_size=10))
+
+    # The remaining batches are still parsed
+    assert len(batches) > 1
+    assert len(catalogs) == len(batches) - 1
+    assert "bad batch" in caplog.text
+
+
+def test_register_datasets(sample_data_dir, config, db):
+    adapter = CMIP6DatasetAdapter(config=config)
+    files = adapter.find_files(sample_data_dir / "CMIP6")
+    validated = []
+
+    stats = register_datasets(
+        adapter,
+        config,
+        db,
+        parse_datasets(adapter, files, batch_size=10),
+        on_validated=validated.append,
+    )
+
+    n_datasets = sum(catalog["instance_id"].nunique() for catalog in validated)
+    assert stats.created_datasets == n_datasets
+    assert stats.created_files == len(files)
+    with db.session.begin():
+        assert db.session.query(CMIP6Dataset).count() == n_datasets
+        assert db.session.query(DatasetFile).count() == len(files)
+
+    # Registering the same datasets again doesn't add anything
+    stats = register_datasets(adapter, config, db, parse_datasets(adapter, files, batch_size=10))
+    assert stats.created_datasets == 0
+    assert stats.created_files == 0
+    assert stats.unchanged_files == len(files)
+
+
+def test_register_datasets_dry_run(sample_data_dir, config, db):
+    adapter = CMIP6DatasetAdapter(config=config)
+    files = adapter.find_files(sample_data_dir / "CMIP6")
+
+    stats = register_datasets(adapter, config, db, parse_datasets(adapter, files), dry_run=True)
+
+    assert stats == IngestStats()
+    with db.session.begin():
+        assert db.session.query(CMIP6Dataset).count() == 0
+
+
+def test_ingest_stats_str():
+    stats = IngestStats(created_datasets=1, unchanged_datasets=2, created_files=3, unchanged_files=4)
+
+    assert str(stats) == (
+        "Datasets: 1/0/2 (created/updated/unchanged), Files: 3/0/0/4 (created/updated/removed/unchanged)"
+    )
+
+
+def test_batch_manifest():
+    manifest = pd.DataFrame({"path": ["b/3.nc", "a/1.nc", "a/2.nc", "c/4.nc"], "size": [3, 1, 2, 4]})
+
+    batches = list(batch_manifest(manifest, batch_size=2))
+
+    assert [batch["path"].tolist() for batch in batches] == [["a/1.nc", "a/2.nc"], ["b/3.nc", "c/4.nc"]]
+    assert [batch["size"].tolist() for batch in batches] == [[1, 2], [3, 4]]
+
+
+def test_register_datasets_from_manifest(sample_data_dir, config, db, mocker):
+    adapter = CMIP6DatasetAdapter(config=config)
+    files = adapter.find_files(sample_data_dir / "CMIP6")
+    manifest = pd.DataFrame(
+        {
+            "path": files,
+            "size": pd.array(range(len(files)), dtype="Int64"),
+            "mtime_ns": pd.array(range(len(files)), dtype="Int64"),
+        }
+    )
+
+    # The files aren't accessed to get their size and modification time
+    mock_fingerprint = mocker.patch("climate_ref.datasets.base.file_fingerprint")
+    stats = register_datasets(adapter, config, db, parse_datasets(adapter, manifest, batch_size=10))
+
+    mock_fingerprint.assert_not_called()
+    assert stats.created_files == len(files)
+    with db.session.begin():
+        registered = dict(db.session.query(DatasetFile.path, DatasetFile.size).all())
+    assert registered == dict(zip(files, range(len(files))))
+
+    # The fingerprints from the manifest are used to find the changed files
+    assert adapter.find_changed_files(db, files, fingerprints={files[0]: (0, 0)}) == files[1:]
+
+
+def test_batch_files_stream():
+    # Files from an iterator are batched as they are produced rather than being sorted
+    files = iter(["b/3.nc", "b/4.nc", "a/1.nc", "a/2.nc", "c/5.nc"])
+
+    assert list(batch_files(files, batch_size=2)) == [["b/3.nc", "b/4.nc"], ["a/1.nc", "a/2.nc"], ["c/5.nc"]]
+
+
+def test_parse_datasets_file_filter(sample_data_dir):
+    adapter = CMIP6DatasetAdapter()
+    files = adapter.iter_files(sample_data_dir / "CMIP6")
+    selected = []
+
+    def _file_filter(batch):
+        selected.extend(batch[:1])
+        return batch[:1]
+
+    catalogs = list(parse_datasets(adapter, files, batch_size=10, file_filter=_file_filter))
+
+    assert sorted(path for catalog in catalogs for path in catalog["path"]) == sorted(selected)
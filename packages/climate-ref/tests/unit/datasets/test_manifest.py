@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from climate_ref.datasets.manifest import (
+    add_fingerprints,
+    known_fingerprints,
+    manifest_fingerprints,
+    read_manifest,
+)
+
+
+def test_read_manifest(tmp_path):
+    manifest_path = tmp_path / "manifest.csv"
+    pd.DataFrame(
+        {
+            "path": ["a/1.nc", "/data/b/2.nc", "a/1.nc", None],
+            "size": [10, None, 10, 1],
+            "mtime": [1.5, 2.0, 1.5, 1.0],
+            "variable_id": ["tas", "pr", "tas", "tas"],
+        }
+    ).to_csv(manifest_path, index=False)
+
+    manifest = read_manifest(manifest_path)
+
+    assert manifest["path"].tolist() == [str(tmp_path / "a" / "1.nc"), "/data/b/2.nc"]
+    assert manifest["size"].tolist() == [10, pd.NA]
+    assert manifest["mtime_ns"].tolist() == [1_500_000_000, 2_000_000_000]
+    assert manifest["variable_id"].tolist() == ["tas", "pr"]
+    assert "mtime" not in manifest.columns
+
+
+def test_read_manifest_missing_path(tmp_path):
+    manifest_path = tmp_path / "manifest.csv"
+    pd.DataFrame({"file": ["a/1.nc"]}).to_csv(manifest_path, index=False)
+
+    with pytest.raises(ValueError, match="does not contain a 'path' column"):
+        read_manifest(manifest_path)
+
+
+def test_fingerprints():
+    manifest = pd.DataFrame(
+        {
+            "path": ["/a/1.nc", "/a/2.nc", "/a/3.nc"],
+            "size": pd.array([10, None, 30], dtype="Int64"),
+            "mtime_ns": pd.array([100, 200, 300], dtype="Int64"),
+        }
+    )
+    assert manifest_fingerprints(manifest) == {"/a/1.nc": (10, 100), "/a/3.nc": (30, 300)}
+    assert manifest_fingerprints(manifest[["path"]]) == {}
+
+    data_catalog = pd.DataFrame({"path": ["/a/3.nc", "/a/2.nc", "/a/4.nc"], "variable_id": "tas"})
+    assert known_fingerprints(data_catalog) == [None, None, None]
+
+    data_catalog = add_fingerprints(data_catalog, manifest)
+    assert known_fingerprints(data_catalog) == [(30, 300), None, None]
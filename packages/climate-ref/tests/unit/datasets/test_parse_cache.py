@@ -0,0 +1,69 @@
+import numpy as np
+
+from climate_ref.datasets import parse_cache
+from climate_ref.datasets.cmip6_parsers import parse_cmip6_complete, parse_cmip6_drs
+from climate_ref.datasets.parse_cache import ParseCache, parser_key
+
+
+def test_parser_key():
+    assert parser_key(parse_cmip6_complete).startswith(
+        "climate_ref.datasets.cmip6_parsers.parse_cmip6_complete:"
+    )
+    assert parser_key(parse_cmip6_complete) != parser_key(parse_cmip6_drs)
+
+
+def test_parser_key_schema_version(monkeypatch):
+    key = parser_key(parse_cmip6_complete)
+    monkeypatch.setattr(parse_cache, "PARSER_SCHEMA_VERSION", parse_cache.PARSER_SCHEMA_VERSION + 1)
+
+    assert parser_key(parse_cmip6_complete) != key
+
+
+def test_round_trip(tmp_path):
+    cache = ParseCache(tmp_path / "cache" / "parse_cache.sqlite")
+    path = tmp_path / "file.nc"
+    path.write_text("data")
+
+    assert cache.get([str(path)], "parser") == {}
+
+    metadata = {"variable_id": "tas", "vertical_levels": np.int32(1), "branch_time": np.float64(0.5)}
+    cache.put([(str(path), metadata)], "parser")
+
+    assert cache.get([str(path)], "parser") == {
+        str(path): {"variable_id": "tas", "vertical_levels": 1, "branch_time": 0.5}
+    }
+    assert cache.get([str(path)], "other-parser") == {}
+
+
+def test_many_files(tmp_path):
+    cache = ParseCache(tmp_path / "parse_cache.sqlite")
+    paths = []
+    for i in range(2000):
+        path = tmp_path / f"file_{i}.nc"
+        path.write_text("data")
+        paths.append(str(path))
+    cache.put([(path, {"variable_id": "tas"}) for path in paths[::2]], "parser")
+
+    # More paths than the limit on the number of parameters in a SQLite query
+    assert cache.get([*paths, *paths], "parser") == {path: {"variable_id": "tas"} for path in paths[::2]}
+
+
+def test_modified_file(tmp_path):
+    cache = ParseCache(tmp_path / "parse_cache.sqlite")
+    path = tmp_path / "file.nc"
+    path.write_text("data")
+    cache.put([(str(path), {"variable_id": "tas"})], "parser")
+
+    path.write_text("modified data")
+
+    assert cache.get([str(path)], "parser") == {}
+
+
+def test_invalid_asset(tmp_path):
+    cache = ParseCache(tmp_path / "parse_cache.sqlite")
+    path = tmp_path / "file.nc"
+    path.write_text("data")
+
+    cache.put([(str(path), {"INVALID_ASSET": str(path), "TRACEBACK": "error"})], "parser")
+
+    assert cache.get([str(path)], "parser") == {}
@@ -0,0 +1,105 @@
+import os
+from itertools import groupby
+from pathlib import Path
+
+import pytest
+
+from climate_ref.datasets.cmip6 import CMIP6DatasetAdapter
+from climate_ref.datasets.scanner import scan_files
+
+TEMPLATE = CMIP6DatasetAdapter.directory_template
+
+
+@pytest.fixture
+def drs_tree(tmp_path) -> Path:
+    for table_id, variable_id in [("Amon", "tas"), ("Amon", "pr"), ("Omon", "tos"), ("fx", "areacella")]:
+        directory = (
+            tmp_path
+            / "data"
+            / "CMIP6"
+            / "CMIP"
+            / "CSIRO"
+            / "ACCESS-ESM1-5"
+            / "historical"
+            / "r1i1p1f1"
+            / table_id
+            / variable_id
+            / "gn"
+            / "v20191115"
+        )
+        directory.mkdir(parents=True)
+        for index in range(2):
+            (directory / f"{variable_id}_{index}.nc").touch()
+        (directory / "README.txt").touch()
+    return tmp_path
+
+
+def _scan(directory: Path, **kwargs) -> list[str]:
+    return list(scan_files(directory, drs_root="CMIP6", directory_template=TEMPLATE, **kwargs))
+
+
+def test_scan_files(drs_tree):
+    files = _scan(drs_tree / "data", n_threads=2)
+
+    assert sorted(files) == sorted(str(path) for path in drs_tree.rglob("*.nc"))
+    # The files in each directory are contiguous
+    directories = [directory for directory, _ in groupby(files, key=lambda file: Path(file).parent)]
+    assert len(directories) == len(set(directories))
+
+
+@pytest.mark.parametrize(
+    "root",
+    [
+        Path("data"),
+        Path("data/CMIP6"),
+        Path("data/CMIP6/CMIP/CSIRO/ACCESS-ESM1-5/historical/r1i1p1f1"),
+    ],
+)
+def test_scan_files_include(drs_tree, root, mocker):
+    scandir = mocker.spy(os, "scandir")
+
+    files = _scan(drs_tree / root, include={"table_id": ["Amon", "fx"], "variable_id": ["tas", "areacella"]})
+
+    assert sorted(Path(file).name for file in files) == [
+        "areacella_0.nc",
+        "areacella_1.nc",
+        "tas_0.nc",
+        "tas_1.nc",
+    ]
+    # The excluded directories aren't scanned
+    scanned = [str(call.args[0]) for call in scandir.call_args_list]
+    assert not any("Omon" in path or f"{Path('Amon') / 'pr'}" in path for path in scanned)
+
+
+def test_scan_files_excluded_root(drs_tree):
+    root = drs_tree / "data/CMIP6/CMIP/CSIRO/ACCESS-ESM1-5/historical/r1i1p1f1/Omon"
+
+    assert _scan(root, include={"table_id": ["Amon"]}) == []
+
+
+def test_scan_files_no_drs(tmp_path, caplog):
+    (tmp_path / "Omon").mkdir()
+    (tmp_path / "Omon" / "tos.nc").touch()
+
+    files = _scan(tmp_path, include={"table_id": ["Amon"]})
+
+    assert files == [str(tmp_path / "Omon" / "tos.nc")]
+    assert "the filters weren't applied" in caplog.text
+
+
+def test_scan_files_unknown_facet(drs_tree):
+    with pytest.raises(ValueError, match="Unable to filter directories by"):
+        _scan(drs_tree, include={"frequency": ["mon"]})
+
+
+def test_scan_files_max_depth(drs_tree):
+    # The files are 11 directories below the root
+    assert _scan(drs_tree) == []
+    assert len(_scan(drs_tree, max_depth=11)) == 8
+
+
+def test_scan_files_file(drs_tree):
+    file = next(drs_tree.rglob("*.nc"))
+
+    assert _scan(file) == [str(file)]
+    assert _scan(file.with_suffix(".txt")) == []
@@ -0,0 +1,106 @@
+import datetime
+
+import pandas as pd
+import pytest
+
+from climate_ref.datasets import snapshot as snapshot_module
+from climate_ref.datasets.cmip6 import CMIP6DatasetAdapter
+from climate_ref.datasets.obs4mips import Obs4MIPsDatasetAdapter
+from climate_ref.datasets.snapshot import catalog_fingerprint, read_snapshot, write_snapshot
+
+
+@pytest.fixture(autouse=True)
+def no_settle_time(monkeypatch):
+    # The seeded database was modified moments ago
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_SETTLE_TIME", datetime.timedelta(0))
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path):
+    return tmp_path / "catalog"
+
+
+@pytest.mark.parametrize("adapter_cls", [CMIP6DatasetAdapter, Obs4MIPsDatasetAdapter])
+def test_load_catalog_snapshot(adapter_cls, db_seeded, snapshot_dir, mocker):
+    adapter = adapter_cls()
+    expected = adapter.load_catalog(db_seeded)
+
+    catalog = adapter.load_catalog(db_seeded, snapshot_dir=snapshot_dir)
+    pd.testing.assert_frame_equal(catalog, expected)
+    assert (snapshot_dir / f"{adapter.dataset_cls.__name__}.arrow").exists()
+
+    # The second load should not touch the dataset files
+    mock_get_files = mocker.patch.object(adapter_cls, "_get_dataset_files")
+    catalog = adapter.load_catalog(db_seeded, snapshot_dir=snapshot_dir)
+    mock_get_files.assert_not_called()
+
+    pd.testing.assert_frame_equal(catalog, expected)
+
+
+def test_load_catalog_snapshot_invalidated(config, db_seeded, snapshot_dir):
+    adapter = CMIP6DatasetAdapter()
+    data_catalog = adapter.load_catalog(db_seeded, snapshot_dir=snapshot_dir)
+
+    target_ds = "CMIP6.CMIP.CSIRO.ACCESS-ESM1-5.historical.r1i1p1f1.Amon.tas.gn.v20191115"
+    target_metadata = data_catalog[data_catalog["instance_id"] == target_ds].copy()
+    new_instance_id = target_ds.replace("v20191115", "v20230101")
+    target_metadata["version"] = "v20230101"
+    target_metadata["instance_id"] = new_instance_id
+    with db_seeded.session.begin():
+        adapter.register_dataset(config, db_seeded, target_metadata)
+
+    latest_data_catalog = adapter.load_catalog(db_seeded, snapshot_dir=snapshot_dir)
+    latest_instance_ids = latest_data_catalog.instance_id.unique().tolist()
+    assert target_ds not in latest_instance_ids
+    assert new_instance_id in latest_instance_ids
+
+    pd.testing.assert_frame_equal(latest_data_catalog, adapter.load_catalog(db_seeded))
+
+
+def test_load_catalog_snapshot_unsettled(db_seeded, snapshot_dir, monkeypatch):
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_SETTLE_TIME", datetime.timedelta(days=365 * 1000))
+    adapter = CMIP6DatasetAdapter()
+
+    adapter.load_catalog(db_seeded, snapshot_dir=snapshot_dir)
+
+    assert not snapshot_dir.exists()
+
+
+def test_catalog_fingerprint(db_seeded):
+    with db_seeded.session.begin():
+        cmip6_fingerprint, settled = catalog_fingerprint(CMIP6DatasetAdapter(), db_seeded)
+        obs4mips_fingerprint, _ = catalog_fingerprint(Obs4MIPsDatasetAdapter(), db_seeded)
+
+    assert settled
+    assert cmip6_fingerprint != obs4mips_fingerprint
+
+
+def test_read_snapshot_stale(tmp_path):
+    path = tmp_path / "catalog.arrow"
+    catalog = pd.DataFrame({"instance_id": ["a", "a", "b"]}, index=[1, 1, 2])
+
+    write_snapshot(path, catalog, "abc")
+
+    pd.testing.assert_frame_equal(read_snapshot(path, "abc"), catalog)
+    assert read_snapshot(path, "def") is None
+    assert read_snapshot(tmp_path / "missing.arrow", "abc") is None
+
+
+def test_read_snapshot_corrupt(tmp_path, caplog):
+    path = tmp_path / "catalog.arrow"
+    path.write_text("not an arrow file")
+
+    assert read_snapshot(path, "abc") is None
+    assert "Unable to read catalog snapshot" in caplog.text
+
+
+def test_snapshots_enabled_without_pyarrow(monkeypatch, caplog):
+    monkeypatch.setattr(snapshot_module, "HAS_PYARROW", False)
+    snapshot_module._log_missing_pyarrow.cache_clear()
+
+    with caplog.at_level("INFO"):
+        assert not snapshot_module.snapshots_enabled()
+        assert not snapshot_module.snapshots_enabled()
+
+    # The message is only logged once
+    assert caplog.text.count("pyarrow is not installed") == 1
@@ -1,5 +1,7 @@
 import concurrent.futures
 import re
+import threading
+import time
 from concurrent.futures import Future
 
 import pytest
@@ -91,3 +93,158 @@ class TestLocalExecutor:
 
         with pytest.raises(ExecutionError, match=re.escape("Failed to execute 'mock_provider/mock/key'")):
             executor.join(0.1)
+
+    def test_run_processes_completed(self, metric_definition, mocker):
+        process_pool = mocker.MagicMock(spec=concurrent.futures.ProcessPoolExecutor)
+        executor = LocalExecutor(pool=process_pool)
+
+        pending = Future()
+        process_pool.submit.return_value = pending
+        executor.run(metric_definition, None)
+        assert len(executor._results) == 1
+        assert not executor._results[0].processed
+
+        # The completed result is processed when the next execution is submitted
+        pending.set_result(
+            ExecutionResult(
+                definition=metric_definition,
+                successful=False,
+                output_bundle_filename=None,
+                metric_bundle_filename=None,
+            )
+        )
+        process_pool.submit.return_value = Future()
+        executor.run(metric_definition, None)
+
+        assert len(executor._results) == 1
+        assert executor._results[0].future is not pending
+
+    def test_run_after_join(self, metric_definition, mocker):
+        mocker.patch("climate_ref.executor.local.prepare_execution_result")
+        mock_apply = mocker.patch("climate_ref.executor.local.apply_execution_result")
+        process_pool = mocker.MagicMock(spec=concurrent.futures.ProcessPoolExecutor)
+        executor = LocalExecutor(database=mocker.MagicMock(), pool=process_pool)
+        result = ExecutionResult(
+            definition=metric_definition,
+            successful=True,
+            output_bundle_filename=None,
+            metric_bundle_filename=None,
+        )
+
+        pending = Future()
+        process_pool.submit.return_value = pending
+        executor.run(metric_definition, mocker.Mock(id=1))
+        pending.set_result(result)
+        executor.join(1)
+        assert mock_apply.call_count == 1
+
+        # The result that completed before joining isn't written again
+        completed = Future()
+        completed.set_result(result)
+        process_pool.submit.return_value = completed
+        executor.run(metric_definition, mocker.Mock(id=2))
+        assert mock_apply.call_count == 2
+        assert executor._results == []
+
+    def test_run_failed_execution(self, metric_definition, mocker):
+        process_pool = mocker.MagicMock(spec=concurrent.futures.ProcessPoolExecutor)
+        executor = LocalExecutor(pool=process_pool)
+
+        future = Future()
+        future.set_exception(ValueError("Some thing bad went wrong"))
+        process_pool.submit.return_value = future
+        executor.run(metric_definition, None)
+
+        # Executions that failed to run are raised by join
+        assert len(executor._results) == 1
+        with pytest.raises(ExecutionError, match=re.escape("Failed to execute 'mock_provider/mock/key'")):
+            executor.join(0.1)
+
+    def test_join_as_completed(self, metric_definition):
+        executor = LocalExecutor(n=1)
+        futures = [Future(), Future()]
+        executor._results = [
+            ExecutionFuture(future, definition=metric_definition, execution_id=None) for future in futures
+        ]
+        result = ExecutionResult(
+            definition=metric_definition,
+            successful=True,
+            output_bundle_filename=None,
+            metric_bundle_filename=None,
+        )
+        for delay, future in zip([0.05, 0.1], futures):
+            threading.Timer(delay, future.set_result, args=(result,)).start()
+
+        start = time.perf_counter()
+        executor.join(10)
+
+        # The results are processed as soon as they complete rather than polled
+        assert time.perf_counter() - start < 0.5
+        assert executor._results == []
+
+    def test_join_batches(self, metric_definition, mocker):
+        mock_prepare = mocker.patch("climate_ref.executor.local.prepare_execution_result")
+        mock_apply = mocker.patch("climate_ref.executor.local.apply_execution_result")
+        database = mocker.MagicMock()
+        executor = LocalExecutor(database=database, n=1, result_batch_size=2)
+
+        result = ExecutionResult(
+            definition=metric_definition,
+            successful=True,
+            output_bundle_filename=None,
+            metric_bundle_filename=None,
+        )
+        futures = [Future() for _ in range(3)]
+        for future in futures:
+            future.set_result(result)
+        executor._results = [
+            ExecutionFuture(future, definition=metric_definition, execution_id=index + 1)
+            for index, future in enumerate(futures)
+        ]
+
+        executor.join(1)
+
+        # The outputs are published for each execution,
+        # but the results are written in a transaction per batch
+        assert mock_prepare.call_count == 3
+        assert mock_apply.call_count == 3
+        assert database.session.begin.call_count == 2
+        assert executor._results == []
+        # The result threads are shut down once all the results are processed
+        assert executor._result_pool is None
+
+    def test_join_publish_error(self, metric_definition, mocker):
+        def prepare(config, output_fragment, result, cv):
+            if output_fragment == "fragment-1":
+                raise FileNotFoundError("Could not find diagnostic.json")
+            return mocker.sentinel.prepared
+
+        mocker.patch("climate_ref.executor.local.prepare_execution_result", side_effect=prepare)
+        mock_apply = mocker.patch("climate_ref.executor.local.apply_execution_result")
+        database = mocker.MagicMock()
+        database.session.get.side_effect = lambda model, execution_id: mocker.Mock(
+            output_fragment=f"fragment-{execution_id}"
+        )
+        executor = LocalExecutor(database=database, n=1)
+
+        result = ExecutionResult(
+            definition=metric_definition,
+            successful=False,
+            output_bundle_filename=None,
+            metric_bundle_filename=None,
+        )
+        futures = [Future(), Future()]
+        for future in futures:
+            future.set_result(result)
+        executor._results = [
+            ExecutionFuture(future, definition=metric_definition, execution_id=index + 1)
+            for index, future in enumerate(futures)
+        ]
+
+        with pytest.raises(FileNotFoundError, match=r"Could not find diagnostic\.json"):
+            executor.join(1)
+
+        # The result of the other execution is still written
+        mock_apply.assert_called_once()
+        assert mock_apply.call_args.args[2] == mocker.sentinel.prepared
+        assert [result.future for result in executor._results] == futures[:1]
@@ -5,7 +5,12 @@ import pytest
 from sqlalchemy import select
 from sqlalchemy.orm import Session
 
-from climate_ref.executor.result_handling import _copy_file_to_results, handle_execution_result
+from climate_ref.executor.result_handling import (
+    _copy_file_to_results,
+    apply_execution_result,
+    handle_execution_result,
+    prepare_execution_result,
+)
 from climate_ref.models import ScalarMetricValue, SeriesMetricValue
 from climate_ref.models.execution import Execution, ExecutionOutput, ResultOutputType
 from climate_ref.models.metric_value import MetricValueType
@@ -204,6 +209,31 @@ def test_handle_execution_result_with_files(config, mock_execution_result, mocke
     db.session.add.assert_called_with(mock_result_output.return_value)
 
 
+def test_prepare_execution_result(db, config, mock_execution_result, mock_definition, test_data_dir):
+    metric_bundle_filename = pathlib.Path("bundle.json")
+    result = ExecutionResult(
+        definition=mock_definition, successful=True, metric_bundle_filename=metric_bundle_filename
+    )
+    shutil.copy(
+        test_data_dir / "cmec-output" / "pr_v3-LR_0101_1x1_esmf_metrics_default_v20241023_cmec.json",
+        mock_definition.to_output_path(metric_bundle_filename),
+    )
+
+    prepared = prepare_execution_result(config, mock_execution_result.output_fragment, result)
+
+    # The outputs are published without updating the database
+    assert (config.paths.results / "output_fragment" / metric_bundle_filename).exists()
+    assert prepared.scalar_values
+    assert not list(db.session.execute(select(ScalarMetricValue)).scalars())
+
+    apply_execution_result(db, mock_execution_result, prepared)
+
+    mock_execution_result.mark_successful.assert_called_once_with(metric_bundle_filename)
+    scalars = list(db.session.execute(select(ScalarMetricValue)).scalars())
+    assert len(scalars) == len(prepared.scalar_values)
+    assert all(scalar.execution_id == mock_execution_result.id for scalar in scalars)
+
+
 def test_handle_execution_result_failed(config, db, mock_execution_result, mock_definition):
     result = ExecutionResult(definition=mock_definition, successful=False, metric_bundle_filename=None)
 
@@ -164,6 +164,7 @@ filename = "sqlite://climate_ref.db"
                 "results": f"{default_path}/results",
                 "scratch": f"{default_path}/scratch",
                 "software": f"{default_path}/software",
+                "cache": f"{default_path}/cache",
                 "dimensions_cv": str(Path("pycmec") / "cv_cmip7_aft.yaml"),
             },
             "db": {
@@ -179,6 +180,7 @@ filename = "sqlite://climate_ref.db"
         monkeypatch.setenv("REF_SCRATCH_ROOT", "/my/test/scratch")
         monkeypatch.setenv("REF_LOG_ROOT", "/my/test/logs")
         monkeypatch.setenv("REF_RESULTS_ROOT", "/my/test/executions")
+        monkeypatch.setenv("REF_CACHE_ROOT", "/my/test/cache")
 
         config_new = config.refresh()
 
@@ -187,6 +189,7 @@ filename = "sqlite://climate_ref.db"
         assert config_new.paths.scratch == Path("/my/test/scratch")
         assert config_new.paths.log == Path("/my/test/logs")
         assert config_new.paths.results == Path("/my/test/executions")
+        assert config_new.paths.cache == Path("/my/test/cache")
 
     def test_custom_env_variable(self, monkeypatch, tmp_path, config):
         monkeypatch.setenv("ABC", "/my")
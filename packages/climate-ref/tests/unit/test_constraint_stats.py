@@ -0,0 +1,147 @@
+import pandas as pd
+import pytest
+
+from climate_ref.constraint_stats import MIN_CALLS, ConstraintStatistics
+from climate_ref.solver import _process_group_constraints
+from climate_ref_core.constraints import (
+    AddSupplementaryDataset,
+    PartialDateTime,
+    RequireFacets,
+    RequireTimerange,
+)
+from climate_ref_core.datasets import SourceDatasetType
+from climate_ref_core.diagnostics import DataRequirement
+
+timerange = RequireTimerange(group_by=("instance_id",), start=PartialDateTime(2000, 1))
+facets = RequireFacets("variable_id", ("tas", "pr"))
+supplementary = AddSupplementaryDataset.from_defaults("areacella", SourceDatasetType.CMIP6)
+
+
+def _record(statistics, constraint, calls, rejections, duration, precheck=False):
+    for i in range(calls):
+        statistics.record(constraint, duration, rejected=i < rejections, precheck=precheck)
+
+
+def test_prechecks_without_statistics():
+    statistics = ConstraintStatistics()
+
+    assert statistics.prechecks([timerange, facets]) == [facets]
+    # A constraint that is already evaluated first isn't a pre-check
+    assert statistics.prechecks([facets, timerange]) == []
+    # Constraints that add datasets can't be skipped
+    assert statistics.prechecks([timerange, supplementary, facets]) == []
+
+
+def test_prechecks_with_statistics():
+    statistics = ConstraintStatistics()
+    _record(statistics, timerange, MIN_CALLS, 0, 1.0)
+
+    _record(statistics, facets, MIN_CALLS, MIN_CALLS // 2, 0.01)
+    assert statistics.prechecks([timerange, facets]) == [facets]
+
+    # The pre-check is not used if it rarely rejects a group
+    statistics = ConstraintStatistics()
+    _record(statistics, timerange, MIN_CALLS, 0, 1.0)
+    _record(statistics, facets, MIN_CALLS, 0, 0.01)
+    assert statistics.prechecks([timerange, facets]) == []
+
+    # The evaluations as a pre-check take precedence over the evaluations in the declared order
+    _record(statistics, facets, MIN_CALLS, MIN_CALLS // 2, 0.01, precheck=True)
+    assert statistics.prechecks([timerange, facets]) == [facets]
+
+
+def test_round_trip(tmp_path):
+    statistics = ConstraintStatistics()
+    _record(statistics, facets, 3, 1, 0.5)
+
+    statistics.save(tmp_path / "stats.json")
+    loaded = ConstraintStatistics.load(tmp_path / "stats.json")
+
+    assert loaded == statistics
+    assert loaded.stats[repr(facets)].rejection_rate == pytest.approx(1 / 3)
+    assert ConstraintStatistics.load(tmp_path / "missing.json") == ConstraintStatistics()
+
+
+def test_merge_difference():
+    statistics = ConstraintStatistics()
+    _record(statistics, facets, 3, 1, 0.5)
+    previous = ConstraintStatistics()
+    statistics.merge(previous)
+    previous.merge(statistics)
+
+    _record(statistics, facets, 2, 2, 0.5)
+    _record(statistics, timerange, 1, 0, 1.0)
+
+    difference = statistics.difference(previous)
+    assert difference.stats[repr(facets)].calls == 2
+    assert difference.stats[repr(facets)].rejections == 2
+    assert difference.stats[repr(facets)].total_time == pytest.approx(1.0)
+    assert difference.stats[repr(timerange)].calls == 1
+
+    previous.merge(difference)
+    assert previous == statistics
+    assert statistics.difference(statistics) == ConstraintStatistics()
+
+
+@pytest.mark.parametrize(
+    "variables, start_time",
+    [
+        (["tas", "pr"], "2000-01-01"),
+        (["tas", "pr"], "2001-01-01"),
+        (["tas", "tas"], "2000-01-01"),
+    ],
+)
+def test_precheck_matches_declared_order(variables, start_time):
+    group = pd.DataFrame(
+        {
+            "instance_id": ["a", "b"],
+            "variable_id": variables,
+            "start_time": pd.to_datetime(["2000-01-01", start_time]),
+            "end_time": pd.to_datetime(["2010-12-31", "2010-12-31"]),
+            "path": ["a.nc", "b.nc"],
+        }
+    )
+    requirement = DataRequirement(
+        source_type=SourceDatasetType.CMIP6, filters=(), group_by=None, constraints=(timerange, facets)
+    )
+
+    expected = _process_group_constraints(group, group, requirement)
+    result = _process_group_constraints(group, group, requirement, ConstraintStatistics())
+
+    if expected is None:
+        assert result is None
+    else:
+        pd.testing.assert_frame_equal(result, expected)
+
+
+def _group(variables, start_time):
+    return pd.DataFrame(
+        {
+            "instance_id": ["a", "b"],
+            "variable_id": variables,
+            "start_time": pd.to_datetime(["2000-01-01", start_time]),
+            "end_time": pd.to_datetime(["2010-12-31", "2010-12-31"]),
+            "path": ["a.nc", "b.nc"],
+        }
+    )
+
+
+def test_precheck_statistics():
+    requirement = DataRequirement(
+        source_type=SourceDatasetType.CMIP6, filters=(), group_by=None, constraints=(timerange, facets)
+    )
+    statistics = ConstraintStatistics()
+
+    rejected = _group(["tas", "tas"], "2000-01-01")
+    assert _process_group_constraints(rejected, rejected, requirement, statistics) is None
+    # The evaluation of the pre-check is recorded separately
+    assert statistics.stats.keys() == {f"precheck:{facets!r}"}
+    assert statistics.get(facets) is None
+
+    accepted = _group(["tas", "pr"], "2000-01-01")
+    assert _process_group_constraints(accepted, accepted, requirement, statistics) is not None
+    assert {key: stats.calls for key, stats in statistics.stats.items()} == {
+        f"precheck:{facets!r}": 2,
+        repr(timerange): 1,
+        repr(facets): 1,
+    }
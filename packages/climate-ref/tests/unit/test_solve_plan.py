@@ -0,0 +1,54 @@
+import datetime
+
+import pytest
+from climate_ref_example import provider as example_provider
+
+from climate_ref.datasets import snapshot as snapshot_module
+from climate_ref.solve_plan import PlannedExecution, SolvePlanCache
+
+
+@pytest.fixture
+def diagnostic():
+    return example_provider.diagnostics()[0]
+
+
+@pytest.fixture
+def plan_cache(monkeypatch, db_seeded, tmp_path):
+    # The seeded database was modified moments ago
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_SETTLE_TIME", datetime.timedelta(0))
+    return SolvePlanCache.from_db(tmp_path / "solve_plan", db_seeded)
+
+
+def test_round_trip(plan_cache, diagnostic):
+    executions = [PlannedExecution("key-a", "hash-a"), PlannedExecution("key-b", "hash-b")]
+
+    assert plan_cache.load(diagnostic) is None
+    plan_cache.save(diagnostic, executions)
+
+    assert plan_cache.load(diagnostic) == executions
+
+
+def test_stale_provider_version(plan_cache, diagnostic, monkeypatch):
+    plan_cache.save(diagnostic, [PlannedExecution("key-a", "hash-a")])
+
+    monkeypatch.setattr(diagnostic.provider, "version", "999.0.0")
+
+    assert plan_cache.load(diagnostic) is None
+
+
+def test_unsettled(monkeypatch, db_seeded, tmp_path, diagnostic):
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_SETTLE_TIME", datetime.timedelta(days=365 * 1000))
+    plan_cache = SolvePlanCache.from_db(tmp_path / "solve_plan", db_seeded)
+
+    plan_cache.save(diagnostic, [PlannedExecution("key-a", "hash-a")])
+
+    assert not (tmp_path / "solve_plan").exists()
+
+
+def test_corrupt(plan_cache, diagnostic, caplog):
+    path = plan_cache.root / diagnostic.provider.slug / f"{diagnostic.slug}.json"
+    path.parent.mkdir(parents=True)
+    path.write_text("not json")
+
+    assert plan_cache.load(diagnostic) is None
+    assert "Unable to read solve plan" in caplog.text
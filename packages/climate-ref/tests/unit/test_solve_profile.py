@@ -0,0 +1,54 @@
+from climate_ref.solve_profile import (
+    SolveProfiler,
+    active_profiler,
+    profile_diagnostic,
+    profile_stage,
+    record_candidate,
+)
+
+
+def test_profile_stage_inactive():
+    with profile_stage("filter", rows_in=10) as stage:
+        stage.rows_out = 5
+
+    assert stage.rows_out == 5
+
+
+def test_profile_stage():
+    profiler = SolveProfiler()
+    with profiler.activate():
+        with profile_diagnostic("provider/diagnostic"):
+            with profile_stage("filter", detail="cmip6", rows_in=10) as stage:
+                stage.rows_out = 5
+        with profile_stage("db.write"):
+            pass
+
+    filter_event, solve_event, write_event = profiler.events
+    assert filter_event.stage == "filter"
+    assert filter_event.diagnostic == "provider/diagnostic"
+    assert filter_event.detail == "cmip6"
+    assert (filter_event.rows_in, filter_event.rows_out) == (10, 5)
+    assert solve_event.stage == "solve"
+    assert solve_event.duration >= filter_event.duration
+    assert write_event.diagnostic is None
+
+    # Stages are not recorded once the profiler is deactivated
+    with profile_stage("filter"):
+        pass
+    assert len(profiler.events) == 3
+
+
+def test_merge():
+    profiler = SolveProfiler()
+    other = SolveProfiler(origin=profiler.origin)
+    with profiler.activate():
+        assert active_profiler() is profiler
+        record_candidate("provider/diagnostic")
+        with other.activate():
+            with profile_diagnostic("provider/diagnostic"):
+                record_candidate("provider/diagnostic")
+    assert active_profiler() is None
+
+    profiler.merge(other)
+    assert [event.stage for event in profiler.events] == ["solve"]
+    assert profiler.candidates == {"provider/diagnostic": 2}
@@ -1,28 +1,47 @@
+import concurrent.futures
+import datetime
+import json
+import threading
 from copy import deepcopy
 from typing import Any
 from unittest import mock
 
 import pandas as pd
 import pytest
+from attrs import evolve
 from climate_ref_esmvaltool import provider as esmvaltool_provider
 from climate_ref_example import provider as example_provider
+from climate_ref_example.example import GlobalMeanTimeseries
 from climate_ref_ilamb import provider as ilamb_provider
 from climate_ref_pmp import provider as pmp_provider
 
+from climate_ref import solver as solver_module
 from climate_ref.config import ExecutorConfig
-from climate_ref.models import Execution
+from climate_ref.constraint_stats import ConstraintStatistics
+from climate_ref.datasets import snapshot as snapshot_module
+from climate_ref.executor import LocalExecutor
+from climate_ref.models import Dataset, Execution, ExecutionGroup
+from climate_ref.models import Diagnostic as DiagnosticModel
 from climate_ref.provider_registry import ProviderRegistry, _register_provider
+from climate_ref.solve_profile import ProfileFormat, SolveProfiler
 from climate_ref.solver import (
+    ChangedDatasets,
     DiagnosticExecution,
     ExecutionSolver,
+    SolveCache,
     SolveFilterOptions,
     extract_covered_datasets,
     solve_executions,
     solve_required_executions,
 )
-from climate_ref_core.constraints import AddSupplementaryDataset, RequireFacets, SelectParentExperiment
+from climate_ref_core.constraints import (
+    AddSupplementaryDataset,
+    RequireFacets,
+    SelectParentExperiment,
+)
 from climate_ref_core.datasets import SourceDatasetType
-from climate_ref_core.diagnostics import DataRequirement, FacetFilter
+from climate_ref_core.diagnostics import DataRequirement, ExecutionResult, FacetFilter
+from climate_ref_core.providers import DiagnosticProvider
 
 
 @pytest.fixture
@@ -278,7 +297,8 @@ class TestMetricSolver:
         ),
     ],
 )
-def test_data_coverage(requirement, data_catalog, expected):
+@pytest.mark.parametrize("use_cache", [False, True])
+def test_data_coverage(requirement, data_catalog, expected, use_cache):
     def add_path(df: pd.DataFrame) -> pd.DataFrame:
         """Insert a path column into the DataFrame."""
         df["path"] = df.apply(lambda r: "_".join(map(str, r.tolist())) + ".nc", axis=1)
@@ -286,7 +306,8 @@ def test_data_coverage(requirement, data_catalog, expected):
     add_path(data_catalog)
     for expected_value in expected.values():
         add_path(expected_value)
-    result = extract_covered_datasets(data_catalog, requirement)
+    cache = SolveCache({requirement.source_type: data_catalog}) if use_cache else None
+    result = extract_covered_datasets(data_catalog, requirement, cache=cache)
 
     for key, expected_value in expected.items():
         pd.testing.assert_frame_equal(result[key], expected_value)
@@ -309,6 +330,345 @@ def test_extract_no_groups():
         extract_covered_datasets(data_catalog, requirement)
 
 
+def test_solve_cache():
+    data_catalog = pd.DataFrame(
+        {
+            "variable_id": ["tas", "tas", "pr", "tas"],
+            "experiment_id": ["ssp119", "ssp126", "ssp119", "ssp119"],
+            "path": ["a.nc", "b.nc", "c.nc", "d.nc"],
+        }
+    )
+    cache = SolveCache({SourceDatasetType.CMIP6: data_catalog})
+
+    requirement = DataRequirement(
+        source_type=SourceDatasetType.CMIP6,
+        filters=(FacetFilter(facets={"variable_id": "tas", "experiment_id": ["ssp119", "ssp126"]}),),
+        group_by=("experiment_id",),
+    )
+    # Equivalent filters, but in a different order
+    equivalent_requirement = DataRequirement(
+        source_type=SourceDatasetType.CMIP6,
+        filters=(FacetFilter(facets={"experiment_id": ["ssp126", "ssp119"], "variable_id": "tas"}),),
+        group_by=("experiment_id",),
+        constraints=(RequireFacets("variable_id", ["pr"]),),
+    )
+
+    groups = cache.get_groups(requirement)
+    assert [selector for selector, _ in groups] == [
+        (("experiment_id", "ssp119"),),
+        (("experiment_id", "ssp126"),),
+    ]
+    assert groups[0][1].path.tolist() == ["a.nc", "d.nc"]
+    assert cache.get_groups(equivalent_requirement) is groups
+
+    # The constraints are still applied to the cached groups
+    assert extract_covered_datasets(data_catalog, equivalent_requirement, cache=cache) == {}
+
+    # A different grouping isn't reused
+    ungrouped = DataRequirement(
+        source_type=SourceDatasetType.CMIP6,
+        filters=requirement.filters,
+        group_by=None,
+    )
+    assert cache.get_groups(ungrouped) is not groups
+    assert cache.get_groups(ungrouped)[0][1].path.tolist() == ["a.nc", "b.nc", "d.nc"]
+
+    with pytest.raises(ValueError, match="The solve cache was not created for this cmip6 catalog"):
+        extract_covered_datasets(data_catalog.copy(), requirement, cache=cache)
+
+
+def test_solve_cache_supplementary_candidates():
+    data_catalog = pd.DataFrame(
+        {
+            "variable_id": ["tas", "areacella", "tas", "areacella"],
+            "source_id": ["A", "A", "B", "C"],
+            "grid_label": ["gn", "gn", "gn", "gn"],
+            "path": ["a.nc", "b.nc", "c.nc", "d.nc"],
+        }
+    )
+    cache = SolveCache({SourceDatasetType.CMIP6: data_catalog})
+    constraint = AddSupplementaryDataset(
+        supplementary_facets={"variable_id": "areacella"},
+        matching_facets=("source_id", "grid_label"),
+        optional_matching_facets=(),
+    )
+
+    candidates = cache.get_supplementary_candidates(SourceDatasetType.CMIP6, constraint)
+    assert candidates.path.tolist() == ["b.nc", "d.nc"]
+    equivalent_constraint = AddSupplementaryDataset(
+        supplementary_facets={"variable_id": ("areacella",)},
+        matching_facets=("source_id",),
+        optional_matching_facets=("grid_label",),
+    )
+    assert cache.get_supplementary_candidates(SourceDatasetType.CMIP6, equivalent_constraint) is candidates
+
+    requirement = DataRequirement(
+        source_type=SourceDatasetType.CMIP6,
+        filters=(FacetFilter(facets={"variable_id": "tas"}),),
+        group_by=("source_id",),
+        constraints=(constraint,),
+    )
+    result = extract_covered_datasets(data_catalog, requirement, cache=cache)
+    assert {selector: group.path.tolist() for selector, group in result.items()} == {
+        (("source_id", "A"),): ["a.nc", "b.nc"],
+        (("source_id", "B"),): ["c.nc"],
+    }
+
+
+def test_extract_covered_datasets_selectors():
+    requirement = DataRequirement(
+        source_type=SourceDatasetType.CMIP6,
+        filters=(),
+        group_by=("variable_id", "experiment_id"),
+    )
+    data_catalog = pd.DataFrame(
+        {
+            "variable_id": ["tas", "tas", "pr"],
+            "experiment_id": ["ssp119", "ssp126", "ssp119"],
+        }
+    )
+
+    result = extract_covered_datasets(
+        data_catalog,
+        requirement,
+        selectors=[(("variable_id", "tas"), ("experiment_id", "ssp126"))],
+    )
+    assert list(result.keys()) == [(("variable_id", "tas"), ("experiment_id", "ssp126"))]
+
+    assert extract_covered_datasets(data_catalog, requirement, selectors=[]) == {}
+
+
+@pytest.mark.parametrize(
+    "requirement,expected",
+    [
+        pytest.param(
+            DataRequirement(
+                source_type=SourceDatasetType.CMIP6,
+                filters=(FacetFilter(facets={"variable_id": "tas"}),),
+                group_by=("variable_id", "experiment_id"),
+            ),
+            {(("variable_id", "tas"), ("experiment_id", "ssp126"))},
+            id="grouped",
+        ),
+        pytest.param(
+            DataRequirement(
+                source_type=SourceDatasetType.CMIP6,
+                filters=(FacetFilter(facets={"variable_id": "pr"}),),
+                group_by=("variable_id", "experiment_id"),
+            ),
+            set(),
+            id="unaffected",
+        ),
+        pytest.param(
+            DataRequirement(
+                source_type=SourceDatasetType.obs4MIPs,
+                filters=(),
+                group_by=("variable_id",),
+            ),
+            set(),
+            id="other-source-type",
+        ),
+        pytest.param(
+            DataRequirement(
+                source_type=SourceDatasetType.CMIP6,
+                filters=(FacetFilter(facets={"variable_id": "tas"}),),
+                group_by=None,
+            ),
+            None,
+            id="ungrouped",
+        ),
+        pytest.param(
+            DataRequirement(
+                source_type=SourceDatasetType.CMIP6,
+                filters=(FacetFilter(facets={"variable_id": "pr"}),),
+                group_by=("variable_id", "experiment_id"),
+                constraints=(AddSupplementaryDataset.from_defaults("areacella", SourceDatasetType.CMIP6),),
+            ),
+            None,
+            id="supplementary",
+        ),
+        pytest.param(
+            DataRequirement(
+                source_type=SourceDatasetType.CMIP6,
+                filters=(FacetFilter(facets={"variable_id": "tas"}),),
+                group_by=("variable_id", "experiment_id"),
+                constraints=(SelectParentExperiment(),),
+            ),
+            None,
+            id="unknown-constraint",
+        ),
+    ],
+)
+def test_changed_datasets_affected_groups(requirement, expected):
+    changes = ChangedDatasets(
+        {
+            SourceDatasetType.CMIP6: pd.DataFrame(
+                {
+                    "variable_id": ["tas", "areacella"],
+                    "experiment_id": ["ssp126", "ssp126"],
+                }
+            )
+        }
+    )
+
+    assert changes.affected_groups(requirement) == expected
+
+
+def test_solve_executions_with_changes(mock_diagnostic, provider):
+    mock_diagnostic.data_requirements = (
+        DataRequirement(
+            source_type=SourceDatasetType.obs4MIPs,
+            filters=(),
+            group_by=("variable_id", "source_id"),
+        ),
+        DataRequirement(
+            source_type=SourceDatasetType.CMIP6,
+            filters=(),
+            group_by=("variable_id", "experiment_id"),
+        ),
+    )
+    data_catalog = {
+        SourceDatasetType.obs4MIPs: pd.DataFrame(
+            {
+                "variable_id": ["tas", "tas"],
+                "source_id": ["ERA-5", "AIRX3STM-006"],
+            }
+        ),
+        SourceDatasetType.CMIP6: pd.DataFrame(
+            {
+                "variable_id": ["tas", "tas", "pr"],
+                "experiment_id": ["ssp119", "ssp126", "ssp119"],
+            }
+        ),
+    }
+
+    def solve_keys(changes):
+        return sorted(
+            execution.dataset_key
+            for execution in solve_executions(data_catalog, mock_diagnostic, provider, changes)
+        )
+
+    assert len(solve_keys(None)) == 6
+    assert solve_keys(ChangedDatasets()) == []
+    assert (
+        solve_keys(ChangedDatasets({SourceDatasetType.CMIP6: data_catalog[SourceDatasetType.CMIP6][:0]}))
+        == []
+    )
+
+    # Only the executions that include the changed CMIP6 dataset
+    assert solve_keys(
+        ChangedDatasets({SourceDatasetType.CMIP6: data_catalog[SourceDatasetType.CMIP6][1:2]})
+    ) == [
+        "cmip6_ssp126_tas__obs4mips_AIRX3STM-006_tas",
+        "cmip6_ssp126_tas__obs4mips_ERA-5_tas",
+    ]
+
+    # Changes across both source types
+    assert solve_keys(
+        ChangedDatasets(
+            {
+                SourceDatasetType.CMIP6: data_catalog[SourceDatasetType.CMIP6][2:],
+                SourceDatasetType.obs4MIPs: data_catalog[SourceDatasetType.obs4MIPs][:1],
+            }
+        )
+    ) == [
+        "cmip6_ssp119_pr__obs4mips_AIRX3STM-006_tas",
+        "cmip6_ssp119_pr__obs4mips_ERA-5_tas",
+        "cmip6_ssp119_tas__obs4mips_ERA-5_tas",
+        "cmip6_ssp126_tas__obs4mips_ERA-5_tas",
+    ]
+
+
+@pytest.mark.parametrize(
+    "filters",
+    [
+        SolveFilterOptions(provider=["pmp"]),
+        SolveFilterOptions(provider=["esmvaltool"]),
+        SolveFilterOptions(provider=["ilamb"]),
+        SolveFilterOptions(diagnostic=["enso"]),
+    ],
+)
+def test_solver_build_from_db_filtered(mocker, config, db_seeded, aft_solver, filters):
+    mocker.patch.object(ProviderRegistry, "build_from_config", return_value=aft_solver.provider_registry)
+    filtered_solver = ExecutionSolver.build_from_db(config, db_seeded, filters=filters)
+
+    # Only a subset of the datasets are loaded
+    assert sum(len(catalog) for catalog in filtered_solver.data_catalog.values()) < sum(
+        len(catalog) for catalog in aft_solver.data_catalog.values()
+    )
+
+    def _solve(solver):
+        return sorted(
+            (execution.execution_slug(), execution.datasets.hash) for execution in solver.solve(filters)
+        )
+
+    expected = _solve(aft_solver)
+    assert expected
+    assert _solve(filtered_solver) == expected
+
+
+def test_find_catalog_filters():
+    diagnostic = mock.MagicMock()
+    diagnostic.slug = "test"
+    diagnostic.provider.slug = "provider"
+    diagnostic.data_requirements = (
+        DataRequirement(
+            source_type=SourceDatasetType.CMIP6,
+            filters=(FacetFilter({"variable_id": "tas"}),),
+            group_by=("source_id",),
+            constraints=(AddSupplementaryDataset.from_defaults("areacella", SourceDatasetType.CMIP6),),
+        ),
+        DataRequirement(
+            source_type=SourceDatasetType.obs4MIPs,
+            filters=(FacetFilter({"source_id": "HadISST-1-1"}),),
+            group_by=None,
+            constraints=(SelectParentExperiment(),),
+        ),
+    )
+    provider = mock.MagicMock()
+    provider.diagnostics.return_value = [diagnostic]
+    registry = ProviderRegistry(providers=[provider])
+
+    catalog_filters = solver_module.find_catalog_filters(registry, SolveFilterOptions(diagnostic=["test"]))
+
+    assert catalog_filters == {
+        SourceDatasetType.CMIP6: (
+            FacetFilter({"variable_id": "tas"}),
+            FacetFilter({"variable_id": "areacella"}),
+        ),
+        SourceDatasetType.obs4MIPs: None,
+    }
+    assert solver_module.find_catalog_filters(registry, SolveFilterOptions(diagnostic=["other"])) == {}
+
+
+def test_solver_solve_compact_catalog(aft_solver):
+    assert isinstance(
+        aft_solver.data_catalog[SourceDatasetType.CMIP6]["source_id"].dtype, pd.CategoricalDtype
+    )
+
+    # The same executions should be found if the catalog doesn't use categorical columns
+    plain_solver = ExecutionSolver(
+        provider_registry=aft_solver.provider_registry,
+        data_catalog={
+            source_type: catalog.astype(
+                {
+                    name: object
+                    for name, dtype in catalog.dtypes.items()
+                    if isinstance(dtype, pd.CategoricalDtype)
+                }
+            )
+            for source_type, catalog in aft_solver.data_catalog.items()
+        },
+    )
+
+    def _solve(solver):
+        return sorted((execution.execution_slug(), execution.datasets.hash) for execution in solver.solve())
+
+    expected = _solve(plain_solver)
+    assert expected
+    assert _solve(aft_solver) == expected
+
+
 def test_solver_solve_with_filters(aft_solver):
     def solve_filtered(**kwargs):
         """Helper function to solve with filters and return a DataFrame of results."""
@@ -372,6 +732,188 @@ def test_solver_solve_with_filters(aft_solver):
     )
 
 
+def test_solver_solve_parallel(solver):
+    def _summarise(executions):
+        return [
+            (execution.diagnostic.full_slug(), execution.dataset_key, execution.datasets.hash)
+            for execution in executions
+        ]
+
+    serial = list(solver.solve())
+    parallel = list(solver.solve(n_workers=2))
+
+    assert serial
+    # The diagnostics are yielded in the order they complete
+    assert sorted(_summarise(parallel)) == sorted(_summarise(serial))
+
+    # The executions refer to the diagnostics in the current process
+    diagnostics = {diagnostic.full_slug(): diagnostic for diagnostic in example_provider.diagnostics()}
+    assert all(
+        execution.diagnostic is diagnostics[execution.diagnostic.full_slug()] for execution in parallel
+    )
+
+
+@pytest.fixture
+def parallel_solver() -> ExecutionSolver:
+    # A second provider is needed so that there is more than one diagnostic to solve
+    other_provider = DiagnosticProvider("Other example", "1.0.0")
+    other_provider.register(GlobalMeanTimeseries())
+
+    n_files = 4
+    start_time = pd.date_range("2000-01-01", periods=n_files, freq="YS")
+    tas = pd.DataFrame(
+        {
+            "instance_id": [f"CMIP6.ssp126.{source_id}.tas" for source_id in ("A", "A", "B", "B")],
+            "source_id": ["A", "A", "B", "B"],
+            "variable_id": "tas",
+            "table_id": "Amon",
+            "experiment_id": "ssp126",
+            "variant_label": "r1i1p1f1",
+            "member_id": "r1i1p1f1",
+            "grid_label": "gn",
+            "version": "v20200101",
+            "start_time": start_time,
+            "end_time": start_time + pd.offsets.YearEnd(),
+            "path": [f"tas_{i}.nc" for i in range(n_files)],
+        }
+    )
+    areacella = tas.iloc[[0, 2]].assign(
+        instance_id=["CMIP6.ssp126.A.areacella", "CMIP6.ssp126.B.areacella"],
+        variable_id="areacella",
+        table_id="fx",
+        start_time=pd.NaT,
+        end_time=pd.NaT,
+        path=["areacella_A.nc", "areacella_B.nc"],
+    )
+    data_catalog = pd.concat([tas, areacella], ignore_index=True).astype(
+        {"source_id": "category", "variable_id": "category"}
+    )
+
+    return ExecutionSolver(
+        provider_registry=ProviderRegistry(providers=[example_provider, other_provider]),
+        data_catalog={SourceDatasetType.CMIP6: data_catalog},
+    )
+
+
+def test_solver_solve_parallel_statistics(parallel_solver):
+    def _summarise(executions):
+        return [
+            (execution.diagnostic.full_slug(), execution.dataset_key, execution.datasets.hash)
+            for execution in executions
+        ]
+
+    serial_statistics = ConstraintStatistics()
+    serial = list(parallel_solver.solve(constraint_statistics=serial_statistics))
+
+    profiler = SolveProfiler()
+    parallel_statistics = ConstraintStatistics()
+    with profiler.activate():
+        parallel = list(parallel_solver.solve(n_workers=2, constraint_statistics=parallel_statistics))
+
+    assert len(serial) == 4
+    # The diagnostics are yielded in the order they complete
+    assert sorted(_summarise(parallel)) == sorted(_summarise(serial))
+    for execution in parallel:
+        source_id = dict(execution.datasets["cmip6"].selector)["source_id"]
+        assert execution.datasets["cmip6"].instance_id.unique().tolist() == [
+            f"CMIP6.ssp126.{source_id}.tas",
+            f"CMIP6.ssp126.{source_id}.areacella",
+        ]
+
+    # The constraint statistics and the profile are merged from the workers
+    assert {key: stats.calls for key, stats in parallel_statistics.stats.items()} == {
+        key: stats.calls for key, stats in serial_statistics.stats.items()
+    }
+    assert profiler.candidates == {
+        "example/global-mean-timeseries": 2,
+        "other-example/global-mean-timeseries": 2,
+    }
+    assert {"solve", "extract", "constraint"} <= {event.stage for event in profiler.events}
+
+
+def test_solver_solve_parallel_as_completed(monkeypatch, parallel_solver):
+    solved_other = threading.Event()
+
+    def solve_in_worker(provider_slug, diagnostic_slug, changes):
+        if provider_slug == "example":
+            # This diagnostic is only solved once the other diagnostic's executions have been yielded
+            assert solved_other.wait(10)
+        provider = parallel_solver.provider_registry.get(provider_slug)
+        diagnostic = provider.get(diagnostic_slug)
+        return solver_module._WorkerResult(
+            executions=list(solve_executions(parallel_solver.data_catalog, diagnostic, provider, changes)),
+            constraint_statistics=ConstraintStatistics(),
+            profile=None,
+        )
+
+    # Solve in threads so the order that the diagnostics complete can be controlled
+    monkeypatch.setattr(solver_module, "_solve_diagnostic_in_worker", solve_in_worker)
+    monkeypatch.setattr(
+        solver_module.concurrent.futures,
+        "ProcessPoolExecutor",
+        lambda max_workers, **kwargs: concurrent.futures.ThreadPoolExecutor(max_workers),
+    )
+
+    executions = parallel_solver.solve(n_workers=2)
+    first = next(executions)
+    solved_other.set()
+
+    assert first.provider.slug == "other-example"
+    assert [execution.provider.slug for execution in executions] == [
+        "other-example",
+        "example",
+        "example",
+    ]
+
+
+def test_solve_diagnostic_in_worker(monkeypatch, tmp_path, parallel_solver):
+    # Run the worker in the current process
+    for name in (
+        "_worker_provider_registry",
+        "_worker_data_catalog",
+        "_worker_cache",
+        "_worker_profile_origin",
+    ):
+        monkeypatch.setattr(solver_module, name, getattr(solver_module, name))
+
+    with pytest.raises(RuntimeError, match="Solve worker has not been initialised"):
+        solver_module._solve_diagnostic_in_worker("example", "global-mean-timeseries", None)
+
+    catalog_paths = solver_module._write_worker_catalogs(parallel_solver.data_catalog, tmp_path)
+    solver_module._init_solve_worker(
+        parallel_solver.provider_registry, catalog_paths, ConstraintStatistics(), profile_origin=None
+    )
+    pd.testing.assert_frame_equal(
+        solver_module._worker_data_catalog[SourceDatasetType.CMIP6],
+        parallel_solver.data_catalog[SourceDatasetType.CMIP6],
+    )
+
+    result = solver_module._solve_diagnostic_in_worker("example", "global-mean-timeseries", None)
+    assert len(result.executions) == 2
+    assert result.profile is None
+    assert result.constraint_statistics.stats
+
+    # Only the evaluations from the latest task are returned
+    second_result = solver_module._solve_diagnostic_in_worker("example", "global-mean-timeseries", None)
+    assert {key: stats.calls for key, stats in second_result.constraint_statistics.stats.items()} == {
+        key: stats.calls for key, stats in result.constraint_statistics.stats.items()
+    }
+
+
+def test_write_worker_catalogs_pickle(monkeypatch, tmp_path, parallel_solver):
+    monkeypatch.setattr(snapshot_module, "HAS_PYARROW", False)
+
+    catalog_paths = solver_module._write_worker_catalogs(parallel_solver.data_catalog, tmp_path)
+    assert catalog_paths[SourceDatasetType.CMIP6].suffix == ".pkl"
+    pd.testing.assert_frame_equal(
+        solver_module._read_worker_catalog(catalog_paths[SourceDatasetType.CMIP6]),
+        parallel_solver.data_catalog[SourceDatasetType.CMIP6],
+    )
+
+    with pytest.raises(RuntimeError, match="Unable to read the data catalog"):
+        solver_module._read_worker_catalog(tmp_path / "missing.arrow")
+
+
 def test_solve_metrics_default_solver(mocker, mock_metric_execution, mock_executor, db_seeded, solver):
     mock_build_solver = mocker.patch.object(ExecutionSolver, "build_from_db")
 
@@ -427,12 +969,252 @@ def test_solve_metrics(mocker, db_seeded, solver, data_regression, mock_executor
     data_regression.check(output)
 
 
+def test_solve_metrics_batched(monkeypatch, db_seeded, config, solver, mock_executor):
+    monkeypatch.setattr(solver_module, "SOLVE_BATCH_SIZE", 2)
+
+    solve_required_executions(config=config, db=db_seeded, solver=solver)
+    runs = mock_executor.return_value.run.mock_calls
+    assert len(runs) > 2
+
+    with db_seeded.session.begin():
+        executions = db_seeded.session.query(Execution).all()
+        assert len(executions) == len(runs)
+        assert {call.kwargs["execution"].id for call in runs} == {execution.id for execution in executions}
+        for execution in executions:
+            assert execution.dataset_hash == execution.execution_group.executions[-1].dataset_hash
+            assert len(execution.datasets)
+
+        # Mark the groups as successfully executed
+        for execution in executions:
+            execution.execution_group.dirty = False
+
+    # Nothing has changed so no new executions are required
+    solve_required_executions(config=config, db=db_seeded, solver=solver)
+    assert mock_executor.return_value.run.call_count == len(runs)
+    with db_seeded.session.begin():
+        assert db_seeded.session.query(Execution).count() == len(runs)
+
+
+@pytest.fixture
+def candidate_factory(db, provider, definition_factory):
+    with db.session.begin():
+        _register_provider(db, provider)
+
+    def _candidate(diagnostic_slug: str, key: str) -> DiagnosticExecution:
+        diagnostic = provider.get(diagnostic_slug)
+        candidate = mock.MagicMock(spec=DiagnosticExecution)
+        candidate.provider = provider
+        candidate.diagnostic = diagnostic
+        candidate.selectors = {"cmip6": (("source_id", key),)}
+        datasets = mock.Mock(hash=key, items=mock.Mock(return_value=[]))
+        candidate.build_execution_definition.return_value = evolve(
+            definition_factory(diagnostic=diagnostic, execution_dataset_collection=datasets), key=key
+        )
+        return candidate
+
+    return _candidate
+
+
+def test_solve_metrics_batch_per_diagnostic(mocker, db, config, candidate_factory, mock_executor):
+    write = mocker.spy(solver_module._SolveState, "write")
+    in_transaction = []
+    mock_executor.return_value.run.side_effect = lambda definition, execution: in_transaction.append(
+        db.session.in_transaction()
+    )
+
+    solver = mock.MagicMock(spec=ExecutionSolver)
+    solver.solve.return_value = [
+        candidate_factory("mock", "a"),
+        candidate_factory("mock", "b"),
+        candidate_factory("failed", "c"),
+    ]
+    solve_required_executions(db, config=config, solver=solver)
+
+    # The batch is written when the solver moves on to the next diagnostic
+    assert [len(call.args[2]) for call in write.call_args_list] == [2, 1]
+    # The executions are only submitted once they have been committed
+    assert in_transaction == [False, False, False]
+    with db.session.begin():
+        assert db.session.query(Execution).count() == 3
+
+
+def test_solve_metrics_local_executor(mocker, db, config, candidate_factory):
+    events = []
+
+    def submit(fn, definition, log_level):
+        events.append(f"submit {definition.key}")
+        future = concurrent.futures.Future()
+        future.set_result(ExecutionResult(definition=definition, successful=True))
+        return future
+
+    def apply(database, execution, prepared):
+        events.append(f"write {execution.execution_group.key}")
+
+    pool = mocker.MagicMock(spec=concurrent.futures.ProcessPoolExecutor)
+    pool.submit.side_effect = submit
+    mocker.patch("climate_ref.executor.local.prepare_execution_result")
+    mocker.patch("climate_ref.executor.local.apply_execution_result", side_effect=apply)
+    mocker.patch.object(
+        ExecutorConfig, "build", return_value=LocalExecutor(database=db, config=config, pool=pool)
+    )
+
+    solver = mock.MagicMock(spec=ExecutionSolver)
+    solver.solve.return_value = [candidate_factory("mock", "a"), candidate_factory("failed", "b")]
+    solve_required_executions(db, config=config, solver=solver)
+
+    # The result of the first execution is written while the solver is still submitting
+    assert events == ["submit a", "write a", "submit b", "write b"]
+
+
+def test_solve_metrics_incremental(mocker, db_seeded, config, solver, mock_executor):
+    solve_required_executions(config=config, db=db_seeded, solver=solver)
+    initial_runs = mock_executor.return_value.run.call_count
+    assert initial_runs
+
+    with db_seeded.session.begin():
+        diagnostics = db_seeded.session.query(DiagnosticModel).all()
+        assert all(diagnostic.solve_watermark is not None for diagnostic in diagnostics)
+
+    # Nothing has changed so no groups are evaluated
+    extract_spy = mocker.spy(solver_module, "extract_covered_datasets")
+    solve_required_executions(config=config, db=db_seeded, solver=solver, incremental=True)
+    assert extract_spy.call_count == 0
+    assert mock_executor.return_value.run.call_count == initial_runs
+
+    # Touching a dataset causes the affected diagnostics to be re-evaluated
+    with db_seeded.session.begin():
+        dataset = db_seeded.session.query(Dataset).filter(Dataset.slug.like("%.tas.%")).first()
+        dataset.updated_at = diagnostics[0].solve_watermark
+    solve_required_executions(config=config, db=db_seeded, solver=solver, incremental=True)
+    assert extract_spy.call_count > 0
+
+
+def test_solve_metrics_incremental_changed_diagnostic(monkeypatch, db_seeded, config, solver, mock_executor):
+    solve_required_executions(config=config, db=db_seeded, solver=solver)
+
+    changes = solver.find_changes(db_seeded)
+    assert changes
+    assert all(change.is_empty() for change in changes.values())
+
+    # A new provider version means that the diagnostics are solved in full
+    monkeypatch.setattr(example_provider, "version", "999.0.0")
+    assert solver.find_changes(db_seeded) == {}
+
+    # The watermark is valid again after the next solve
+    solve_required_executions(config=config, db=db_seeded, solver=solver, incremental=True)
+    assert solver.find_changes(db_seeded).keys() == changes.keys()
+
+
+def test_solve_metrics_parallel(db_seeded, config, solver, mock_executor):
+    profiler = SolveProfiler()
+    with profiler.activate():
+        solve_required_executions(config=config, db=db_seeded, solver=solver, solve_workers=2)
+    runs = mock_executor.return_value.run.call_count
+    assert runs
+
+    statistics = ConstraintStatistics.load(config.paths.cache / "constraint_stats.json")
+    assert statistics.stats
+    assert profiler.diagnostic_summary()["candidates"].sum() == runs
+
+    with db_seeded.session.begin():
+        assert db_seeded.session.query(Execution).count() == runs
+
+
+def test_diagnostic_fingerprint(monkeypatch):
+    diagnostic = example_provider.diagnostics()[0]
+    fingerprint = solver_module.diagnostic_fingerprint(diagnostic)
+
+    # The fingerprint doesn't depend on how the requirements are formatted
+    monkeypatch.setattr(DataRequirement, "__repr__", lambda self: "DataRequirement()")
+    monkeypatch.setattr(FacetFilter, "__repr__", lambda self: "FacetFilter()")
+    assert solver_module.diagnostic_fingerprint(diagnostic) == fingerprint
+
+    requirement = diagnostic.data_requirements[0]
+    changed = evolve(requirement, filters=(FacetFilter(facets={"variable_id": "pr"}),))
+    monkeypatch.setattr(diagnostic, "data_requirements", (changed, *diagnostic.data_requirements[1:]))
+    assert solver_module.diagnostic_fingerprint(diagnostic) != fingerprint
+
+
 def test_solve_metrics_dry_run(db_seeded, config, solver, mock_executor):
     solve_required_executions(config=config, db=db_seeded, dry_run=True, solver=solver)
 
     assert mock_executor.return_value.run.call_count == 0
 
 
+def test_solve_metrics_constraint_statistics(db_seeded, config, solver, mock_executor):
+    solve_required_executions(config=config, db=db_seeded, solver=solver)
+
+    statistics = ConstraintStatistics.load(config.paths.cache / "constraint_stats.json")
+    assert statistics.stats
+    assert all(stats.calls for stats in statistics.stats.values())
+
+
+def test_solve_metrics_profile(db_seeded, config, solver, mock_executor, tmp_path):
+    profiler = SolveProfiler()
+    with profiler.activate():
+        solve_required_executions(config=config, db=db_seeded, solver=solver)
+
+    summary = profiler.summary()
+    assert {"solve", "extract", "filter", "db.write"} <= set(summary["stage"])
+    assert summary["total_time"].is_monotonic_decreasing
+
+    diagnostic_summary = profiler.diagnostic_summary()
+    assert diagnostic_summary["candidates"].sum() == mock_executor.return_value.run.call_count
+
+    profiler.write(tmp_path / "profile.json")
+    content = json.loads((tmp_path / "profile.json").read_text())
+    assert len(content["events"]) == len(profiler.events)
+
+    profiler.write(tmp_path / "trace.json", ProfileFormat.CHROME)
+    content = json.loads((tmp_path / "trace.json").read_text())
+    assert {event["ph"] for event in content["traceEvents"]} == {"X", "M"}
+
+
+def test_solve_metrics_plan(mocker, monkeypatch, db_seeded, config, mock_executor):
+    # The seeded database was modified moments ago
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_SETTLE_TIME", datetime.timedelta(0))
+
+    solve_required_executions(config=config, db=db_seeded)
+    initial_runs = mock_executor.return_value.run.call_count
+    assert initial_runs
+    assert list((config.paths.cache / "solve_plan").rglob("*.json"))
+
+    with db_seeded.session.begin():
+        for execution_group in db_seeded.session.query(ExecutionGroup):
+            execution_group.dirty = False
+
+    # Nothing has changed so the diagnostics aren't solved
+    build_spy = mocker.spy(ExecutionSolver, "build_from_db")
+    solve_required_executions(config=config, db=db_seeded)
+    assert build_spy.call_count == 0
+    assert mock_executor.return_value.run.call_count == initial_runs
+
+    # A dirty execution group requires the diagnostic to be solved again
+    with db_seeded.session.begin():
+        db_seeded.session.query(ExecutionGroup).first().dirty = True
+    solve_required_executions(config=config, db=db_seeded)
+    assert build_spy.call_count == 1
+    assert mock_executor.return_value.run.call_count == initial_runs + 1
+
+
+def test_solve_metrics_plan_stale(mocker, monkeypatch, db_seeded, config, mock_executor):
+    monkeypatch.setattr(snapshot_module, "SNAPSHOT_SETTLE_TIME", datetime.timedelta(0))
+
+    solve_required_executions(config=config, db=db_seeded)
+    with db_seeded.session.begin():
+        for execution_group in db_seeded.session.query(ExecutionGroup):
+            execution_group.dirty = False
+
+    # Modifying a dataset changes the fingerprint of the catalog
+    with db_seeded.session.begin():
+        dataset = db_seeded.session.query(Dataset).filter(Dataset.slug.like("%.tas.%")).first()
+        dataset.updated_at = datetime.datetime(2100, 1, 1)
+
+    build_spy = mocker.spy(ExecutionSolver, "build_from_db")
+    solve_required_executions(config=config, db=db_seeded)
+    assert build_spy.call_count == 1
+
+
 def test_solve_metric_executions_missing(mock_diagnostic, provider):
     mock_diagnostic.data_requirements = ()
     with pytest.raises(ValueError, match=f"Diagnostic {mock_diagnostic.slug!r} has no data requirements"):
@@ -551,6 +1333,38 @@ def test_solve_metric_executions_multiple_sets(solver, mock_diagnostic, provider
     )
 
 
+def test_solve_metric_executions_shared_collections(mocker, mock_diagnostic, provider):
+    mock_diagnostic.data_requirements = (
+        DataRequirement(
+            source_type=SourceDatasetType.CMIP6,
+            filters=(),
+            group_by=("variable_id",),
+        ),
+        DataRequirement(
+            source_type=SourceDatasetType.obs4MIPs,
+            filters=(),
+            group_by=("source_id",),
+        ),
+    )
+    data_catalog = {
+        SourceDatasetType.CMIP6: pd.DataFrame(
+            {"variable_id": ["tas", "pr"], "instance_id": ["CMIP6.tas", "CMIP6.pr"]}
+        ),
+        SourceDatasetType.obs4MIPs: pd.DataFrame(
+            {"source_id": ["ERA-5", "GPCP"], "instance_id": ["obs4MIPs.ERA-5", "obs4MIPs.GPCP"]}
+        ),
+    }
+    hash_spy = mocker.spy(pd.util, "hash_pandas_object")
+
+    executions = list(solve_executions(data_catalog, mock_diagnostic, provider))
+    assert len(executions) == 4
+    assert len({execution.datasets.hash for execution in executions}) == 4
+
+    # Each group is shared by the executions that use it and is only hashed once
+    assert executions[0].datasets[SourceDatasetType.CMIP6] is executions[1].datasets[SourceDatasetType.CMIP6]
+    assert hash_spy.call_count == 4
+
+
 def _prep_data_catalog(data_catalog: dict[str, Any]) -> pd.DataFrame:
     data_catalog_df = pd.DataFrame(data_catalog)
     data_catalog_df["instance_id"] = data_catalog_df.apply(